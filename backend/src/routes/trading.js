@@ -11,6 +11,57 @@ let portfolio = {
     positions: []
 };
 
+// Reports sent by the Python trading engine (signals, executions, closes)
+const ENGINE_REPORT_TYPES = ['signal', 'execution', 'close'];
+const MAX_ENGINE_REPORTS = 10000;
+let engineReports = [];
+
+// Payload fields each engine report type must carry
+const ENGINE_REPORT_REQUIRED_FIELDS = {
+    signal: ['symbol', 'type', 'price'],
+    execution: ['trade_id', 'symbol', 'amount', 'entry_price'],
+    close: ['trade_id', 'pnl']
+};
+
+// Idempotency keys of accepted reports, so engine retries are not stored twice
+const receivedReportKeys = new Set();
+
+/**
+ * Validate a single engine report, returning an error message or null
+ */
+function validateEngineReport(item) {
+    if (!item || typeof item !== 'object') {
+        return 'Report must be an object';
+    }
+    if (!ENGINE_REPORT_TYPES.includes(item.type)) {
+        return `Unknown report type: ${item.type}`;
+    }
+    if (item.id === undefined || item.id === null || item.id === '') {
+        return 'Missing report id';
+    }
+    if (!item.payload || typeof item.payload !== 'object' || Array.isArray(item.payload)) {
+        return 'Payload must be an object';
+    }
+    
+    const missing = ENGINE_REPORT_REQUIRED_FIELDS[item.type].filter(
+        field => item.payload[field] === undefined || item.payload[field] === null
+    );
+    if (missing.length > 0) {
+        return `Missing payload fields: ${missing.join(', ')}`;
+    }
+    return null;
+}
+
+/**
+ * Remember an accepted report key, forgetting the oldest beyond the report cap
+ */
+function rememberReportKey(key) {
+    receivedReportKeys.add(key);
+    if (receivedReportKeys.size > MAX_ENGINE_REPORTS) {
+        receivedReportKeys.delete(receivedReportKeys.values().next().value);
+    }
+}
+
 /**
  * @route   GET /api/trading/portfolio
  * @desc    Get user portfolio
@@ -277,6 +328,81 @@ router.get('/stats', (req, res) => {
     }
 });
 
+/**
+ * @route   POST /api/trading/batch
+ * @desc    Receive a batch of trading engine reports (JSON array or NDJSON, optionally gzipped)
+ * @access  Private
+ */
+router.post('/batch', express.text({ type: 'application/x-ndjson', limit: '10mb' }), (req, res) => {
+    try {
+        let items = req.body;
+        
+        // NDJSON: one report per line
+        if (typeof items === 'string') {
+            items = items.split('\n').filter(line => line.trim()).map(line => {
+                try {
+                    return JSON.parse(line);
+                } catch (error) {
+                    return null;
+                }
+            });
+        }
+        
+        if (!Array.isArray(items)) {
+            return res.status(400).json({
+                success: false,
+                message: 'Batch body must be a JSON array or NDJSON'
+            });
+        }
+        
+        // Each item is validated on its own; results echo the idempotency key so
+        // the engine can match them even when type and id repeat within a batch
+        const results = items.map(item => {
+            const key = item && item.key;
+            const result = { type: item && item.type, id: item && item.id, key };
+            
+            const error = validateEngineReport(item);
+            if (error) {
+                return { ...result, status: 'rejected', error };
+            }
+            
+            // Retry of a report that was already stored
+            if (key && receivedReportKeys.has(key)) {
+                return { ...result, status: 'ok', duplicate: true };
+            }
+            
+            engineReports.push({ type: item.type, id: item.id, key, ...item.payload, receivedAt: new Date().toISOString() });
+            if (key) {
+                rememberReportKey(key);
+            }
+            return { ...result, status: 'ok' };
+        });
+        
+        if (engineReports.length > MAX_ENGINE_REPORTS) {
+            engineReports = engineReports.slice(-MAX_ENGINE_REPORTS);
+        }
+        
+        const accepted = results.filter(result => result.status === 'ok').length;
+        logger.info(`Engine report batch received: ${accepted}/${results.length} accepted`);
+        
+        res.json({
+            success: true,
+            data: {
+                results,
+                accepted,
+                rejected: results.length - accepted
+            }
+        });
+    } catch (error) {
+        logger.error('Error processing report batch:', error);
+        res.status(500).json({
+            success: false,
+            message: 'Error processing report batch',
+            error: error.message
+        });
+    }
+});
+
 /**
  * Helper function to update portfolio
  */
@@ -66,6 +66,12 @@ async def test_coingecko():
                 print(f"   {i}. {token.get('name')} ({token.get('symbol')})")
         else:
             print("   ❌ Failed to get trending tokens")
+        
+        # Test 6: Rate limiter throughput (shared by every CoinGecko client)
+        print("\n6. Rate Limiter:")
+        stats = client.get_rate_limit_stats()
+        print(f"   Requests: {stats['requests']} | 429s: {stats['rate_limited']} | Throttled: {stats['throttled']}")
+        print(f"   Budget: {stats['configured_rpm']} rpm | Effective: {stats['effective_rpm']} rpm")
 
 if __name__ == "__main__":
     asyncio.run(test_coingecko())
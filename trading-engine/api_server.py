@@ -6,7 +6,7 @@ DEX Trading System - Altseason Edition
 
 import asyncio
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
@@ -16,6 +16,7 @@ from datetime import datetime
 from config.settings import load_settings
 from core.engine import TradingEngine
 from utils.logger import setup_logger
+from utils.metrics import render_metrics
 
 logger = setup_logger(__name__)
 
@@ -75,7 +76,8 @@ class TradingEngineAPI:
                     "start": "/start",
                     "stop": "/stop",
                     "execute": "/execute",
-                    "portfolio": "/portfolio"
+                    "portfolio": "/portfolio",
+                    "metrics": "/metrics"
                 }
             }
 
@@ -84,7 +86,8 @@ class TradingEngineAPI:
             return {
                 "status": "OK",
                 "timestamp": datetime.now().isoformat(),
-                "engine_active": self.engine is not None and getattr(self.engine, 'active', False)
+                "engine_active": self.engine is not None and getattr(self.engine, 'active', False),
+                "integrations": self.engine.health_monitor.get_status() if self.engine else None
             }
 
         @self.app.get("/status")
@@ -111,6 +114,12 @@ class TradingEngineAPI:
                 last_updated=datetime.now().isoformat()
             )
 
+        @self.app.get("/metrics")
+        async def get_metrics():
+            """Latência dos loops, estágios e event loop (formato Prometheus)"""
+            body, content_type = render_metrics()
+            return Response(content=body, media_type=content_type)
+
         @self.app.post("/start")
         async def start_engine():
             try:
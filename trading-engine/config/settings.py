@@ -4,7 +4,7 @@ Trading Engine Configuration Settings
 
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 @dataclass
@@ -15,7 +15,13 @@ class TradingSettings:
     max_position_size_percent: float
     stop_loss_percent: float
     take_profit_percent: float
+    trailing_stop_percent: float
+    max_holding_hours: float
+    strategy_max_holding_hours: Dict[str, float]
+    signal_execution_concurrency: int
+    signal_ranking: str
     max_simultaneous_trades: int
+    max_positions_per_symbol: int
     
     # API Keys
     oneinch_api_key: str
@@ -29,10 +35,67 @@ class TradingSettings:
     # Price Data
     coingecko_api_url: str
     price_update_interval: int
+    market_data_batch_mode: bool
+    market_data_batch_size: int
+    price_fetch_concurrency: int
+    price_request_timeout: float
+    coingecko_requests_per_minute: int
+    coingecko_max_retries: int
+    price_cache_mode: str
+    price_refresh_ahead_ratio: float
+    price_cache_max_stale: float
+    market_data_store_path: str
+    market_data_store_history: int
+    trade_journal_path: str
+    trade_journal_compact_every: int
+    
+    # Backend Reporting
+    backend_outbox_size: int
+    backend_outbox_batch_size: int
+    backend_outbox_max_retries: int
+    backend_outbox_spool_path: str
+    backend_outbox_flush_interval: float
+    backend_batch_format: str
+    backend_batch_gzip: bool
+    
+    # Monitoring
+    event_loop_lag_interval: float
+    health_check_timeout: float
+    health_cache_ttl: float
+    circuit_breaker_failure_threshold: int
+    circuit_breaker_reset_seconds: float
+    
+    # Strategy
+    momentum_vectorized: bool
+    signal_dedup_minutes: float
+    signal_registry_max_entries: int
     
     # Risk Management
     max_daily_loss_percent: float
     consecutive_loss_limit: int
+    risk_rolling_window_hours: float
+    portfolio_var_limit_percent: float
+    portfolio_var_confidence: float
+    portfolio_var_horizon_minutes: float
+    portfolio_risk_decay: float
+    portfolio_risk_sample_seconds: float
+    volatility_window: int
+    volatility_target_percent: float
+    volatility_min_adjustment: float
+
+    def max_holding_hours_for(self, strategy: Optional[str]) -> float:
+        """Tempo máximo de posição da estratégia (MAX_HOLDING_HOURS se não houver override)"""
+        return self.strategy_max_holding_hours.get(strategy, self.max_holding_hours)
+
+def _parse_float_map(value: str) -> Dict[str, float]:
+    """Converte 'Momentum=2,Breakout=6' em {'Momentum': 2.0, 'Breakout': 6.0}"""
+    mapping = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        key, _, number = item.partition('=')
+        mapping[key.strip()] = float(number)
+    return mapping
 
 def load_settings() -> TradingSettings:
     """Carrega configurações do arquivo .env"""
@@ -59,7 +122,13 @@ def load_settings() -> TradingSettings:
         max_position_size_percent=float(os.getenv('MAX_POSITION_SIZE_PERCENT', 5)),
         stop_loss_percent=float(os.getenv('STOP_LOSS_PERCENT', 3)),
         take_profit_percent=float(os.getenv('TAKE_PROFIT_PERCENT', 10)),
+        trailing_stop_percent=float(os.getenv('TRAILING_STOP_PERCENT', 0)),
+        max_holding_hours=float(os.getenv('MAX_HOLDING_HOURS', 4)),
+        strategy_max_holding_hours=_parse_float_map(os.getenv('STRATEGY_MAX_HOLDING_HOURS', '')),
+        signal_execution_concurrency=int(os.getenv('SIGNAL_EXECUTION_CONCURRENCY', 3)),
+        signal_ranking=os.getenv('SIGNAL_RANKING', 'confidence').lower(),
         max_simultaneous_trades=int(os.getenv('MAX_SIMULTANEOUS_TRADES', 3)),
+        max_positions_per_symbol=int(os.getenv('MAX_POSITIONS_PER_SYMBOL', 1)),
         
         # API Keys
         oneinch_api_key=os.getenv('ONEINCH_API_KEY'),
@@ -73,10 +142,53 @@ def load_settings() -> TradingSettings:
         # Price Data
         coingecko_api_url=os.getenv('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3'),
         price_update_interval=int(os.getenv('PRICE_UPDATE_INTERVAL', 5)),
+        market_data_batch_mode=os.getenv('MARKET_DATA_BATCH_MODE', 'true').lower() == 'true',
+        market_data_batch_size=int(os.getenv('MARKET_DATA_BATCH_SIZE', 250)),
+        price_fetch_concurrency=int(os.getenv('PRICE_FETCH_CONCURRENCY', 5)),
+        price_request_timeout=float(os.getenv('PRICE_REQUEST_TIMEOUT', 10)),
+        coingecko_requests_per_minute=int(os.getenv('COINGECKO_REQUESTS_PER_MINUTE', 30)),
+        coingecko_max_retries=int(os.getenv('COINGECKO_MAX_RETRIES', 3)),
+        price_cache_mode=os.getenv('PRICE_CACHE_MODE', 'blocking').lower(),
+        price_refresh_ahead_ratio=float(os.getenv('PRICE_REFRESH_AHEAD_RATIO', 0.8)),
+        price_cache_max_stale=float(os.getenv('PRICE_CACHE_MAX_STALE', 60)),
+        market_data_store_path=os.getenv('MARKET_DATA_STORE_PATH', ''),
+        market_data_store_history=int(os.getenv('MARKET_DATA_STORE_HISTORY', 50)),
+        trade_journal_path=os.getenv('TRADE_JOURNAL_PATH', ''),
+        trade_journal_compact_every=int(os.getenv('TRADE_JOURNAL_COMPACT_EVERY', 1000)),
+        
+        # Backend Reporting
+        backend_outbox_size=int(os.getenv('BACKEND_OUTBOX_SIZE', 1000)),
+        backend_outbox_batch_size=int(os.getenv('BACKEND_OUTBOX_BATCH_SIZE', 50)),
+        backend_outbox_max_retries=int(os.getenv('BACKEND_OUTBOX_MAX_RETRIES', 5)),
+        backend_outbox_spool_path=os.getenv('BACKEND_OUTBOX_SPOOL_PATH', ''),
+        backend_outbox_flush_interval=float(os.getenv('BACKEND_OUTBOX_FLUSH_INTERVAL', 1.0)),
+        backend_batch_format=os.getenv('BACKEND_BATCH_FORMAT', 'json').lower(),
+        backend_batch_gzip=os.getenv('BACKEND_BATCH_GZIP', 'true').lower() == 'true',
+        
+        # Monitoring
+        event_loop_lag_interval=float(os.getenv('EVENT_LOOP_LAG_INTERVAL', 0.5)),
+        health_check_timeout=float(os.getenv('HEALTH_CHECK_TIMEOUT', 5)),
+        health_cache_ttl=float(os.getenv('HEALTH_CACHE_TTL', 10)),
+        circuit_breaker_failure_threshold=int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 3)),
+        circuit_breaker_reset_seconds=float(os.getenv('CIRCUIT_BREAKER_RESET_SECONDS', 60)),
+        
+        # Strategy
+        momentum_vectorized=os.getenv('MOMENTUM_VECTORIZED', 'false').lower() == 'true',
+        signal_dedup_minutes=float(os.getenv('SIGNAL_DEDUP_MINUTES', 30)),
+        signal_registry_max_entries=int(os.getenv('SIGNAL_REGISTRY_MAX_ENTRIES', 10000)),
         
         # Risk Management
         max_daily_loss_percent=float(os.getenv('MAX_DAILY_LOSS_PERCENT', 10)),
-        consecutive_loss_limit=int(os.getenv('CONSECUTIVE_LOSS_LIMIT', 3))
+        consecutive_loss_limit=int(os.getenv('CONSECUTIVE_LOSS_LIMIT', 3)),
+        risk_rolling_window_hours=float(os.getenv('RISK_ROLLING_WINDOW_HOURS', 24)),
+        portfolio_var_limit_percent=float(os.getenv('PORTFOLIO_VAR_LIMIT_PERCENT', 5)),
+        portfolio_var_confidence=float(os.getenv('PORTFOLIO_VAR_CONFIDENCE', 0.95)),
+        portfolio_var_horizon_minutes=float(os.getenv('PORTFOLIO_VAR_HORIZON_MINUTES', 60)),
+        portfolio_risk_decay=float(os.getenv('PORTFOLIO_RISK_DECAY', 0.94)),
+        portfolio_risk_sample_seconds=float(os.getenv('PORTFOLIO_RISK_SAMPLE_SECONDS', 60)),
+        volatility_window=int(os.getenv('VOLATILITY_WINDOW', 20)),
+        volatility_target_percent=float(os.getenv('VOLATILITY_TARGET_PERCENT', 2.0)),
+        volatility_min_adjustment=float(os.getenv('VOLATILITY_MIN_ADJUSTMENT', 0.25))
     )
 
 def validate_settings(settings: TradingSettings) -> bool:
@@ -86,11 +198,49 @@ def validate_settings(settings: TradingSettings) -> bool:
         (0 < settings.max_position_size_percent <= 100, "Position size must be between 0-100%"),
         (0 < settings.stop_loss_percent <= 50, "Stop loss must be between 0-50%"),
         (settings.take_profit_percent > 0, "Take profit must be positive"),
+        (0 <= settings.trailing_stop_percent < 100, "Trailing stop must be between 0-100% (0 disables)"),
+        (settings.max_holding_hours > 0, "Max holding period must be positive"),
+        (all(hours > 0 for hours in settings.strategy_max_holding_hours.values()),
+         "Strategy max holding periods must be positive"),
+        (settings.signal_execution_concurrency > 0, "Signal execution concurrency must be positive"),
+        (settings.signal_ranking in ('confidence', 'edge'), "Signal ranking must be 'confidence' or 'edge'"),
         (settings.max_simultaneous_trades > 0, "Max trades must be positive"),
+        (settings.max_positions_per_symbol > 0, "Max positions per symbol must be positive"),
         (settings.chain_id > 0, "Chain ID must be positive"),
         (settings.price_update_interval > 0, "Price update interval must be positive"),
+        (0 < settings.market_data_batch_size <= 250, "Market data batch size must be between 1-250"),
+        (settings.price_fetch_concurrency > 0, "Price fetch concurrency must be positive"),
+        (settings.price_request_timeout > 0, "Price request timeout must be positive"),
+        (settings.coingecko_requests_per_minute > 0, "CoinGecko request budget must be positive"),
+        (settings.coingecko_max_retries >= 0, "CoinGecko max retries cannot be negative"),
+        (settings.price_cache_mode in ('blocking', 'swr'), "Price cache mode must be 'blocking' or 'swr'"),
+        (0 < settings.price_refresh_ahead_ratio <= 1, "Price refresh-ahead ratio must be between 0-1"),
+        (settings.price_cache_max_stale > 0, "Price cache max staleness must be positive"),
+        (settings.market_data_store_history > 0, "Market data store history must be positive"),
+        (settings.trade_journal_compact_every > 0, "Trade journal compaction interval must be positive"),
+        (settings.backend_outbox_size > 0, "Backend outbox size must be positive"),
+        (settings.backend_outbox_batch_size > 0, "Backend outbox batch size must be positive"),
+        (settings.backend_outbox_max_retries >= 0, "Backend outbox max retries cannot be negative"),
+        (settings.backend_outbox_flush_interval >= 0, "Backend outbox flush interval cannot be negative"),
+        (settings.backend_batch_format in ('json', 'ndjson'), "Backend batch format must be 'json' or 'ndjson'"),
+        (settings.event_loop_lag_interval >= 0, "Event loop lag interval cannot be negative"),
+        (settings.health_check_timeout > 0, "Health check timeout must be positive"),
+        (settings.health_cache_ttl >= 0, "Health cache TTL cannot be negative"),
+        (settings.circuit_breaker_failure_threshold > 0, "Circuit breaker failure threshold must be positive"),
+        (settings.circuit_breaker_reset_seconds > 0, "Circuit breaker reset timeout must be positive"),
+        (settings.signal_dedup_minutes >= 0, "Signal dedup window cannot be negative"),
+        (settings.signal_registry_max_entries > 0, "Signal registry size must be positive"),
         (0 < settings.max_daily_loss_percent <= 100, "Daily loss limit must be between 0-100%"),
-        (settings.consecutive_loss_limit > 0, "Consecutive loss limit must be positive")
+        (settings.consecutive_loss_limit > 0, "Consecutive loss limit must be positive"),
+        (settings.risk_rolling_window_hours > 0, "Risk rolling window must be positive"),
+        (0 <= settings.portfolio_var_limit_percent <= 100, "Portfolio VaR limit must be between 0-100% (0 disables)"),
+        (0.5 < settings.portfolio_var_confidence < 1, "Portfolio VaR confidence must be between 0.5-1"),
+        (settings.portfolio_var_horizon_minutes > 0, "Portfolio VaR horizon must be positive"),
+        (0 < settings.portfolio_risk_decay < 1, "Portfolio risk decay must be between 0-1"),
+        (settings.portfolio_risk_sample_seconds > 0, "Portfolio risk sample interval must be positive"),
+        (settings.volatility_window > 1, "Volatility window must be greater than 1"),
+        (settings.volatility_target_percent >= 0, "Volatility target cannot be negative (0 disables)"),
+        (0 < settings.volatility_min_adjustment <= 1, "Volatility min adjustment must be between 0-1")
     ]
     
     for is_valid, error_msg in validations:
@@ -0,0 +1,132 @@
+"""
+Deadline Scheduler for Time-Limit Exits
+"""
+
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class DeadlineScheduler:
+    """
+    Heap de prazos que dispara um callback quando cada chave expira
+
+    A task dorme até o prazo mais próximo (ou até um prazo mais cedo ser
+    agendado), então não há trabalho enquanto nada vence. Cancelamentos e
+    reagendamentos são preguiçosos: a entrada antiga fica no heap e é
+    descartada quando chega ao topo.
+
+    Os callbacks dos prazos vencidos rodam em tasks próprias, com no máximo
+    `concurrency` em voo, para que um callback lento (ex.: um swap) não atrase
+    os demais nem os prazos seguintes.
+    """
+
+    def __init__(self, name: str, on_expire: Callable[[str], Awaitable], concurrency: int = 1):
+        self.name = name
+        self.on_expire = on_expire
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._inflight: Set[asyncio.Task] = set()
+        self._deadlines: Dict[str, datetime] = {}
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def schedule(self, key: str, deadline: datetime):
+        """Agenda (ou reagenda) o prazo de uma chave"""
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+
+        # Só acorda a task se o novo prazo for o mais próximo
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: str) -> bool:
+        """Cancela o prazo de uma chave (remoção preguiçosa do heap)"""
+        return self._deadlines.pop(key, None) is not None
+
+    def deadline(self, key: str) -> Optional[datetime]:
+        return self._deadlines.get(key)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Prazo ativo mais próximo"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Remove e retorna as chaves com prazo vencido"""
+        now = now or datetime.now()
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+
+    def _discard_stale(self):
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            if self._deadlines.get(key) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def start(self):
+        """Inicia a task que dispara os prazos vencidos"""
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"Deadline scheduler started for {self.name}")
+
+    async def stop(self):
+        """Para a task de disparo e aguarda os callbacks já iniciados"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _dispatch(self, key: str):
+        async with self._semaphore:
+            try:
+                await self.on_expire(key)
+            except Exception as e:
+                logger.error(f"Error handling {self.name} deadline for {key}: {e}")
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+
+            for key in self.pop_due():
+                self.fired += 1
+                task = asyncio.create_task(self._dispatch(key))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            next_deadline = self.next_deadline()
+            timeout = None
+            if next_deadline is not None:
+                timeout = max(0.0, (next_deadline - datetime.now()).total_seconds())
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
@@ -4,21 +4,42 @@ Trading Engine Core - Main Engine Class
 
 import asyncio
 import aiohttp
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime, timedelta
 import uuid
+import weakref
 
 from config.settings import TradingSettings
 from strategies.momentum import MomentumStrategy
 from integrations.oneinch import OneInchClient
 from integrations.price_data import PriceDataClient
 from integrations.backend_api import BackendAPIClient
+from integrations.backend_outbox import BackendOutbox
+from integrations.market_store import MarketDataStore
 from core.risk_manager import RiskManager
+from core.trigger_index import PriceTriggerIndex, TRAILING_STOP
+from core.deadline_scheduler import DeadlineScheduler
+from core.signal_queue import SignalPriorityQueue
+from core.health import HealthMonitor
+from core.position_index import PositionIndex
+from core.trade_journal import (
+    TradeJournal, EVENT_EXECUTION, EVENT_STOP_UPDATE, EVENT_CLOSE, EVENT_TRAILING_PEAK
+)
 from utils.logger import setup_logger, TradingLogger
+from utils.metrics import (
+    EventLoopLagProbe, get_latency_summary, time_loop, time_stage,
+    LOOP_MARKET_ANALYSIS, LOOP_TRADE_MONITORING, STAGE_FETCH, STAGE_ANALYZE, STAGE_RISK
+)
 
 logger = setup_logger(__name__)
 trading_logger = TradingLogger(__name__)
 
+# Histórico persistido mais antigo que isto não é restaurado (momentum obsoleto)
+MARKET_HISTORY_RESTORE_MAX_AGE = timedelta(hours=1)
+
+# Intervalo para nova tentativa quando o fechamento por tempo falha
+TIME_LIMIT_RETRY_DELAY = timedelta(seconds=1)
+
 class TradingEngine:
     """
     Trading Engine principal que coordena todas as operações
@@ -32,10 +53,36 @@ class TradingEngine:
         
         # Estado do engine
         self.active_trades: Dict[str, dict] = {}
+        self.trigger_index = PriceTriggerIndex()
+        self.time_limit_scheduler = DeadlineScheduler(
+            "trade time limit", self._close_expired_trade,
+            concurrency=settings.signal_execution_concurrency
+        )
+        # Trades com venda em andamento (evita fechar o mesmo trade duas vezes)
+        self._closing: Set[str] = set()
         self.daily_pnl = 0.0
         self.consecutive_losses = 0
         self.last_trade_time = None
         
+        # Pipeline de execução de sinais: admissão em lote, execução com concorrência limitada.
+        # Reservas pendentes contam nos limites de risco e no capital alocado até o trade concluir.
+        self.signal_semaphore = asyncio.Semaphore(settings.signal_execution_concurrency)
+        self.admission_lock = asyncio.Lock()
+        # Um lock por símbolo serializa abertura e fechamento do mesmo token: swaps de
+        # compra e venda não se sobrepõem e o estado do símbolo muda só com o lock.
+        # O dicionário é fraco, então locks sem uso são descartados.
+        self._symbol_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+        self.pending_trades: Dict[str, dict] = {}
+        self.allocated_capital = 0.0
+        
+        # Sinais aguardando execução, ordenados por score. Sinais de ticks anteriores
+        # são descartados (o preço deles já não vale) e a estratégia pode reemiti-los.
+        self.signal_queue = SignalPriorityQueue(
+            settings.signal_ranking,
+            max_age=timedelta(seconds=settings.price_update_interval),
+            on_drop=self._release_signal
+        )
+        
         # Inicializa componentes
         self.risk_manager = RiskManager(settings)
         self.strategy = MomentumStrategy(settings)
@@ -43,6 +90,52 @@ class TradingEngine:
         self.price_data_client = PriceDataClient(settings)
         self.backend_client = BackendAPIClient(settings)
         
+        # Índices de posições abertas e reservas por símbolo, chain e estratégia
+        self.positions = PositionIndex(settings.chain_id, self.strategy.name)
+        
+        # Health checks concorrentes, em cache e com circuit breaker por integração.
+        # O backend não é crítico: relatórios ficam no outbox enquanto ele estiver fora.
+        self.health_monitor = HealthMonitor(
+            timeout=settings.health_check_timeout,
+            ttl=settings.health_cache_ttl,
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_timeout=settings.circuit_breaker_reset_seconds
+        )
+        self.health_monitor.register('oneinch', self.oneinch_client.health_check)
+        self.health_monitor.register('price_data', self.price_data_client.health_check)
+        self.health_monitor.register('backend', self.backend_client.health_check, critical=False)
+        
+        # Relatórios ao backend saem do caminho crítico do trade
+        self.backend_outbox = BackendOutbox(
+            self.backend_client,
+            max_size=settings.backend_outbox_size,
+            batch_size=settings.backend_outbox_batch_size,
+            max_retries=settings.backend_outbox_max_retries,
+            spool_path=settings.backend_outbox_spool_path,
+            flush_interval=settings.backend_outbox_flush_interval
+        )
+        
+        # Persistência local de dados de mercado (opcional)
+        self.market_store: Optional[MarketDataStore] = None
+        if settings.market_data_store_path:
+            self.market_store = MarketDataStore(
+                settings.market_data_store_path,
+                history_limit=settings.market_data_store_history
+            )
+        
+        # Journal dos trades para recuperação após crash (opcional)
+        self.trade_journal: Optional[TradeJournal] = None
+        if settings.trade_journal_path:
+            self.trade_journal = TradeJournal(
+                settings.trade_journal_path,
+                compact_every=settings.trade_journal_compact_every
+            )
+        
+        # Medição do atraso do event loop (opcional)
+        self.lag_probe: Optional[EventLoopLagProbe] = None
+        if settings.event_loop_lag_interval > 0:
+            self.lag_probe = EventLoopLagProbe(settings.event_loop_lag_interval)
+        
         logger.info("Trading Engine initialized", 
                    capital=settings.capital_usdt,
                    max_trades=settings.max_simultaneous_trades)
@@ -57,6 +150,20 @@ class TradingEngine:
             await self.oneinch_client.initialize(self.session)
             await self.price_data_client.initialize(self.session)
             await self.backend_client.initialize(self.session)
+            self.backend_outbox.start()
+            
+            # Restaura trades abertos e cache/histórico persistidos (warm restart)
+            self._restore_trades()
+            self._restore_market_data()
+            
+            # Atualização do cache de preços em background (modo swr)
+            self.price_data_client.start_background_refresh()
+            
+            # Fechamento por tempo limite dirigido por prazos
+            self.time_limit_scheduler.start()
+            
+            if self.lag_probe:
+                self.lag_probe.start()
             
             # Inicia tasks assíncronas
             self.tasks = [
@@ -87,9 +194,25 @@ class TradingEngine:
                 except asyncio.CancelledError:
                     pass
         
+        await self.time_limit_scheduler.stop()
+        
+        if self.lag_probe:
+            await self.lag_probe.stop()
+        
         # Fecha todas as posições ativas
         await self._close_all_positions("engine_shutdown")
         
+        if self.trade_journal:
+            await self.trade_journal.close()
+        
+        # Entrega (ou grava no spool) os relatórios pendentes antes de fechar a sessão
+        await self.backend_outbox.stop()
+        
+        await self.price_data_client.stop_background_refresh()
+        
+        if self.market_store:
+            self.market_store.close()
+        
         # Fecha conexões
         if self.session and not self.session.closed:
             await self.session.close()
@@ -102,55 +225,265 @@ class TradingEngine:
         
         while self.active:
             try:
-                # Obtém dados de mercado
-                market_data = await self.price_data_client.get_market_data()
+                with time_loop(LOOP_MARKET_ANALYSIS):
+                    has_market_data = await self._analyze_market()
                 
-                if not market_data:
+                if not has_market_data:
                     await asyncio.sleep(5)
                     continue
                 
-                # Analisa oportunidades usando estratégia
-                signals = await self.strategy.analyze(market_data)
-                
-                # Processa cada sinal
-                for signal in signals:
-                    await self._process_trading_signal(signal)
-                
             except Exception as e:
                 logger.error(f"Error in market analysis loop: {e}")
             
             await asyncio.sleep(self.settings.price_update_interval)
 
-    async def _process_trading_signal(self, signal: dict):
-        """Processa um sinal de trading"""
+    async def _analyze_market(self) -> bool:
+        """Uma iteração da análise de mercado; retorna False se não houver dados"""
+        # Obtém dados de mercado
+        with time_stage(STAGE_FETCH):
+            market_data = await self.price_data_client.get_market_data()
+        
+        if not market_data:
+            return False
+        
+        # Alimenta a volatilidade por token (sizing) e a covariância do risco de portfólio
+        prices = {
+            data.get('symbol', token_id.upper()): data.get('price')
+            for token_id, data in market_data.items()
+        }
+        self.risk_manager.volatility_service.update(prices)
+        self.risk_manager.portfolio_risk.update_prices(prices)
+        
+        # Descarta sinais enfileirados de ticks anteriores antes de gerar os novos
+        self.signal_queue.purge_expired()
+        
+        # Analisa oportunidades usando estratégia
+        with time_stage(STAGE_ANALYZE):
+            signals = await self.strategy.analyze(market_data)
+        
+        # Persiste snapshots e histórico para warm restart
+        await self._persist_market_data(market_data)
+        
+        # Enfileira por score e executa em paralelo os melhores que cabem nos limites
+        self.signal_queue.extend(signals)
+        await self._process_trading_signals(self._admit_queued_signals())
+        return True
+
+    def _restore_trades(self):
+        """Reconstrói trades abertos, P&L diário e perdas consecutivas a partir do journal"""
+        if not self.trade_journal:
+            return
+        
         try:
-            # Log do sinal
-            trading_logger.trade_signal(
-                symbol=signal['symbol'],
-                signal_type=signal['type'],
-                price=signal['price'],
-                confidence=signal['confidence']
-            )
+            state = self.trade_journal.open()
+            self.trade_journal.start()
             
-            # Valida com risk manager
-            if not await self.risk_manager.validate_trade(signal, self.active_trades):
-                logger.info(f"Trade rejected by risk manager: {signal['symbol']}")
-                return
+            self.daily_pnl = state['daily_pnl']
+            self.consecutive_losses = state['consecutive_losses']
+            self.risk_manager.restore_state(self.daily_pnl, self.consecutive_losses)
             
-            # Executa o trade
-            await self._execute_trade(signal)
+            for trade_id, trade in state['active_trades'].items():
+                trade['timestamp'] = datetime.fromisoformat(trade['timestamp'])
+                self.active_trades[trade_id] = trade
+                self.allocated_capital += trade.get('position_size', 0.0)
+                self.positions.add(trade_id, trade)
+
+                # Níveis já incluem os ajustes de stop_update; o trailing parte do último pico gravado
+                self._arm_triggers(trade_id, trade, trade.get('trailing_peak', trade['entry_price']))
+                self.time_limit_scheduler.schedule(trade_id, self._holding_deadline(trade))
+            
+            if self.active_trades:
+                logger.info(f"Restored {len(self.active_trades)} open trades from journal",
+                           daily_pnl=self.daily_pnl,
+                           consecutive_losses=self.consecutive_losses)
+            
+        except Exception as e:
+            logger.error(f"Error restoring trades from journal: {e}")
+
+    def _journal(self, event: str, data: dict):
+        """Registra um evento de trade no journal (se habilitado)"""
+        if not self.trade_journal:
+            return
+        try:
+            self.trade_journal.record(event, data)
+        except Exception as e:
+            logger.error(f"Error writing trade journal: {e}")
+
+    def _restore_market_data(self):
+        """Carrega snapshots e histórico do store local"""
+        if not self.market_store:
+            return
+        
+        try:
+            self.market_store.open()
+            
+            snapshots, updated_at = self.market_store.load_snapshots()
+            self.price_data_client.price_cache.update(snapshots)
+            self.price_data_client.last_update.update(updated_at)
+            
+            history = self.market_store.load_history(max_age=MARKET_HISTORY_RESTORE_MAX_AGE)
+            for token_id, (prices, volumes) in history.items():
+                self.strategy.seed_history(token_id, prices, volumes)
+            
+            logger.info("Market data restored from local store",
+                        snapshots=len(snapshots),
+                        history_tokens=len(history))
+            
+        except Exception as e:
+            logger.error(f"Error restoring market data: {e}")
+
+    async def _persist_market_data(self, market_data: Dict[str, Dict]):
+        """Grava os snapshots e o ponto de histórico do tick atual"""
+        if not self.market_store:
+            return
+        
+        try:
+            price_cache = self.price_data_client.price_cache
+            snapshots = {
+                token_id: price_cache[token_id]
+                for token_id in market_data if token_id in price_cache
+            }
+            points = [
+                (token_id, data.get('price', 0), data.get('volume_24h', 0))
+                for token_id, data in market_data.items()
+            ]
+            
+            await self.market_store.save_snapshots_async(snapshots, self.price_data_client.last_update)
+            await self.market_store.append_history_async(points)
             
+        except Exception as e:
+            logger.error(f"Error persisting market data: {e}")
+
+    async def _process_trading_signals(self, signals: List[dict]):
+        """Valida os sinais do tick em lote e executa os aprovados em paralelo, com concorrência limitada"""
+        if not signals:
+            return
+        
+        try:
+            for signal in signals:
+                # Log do sinal
+                trading_logger.trade_signal(
+                    symbol=signal['symbol'],
+                    signal_type=signal['type'],
+                    price=signal['price'],
+                    confidence=signal['confidence']
+                )
+            
+            admitted = await self._admit_signals(signals)
+            if admitted:
+                await asyncio.gather(*(
+                    self._execute_reserved(signal, reservation) for signal, reservation in admitted
+                ))
+            
+        except Exception as e:
+            logger.error(f"Error processing signals: {e}")
+
+    def _symbol_lock(self, symbol: str) -> asyncio.Lock:
+        """Lock compartilhado pelos caminhos de abertura e fechamento do símbolo"""
+        lock = self._symbol_locks.get(symbol)
+        if lock is None:
+            lock = self._symbol_locks[symbol] = asyncio.Lock()
+        return lock
+
+    def _release_signal(self, signal: dict):
+        """Sinal descartado da fila sem execução: libera a deduplicação da estratégia"""
+        self.strategy.release_signal(signal)
+
+    def _admit_queued_signals(self) -> List[dict]:
+        """Retira da fila os melhores sinais para os slots e o capital livres"""
+        open_trades = len(self.active_trades) + len(self.pending_trades)
+        slots = self.settings.max_simultaneous_trades - open_trades
+        if slots <= 0 or not self.signal_queue:
+            return []
+        
+        # Com um circuito crítico (1inch, dados de preço) aberto nenhum sinal é admitido
+        if self.health_monitor.open_breakers():
+            return []
+        
+        return self.signal_queue.admit(
+            slots,
+            self.settings.capital_usdt - self.allocated_capital,
+            lambda signal: self.risk_manager.calculate_position_size(
+                signal['price'], self.settings.capital_usdt, signal['symbol']
+            )
+        )
+
+    async def _execute_reserved(self, signal: dict, reservation: dict):
+        """Executa um sinal admitido e libera sua reserva ao final"""
+        trade_id = None
+        try:
+            async with self.signal_semaphore, self._symbol_lock(signal['symbol']):
+                trade_id = await self._execute_trade(signal, reservation['position_size'])
         except Exception as e:
             logger.error(f"Error processing signal: {e}")
+        finally:
+            self._release_reservation(reservation)
+            # Swap falhou: a estratégia pode reemitir o sinal no próximo tick
+            if trade_id is None:
+                self._release_signal(signal)
+
+    async def _admit_signals(self, signals: List[dict]) -> List[tuple]:
+        """
+        Valida o lote de sinais e reserva capital de forma atômica
+        
+        Trades em execução contam como ativos para os limites de risco, de modo
+        que lotes concorrentes não ultrapassam o número máximo de trades nem o
+        capital disponível.
+        
+        Returns:
+            Pares (sinal, reserva) dos sinais aprovados
+        """
+        async with self.admission_lock:
+            # Valida com risk manager (o índice de posições inclui as reservas pendentes)
+            with time_stage(STAGE_RISK):
+                decisions = await self.risk_manager.validate_trades(
+                    signals,
+                    self.active_trades,
+                    self.positions,
+                    available_capital=self.settings.capital_usdt - self.allocated_capital
+                )
+            
+            admitted = []
+            for decision in decisions:
+                signal = decision['signal']
+                if not decision['approved']:
+                    logger.info(f"Trade rejected by risk manager: {signal['symbol']}",
+                               reasons=decision['reasons'])
+                    self._release_signal(signal)
+                    continue
+                admitted.append((signal, self._reserve(signal, decision['position_size'])))
+            return admitted
+
+    def _reserve(self, signal: dict, position_size: float) -> dict:
+        """Reserva capital e conta o sinal nos limites até o trade concluir"""
+        reservation = {
+            'id': str(uuid.uuid4()),
+            'symbol': signal['symbol'],
+            'position_size': position_size,
+            'strategy': signal.get('strategy', self.strategy.name),
+            'chain_id': signal.get('chain_id', self.settings.chain_id)
+        }
+        self.pending_trades[reservation['id']] = reservation
+        self.positions.add(reservation['id'], reservation)
+        self.allocated_capital += position_size
+        return reservation
+
+    def _release_reservation(self, reservation: dict):
+        """Libera a reserva; o capital de trades executados passa a contar pelo trade ativo"""
+        self.pending_trades.pop(reservation['id'], None)
+        self.positions.remove(reservation['id'])
+        self.allocated_capital -= reservation['position_size']
 
-    async def _execute_trade(self, signal: dict):
-        """Executa um trade baseado no sinal"""
+    async def _execute_trade(self, signal: dict, position_size: Optional[float] = None) -> Optional[str]:
+        """Executa um trade baseado no sinal e retorna o ID do trade (None se falhar)"""
         try:
             # Calcula tamanho da posição
-            position_size = self.risk_manager.calculate_position_size(
-                signal['price'], 
-                self.settings.capital_usdt
-            )
+            if position_size is None:
+                position_size = self.risk_manager.calculate_position_size(
+                    signal['price'], 
+                    self.settings.capital_usdt,
+                    signal['symbol']
+                )
             
             # Executa via 1inch
             trade_result = await self.oneinch_client.execute_swap(
@@ -161,18 +494,27 @@ class TradingEngine:
             )
             
             if trade_result['success']:
-                # Registra trade ativo
+                # Registra trade ativo; stop e alvo partem do preço efetivo de execução
                 trade_id = str(uuid.uuid4())
+                execution_price = trade_result['execution_price']
                 self.active_trades[trade_id] = {
                     'id': trade_id,
                     'symbol': signal['symbol'],
-                    'entry_price': trade_result['execution_price'],
+                    'entry_price': execution_price,
                     'amount': trade_result['amount_out'],
-                    'stop_loss': signal['price'] * (1 - self.settings.stop_loss_percent / 100),
-                    'take_profit': signal['price'] * (1 + self.settings.take_profit_percent / 100),
+                    'stop_loss': execution_price * (1 - self.settings.stop_loss_percent / 100),
+                    'take_profit': execution_price * (1 + self.settings.take_profit_percent / 100),
+                    'position_size': position_size,
+                    'strategy': signal.get('strategy', self.strategy.name),
+                    'chain_id': signal.get('chain_id', self.settings.chain_id),
                     'timestamp': datetime.now(),
                     'tx_hash': trade_result['tx_hash']
                 }
+                self.allocated_capital += position_size
+                self.positions.add(trade_id, self.active_trades[trade_id])
+                self._journal(EVENT_EXECUTION, self.active_trades[trade_id])
+                self._arm_triggers(trade_id, self.active_trades[trade_id], execution_price)
+                self.time_limit_scheduler.schedule(trade_id, self._holding_deadline(self.active_trades[trade_id]))
                 
                 # Log da execução
                 trading_logger.trade_execution(
@@ -180,19 +522,21 @@ class TradingEngine:
                     symbol=signal['symbol'],
                     side="buy",
                     amount=trade_result['amount_out'],
-                    price=trade_result['execution_price']
+                    price=execution_price
                 )
                 
-                # Notifica backend
-                await self.backend_client.report_trade_execution(self.active_trades[trade_id])
+                # Notifica backend (assíncrono, via outbox)
+                self.backend_outbox.enqueue(self.backend_client.execution_report(self.active_trades[trade_id]))
                 
                 logger.info(f"Trade executed successfully: {trade_id}")
+                return trade_id
                 
             else:
                 logger.error(f"Trade execution failed: {trade_result['error']}")
                 
         except Exception as e:
             logger.error(f"Error executing trade: {e}")
+        return None
 
     async def _trade_monitoring_loop(self):
         """Loop de monitoramento de trades ativos"""
@@ -204,52 +548,124 @@ class TradingEngine:
                     await asyncio.sleep(1)
                     continue
                 
-                # Monitora cada trade ativo
-                trades_to_close = []
-                
-                for trade_id, trade in self.active_trades.items():
-                    # Obtém preço atual
-                    current_price = await self.price_data_client.get_current_price(trade['symbol'])
-                    
-                    if current_price is None:
-                        continue
-                    
-                    # Verifica condições de fechamento
-                    close_reason = None
+                with time_loop(LOOP_TRADE_MONITORING):
+                    # Um único snapshot de preços para todos os símbolos com gatilhos
+                    symbols = self.trigger_index.symbols()
+                    with time_stage(STAGE_FETCH):
+                        current_prices = await self.price_data_client.get_current_prices(symbols) if symbols else {}
                     
-                    if current_price <= trade['stop_loss']:
-                        close_reason = "stop_loss"
-                    elif current_price >= trade['take_profit']:
-                        close_reason = "take_profit"
-                    elif self._should_close_by_time(trade):
-                        close_reason = "time_limit"
+                    trades_to_close = self._evaluate_triggers(current_prices)
                     
-                    if close_reason:
-                        trades_to_close.append((trade_id, close_reason))
-                
-                # Fecha trades que atingiram condições
-                for trade_id, reason in trades_to_close:
-                    await self._close_trade(trade_id, reason)
+                    # Fecha trades que atingiram condições
+                    for trade_id, reason, current_price in trades_to_close:
+                        await self._close_trade(trade_id, reason, current_price)
                 
             except Exception as e:
                 logger.error(f"Error in trade monitoring loop: {e}")
             
             await asyncio.sleep(1)
 
-    async def _close_trade(self, trade_id: str, reason: str):
-        """Fecha um trade específico"""
-        try:
-            trade = self.active_trades[trade_id]
+    def _evaluate_triggers(self, current_prices: Dict[str, float]) -> List[tuple]:
+        """Aplica os preços ao índice e retorna (trade_id, motivo, preço) dos gatilhos cruzados"""
+        trades_to_close = []
+        for symbol, current_price in current_prices.items():
+            lowest_peak = self.trigger_index.lowest_peak(symbol)
             
-            # Executa venda via 1inch
-            close_result = await self.oneinch_client.execute_swap(
-                from_token=trade['symbol'],
-                to_token="USDT",
-                amount=trade['amount'],
-                slippage=1.0
-            )
+            # Cada preço aciona apenas os gatilhos cruzados (stop, trailing, alvo)
+            for trade_id, reason in self.trigger_index.update_price(symbol, current_price):
+                trades_to_close.append((trade_id, reason, current_price))
+            
+            # Um evento por símbolo registra a elevação dos picos trailing
+            if lowest_peak is not None and current_price is not None and current_price > lowest_peak:
+                self._journal(EVENT_TRAILING_PEAK, {'symbol': symbol, 'peak': current_price})
+        return trades_to_close
+
+    def _holding_deadline(self, trade: dict) -> datetime:
+        """Prazo de saída por tempo do trade, pelo limite da estratégia que o abriu"""
+        hours = self.settings.max_holding_hours_for(trade.get('strategy'))
+        return trade['timestamp'] + timedelta(hours=hours)
+
+    def _arm_triggers(self, trade_id: str, trade: dict, reference_price: float):
+        """Registra stop-loss, take-profit e trailing stop do trade no índice de gatilhos"""
+        self.trigger_index.add(
+            trade_id,
+            trade['symbol'],
+            stop_loss=trade['stop_loss'],
+            take_profit=trade['take_profit'],
+            trailing_percent=self.settings.trailing_stop_percent or None,
+            reference_price=reference_price
+        )
+
+    def _rearm_triggers(self, trade_id: str, trade: dict, reason: str, price: float):
+        """Rearma um trade cujo fechamento falhou"""
+        if reason == TRAILING_STOP:
+            # Pico que coloca o trailing stop exatamente no preço que o acionou
+            price = price / (1 - self.settings.trailing_stop_percent / 100)
+        self._arm_triggers(trade_id, trade, price)
+
+    def update_trade_stops(self, trade_id: str, stop_loss: Optional[float] = None,
+                           take_profit: Optional[float] = None) -> bool:
+        """Altera stop-loss e/ou take-profit de um trade aberto"""
+        trade = self.active_trades.get(trade_id)
+        if trade is None or 'stop_loss' not in trade or trade_id in self._closing:
+            return False
+        
+        changes = {}
+        if stop_loss is not None:
+            changes['stop_loss'] = stop_loss
+        if take_profit is not None:
+            changes['take_profit'] = take_profit
+        if not changes:
+            return False
+        
+        trade.update(changes)
+        self._journal(EVENT_STOP_UPDATE, {'trade_id': trade_id, **changes})
+        
+        # Rearma preservando o pico do trailing stop
+        peak = self.trigger_index.trailing_peak(trade_id)
+        self._arm_triggers(trade_id, trade, peak or trade['entry_price'])
+        
+        logger.info(f"Trade stops updated: {trade_id}", **changes)
+        return True
+
+    async def _close_trade(self, trade_id: str, reason: str, trigger_price: Optional[float] = None):
+        """
+        Fecha um trade específico
+
+        Gatilhos e prazo são desarmados antes da venda, então um segundo
+        fechamento (gatilho, tempo limite ou shutdown) não vende a mesma
+        posição de novo enquanto o swap está em andamento. Se a venda falhar,
+        ambos são rearmados para nova tentativa.
+
+        Args:
+            trade_id: ID do trade
+            reason: Motivo do fechamento
+            trigger_price: Preço que acionou o gatilho (quando fechado pelo índice)
+        """
+        trade = self.active_trades.get(trade_id)
+        if trade is None or trade_id in self._closing:
+            return
+        
+        self._closing.add(trade_id)
+        peak = self.trigger_index.trailing_peak(trade_id)
+        armed = self.trigger_index.remove(trade_id)
+        deadline = self.time_limit_scheduler.deadline(trade_id)
+        self.time_limit_scheduler.cancel(trade_id)
+        closed = False
+        
+        try:
+            # Executa venda via 1inch (sem sobrepor uma compra do mesmo token)
+            async with self._symbol_lock(trade['symbol']):
+                close_result = await self.oneinch_client.execute_swap(
+                    from_token=trade['symbol'],
+                    to_token="USDT",
+                    amount=trade['amount'],
+                    slippage=1.0
+                )
             
             if close_result['success']:
+                closed = True
+                
                 # Calcula P&L
                 pnl = close_result['amount_out'] - (trade['amount'] * trade['entry_price'])
                 
@@ -259,6 +675,7 @@ class TradingEngine:
                     self.consecutive_losses += 1
                 else:
                     self.consecutive_losses = 0
+                self.risk_manager.update_trade_result(pnl, pnl >= 0)
                 
                 # Log do fechamento
                 trading_logger.trade_closed(
@@ -268,11 +685,14 @@ class TradingEngine:
                     reason=reason
                 )
                 
-                # Remove da lista de trades ativos
+                # Remove da lista de trades ativos e libera o capital alocado
                 del self.active_trades[trade_id]
+                self.allocated_capital -= trade.get('position_size', 0.0)
+                self.positions.remove(trade_id)
+                self._journal(EVENT_CLOSE, {'trade_id': trade_id, 'pnl': pnl, 'reason': reason})
                 
-                # Notifica backend
-                await self.backend_client.report_trade_close(trade_id, pnl, reason)
+                # Notifica backend (assíncrono, via outbox)
+                self.backend_outbox.enqueue(self.backend_client.close_report(trade_id, pnl, reason))
                 
                 logger.info(f"Trade closed: {trade_id}, P&L: ${pnl:.2f}, reason: {reason}")
                 
@@ -281,6 +701,17 @@ class TradingEngine:
                 
         except Exception as e:
             logger.error(f"Error closing trade {trade_id}: {e}")
+        
+        finally:
+            self._closing.discard(trade_id)
+            if not closed and trade_id in self.active_trades:
+                # Fechamento falhou: rearma gatilhos e prazo para nova tentativa
+                if trigger_price is not None:
+                    self._rearm_triggers(trade_id, trade, reason, trigger_price)
+                elif armed:
+                    self._arm_triggers(trade_id, trade, peak or trade['entry_price'])
+                if deadline is not None:
+                    self.time_limit_scheduler.schedule(trade_id, deadline)
 
     async def _close_all_positions(self, reason: str):
         """Fecha todas as posições ativas"""
@@ -289,17 +720,24 @@ class TradingEngine:
         
         logger.info(f"Closing all positions, reason: {reason}")
         
+        # Trades com venda já em andamento são fechados por quem a iniciou
         close_tasks = []
         for trade_id in list(self.active_trades.keys()):
-            close_tasks.append(self._close_trade(trade_id, reason))
+            if trade_id not in self._closing:
+                close_tasks.append(self._close_trade(trade_id, reason))
         
         await asyncio.gather(*close_tasks, return_exceptions=True)
 
-    def _should_close_by_time(self, trade: dict) -> bool:
-        """Verifica se deve fechar trade por limite de tempo"""
-        # Fecha trades após 4 horas (para evitar exposição prolongada)
-        time_limit = timedelta(hours=4)
-        return datetime.now() - trade['timestamp'] > time_limit
+    async def _close_expired_trade(self, trade_id: str):
+        """Fecha um trade que atingiu o tempo máximo de permanência"""
+        if trade_id not in self.active_trades or trade_id in self._closing:
+            return
+        
+        await self._close_trade(trade_id, "time_limit")
+        
+        # Fechamento falhou: agenda nova tentativa
+        if trade_id in self.active_trades and trade_id not in self.time_limit_scheduler:
+            self.time_limit_scheduler.schedule(trade_id, datetime.now() + TIME_LIMIT_RETRY_DELAY)
 
     async def _health_check_loop(self):
         """Loop de verificação de saúde do sistema"""
@@ -313,9 +751,16 @@ class TradingEngine:
                 # Verifica limites de risco
                 risk_status = self._check_risk_limits()
                 
-                # Para engine se necessário
-                if not api_health['all_healthy'] or not risk_status['safe']:
+                # Só violação de limite de risco liquida as posições. Circuito crítico aberto
+                # apenas pausa a admissão de sinais (_admit_queued_signals) até a sonda
+                # meio-aberta fechá-lo; os fechamentos por gatilho continuam tentando.
+                if not risk_status['safe']:
                     await self._handle_emergency_stop(api_health, risk_status)
+                elif api_health['open_breakers']:
+                    logger.warning("Critical integration unavailable, new entries paused",
+                                   open_breakers=api_health['open_breakers'])
+                elif not api_health['all_healthy']:
+                    logger.warning("API health degraded", api_health=api_health)
                 
             except Exception as e:
                 logger.error(f"Error in health check: {e}")
@@ -323,34 +768,18 @@ class TradingEngine:
             await asyncio.sleep(30)
 
     async def _check_apis_health(self) -> dict:
-        """Verifica saúde das APIs"""
-        health = {
-            'oneinch': False,
-            'price_data': False,
-            'backend': False,
-            'all_healthy': False
-        }
-        
+        """Verifica saúde das APIs (sondas em paralelo, atualiza os circuit breakers)"""
         try:
-            # Testa 1inch
-            health['oneinch'] = await self.oneinch_client.health_check()
-            
-            # Testa price data
-            health['price_data'] = await self.price_data_client.health_check()
-            
-            # Testa backend
-            health['backend'] = await self.backend_client.health_check()
-            
-            health['all_healthy'] = all([
-                health['oneinch'],
-                health['price_data'],
-                health['backend']
-            ])
-            
+            return await self.health_monitor.check(force=True)
         except Exception as e:
             logger.error(f"Error checking API health: {e}")
-        
-        return health
+            return {
+                'oneinch': False,
+                'price_data': False,
+                'backend': False,
+                'all_healthy': False,
+                'open_breakers': []
+            }
 
     def _check_risk_limits(self) -> dict:
         """Verifica limites de risco"""
@@ -466,6 +895,12 @@ class TradingEngine:
             'daily_pnl': self.daily_pnl,
             'consecutive_losses': self.consecutive_losses,
             'capital_usdt': self.settings.capital_usdt,
+            'allocated_capital': self.allocated_capital,
+            'pending_trades': len(self.pending_trades),
+            'queued_signals': len(self.signal_queue),
+            'latency': get_latency_summary(),
+            'health': self.health_monitor.get_status(),
+            'portfolio_risk': self.risk_manager.get_portfolio_risk(self.positions),
             'total_trades': getattr(self, 'total_trades', 0),
             'win_rate': getattr(self, 'win_rate', 0.0)
         }
@@ -487,30 +922,33 @@ class TradingEngine:
                 'slippage': slippage
             }
             
-            # Valida com risk manager
-            if not await self.risk_manager.validate_trade(signal, self.active_trades):
-                return {
-                    'success': False,
-                    'error': 'Trade rejected by risk manager',
-                    'trade_id': None
+            # Validação e registro sob os locks de admissão e do símbolo: lotes de
+            # sinais e fechamentos do mesmo par não intercalam com esta ordem
+            async with self.admission_lock, self._symbol_lock(pair):
+                if not await self.risk_manager.validate_trade(signal, self.active_trades, self.positions):
+                    return {
+                        'success': False,
+                        'error': 'Trade rejected by risk manager',
+                        'trade_id': None
+                    }
+                
+                # Gera ID único para o trade
+                trade_id = str(uuid.uuid4())
+                
+                # Simula execução do trade (em produção, usar 1inch real)
+                trade_result = {
+                    'trade_id': trade_id,
+                    'pair': pair,
+                    'side': side,
+                    'amount': amount,
+                    'price': price,
+                    'status': 'pending',
+                    'timestamp': datetime.now().isoformat()
                 }
-            
-            # Gera ID único para o trade
-            trade_id = str(uuid.uuid4())
-            
-            # Simula execução do trade (em produção, usar 1inch real)
-            trade_result = {
-                'trade_id': trade_id,
-                'pair': pair,
-                'side': side,
-                'amount': amount,
-                'price': price,
-                'status': 'pending',
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Adiciona aos trades ativos
-            self.active_trades[trade_id] = trade_result
+                
+                # Adiciona aos trades ativos
+                self.active_trades[trade_id] = trade_result
+                self.positions.add(trade_id, {**trade_result, 'chain_id': chain_id, 'strategy': 'api'})
             
             # Log do trade
             logger.info(f"Trade executed via API: {pair} {side} {amount}")
@@ -555,7 +993,7 @@ class TradingEngine:
             
             # Calcula posições baseado nos trades ativos
             for trade_id, trade in self.active_trades.items():
-                if trade['status'] == 'completed':
+                if trade.get('status') == 'completed':
                     positions.append({
                         'pair': trade['pair'],
                         'amount': trade.get('executed_amount', trade['amount']),
@@ -568,6 +1006,8 @@ class TradingEngine:
                 'total_value': total_value,
                 'positions': positions,
                 'pnl': self.daily_pnl,
+                'exposure': self.positions.summary(),
+                'risk': self.risk_manager.get_portfolio_risk(self.positions),
                 'active': self.active,
                 'last_updated': datetime.now().isoformat()
             }
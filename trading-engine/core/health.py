@@ -0,0 +1,195 @@
+"""
+Health Probes with Circuit Breakers
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker de uma integração
+
+    Abre após `failure_threshold` falhas consecutivas. Aberto, bloqueia novas
+    tentativas até passar `reset_timeout`; então fica meio-aberto e libera uma
+    única tentativa: sucesso fecha o circuito, falha o abre novamente.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Indica se uma chamada pode ser feita agora"""
+        if self.state == STATE_CLOSED:
+            return True
+
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = STATE_HALF_OPEN
+            logger.info(f"Circuit breaker half-open: {self.name}")
+
+        # Meio-aberto: apenas uma tentativa por vez
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.state != STATE_CLOSED:
+            logger.info(f"Circuit breaker closed: {self.name}")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning(f"Circuit breaker open: {self.name}", failures=self.failures)
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == STATE_OPEN
+
+    def get_status(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self.failures
+        }
+
+class HealthMonitor:
+    """
+    Executa os health checks das integrações em paralelo, com timeout
+
+    O resultado fica em cache por `ttl` segundos, então outros componentes
+    consultam a saúde (`is_available`, `get_status`) sem fazer I/O; checagens
+    simultâneas compartilham a mesma execução. Cada integração tem seu circuit
+    breaker: uma falha isolada não abre o circuito, e com o circuito aberto a
+    sonda não é chamada até o próximo teste meio-aberto.
+    """
+
+    def __init__(self, timeout: float = 5.0, ttl: float = 10.0,
+                 failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.probes: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.critical: Dict[str, bool] = {}
+
+        self._results: Dict[str, bool] = {}
+        self._checked_at: Optional[float] = None
+        self._last_check: Optional[datetime] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Callable[[], Awaitable[bool]], critical: bool = True):
+        """
+        Registra a sonda de uma integração
+
+        Args:
+            critical: Se o circuito aberto desta integração pausa a abertura de novos trades
+        """
+        self.probes[name] = probe
+        self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+        self.critical[name] = critical
+
+    async def check(self, force: bool = False) -> Dict:
+        """
+        Retorna a saúde das integrações, do cache se ainda válido
+
+        Returns:
+            Dict com o resultado de cada integração, `all_healthy` e
+            `open_breakers` (integrações críticas com circuito aberto)
+        """
+        if not force and self._is_fresh():
+            return self._snapshot()
+
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._run_probes())
+        await asyncio.shield(self._inflight)
+        return self._snapshot()
+
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+
+    async def _run_probes(self):
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._probe(name) for name in names))
+        self._results = dict(zip(names, results))
+        self._checked_at = time.monotonic()
+        self._last_check = datetime.now()
+
+    async def _probe(self, name: str) -> bool:
+        breaker = self.breakers[name]
+        if not breaker.allow_request():
+            return False
+
+        try:
+            healthy = bool(await asyncio.wait_for(self.probes[name](), timeout=self.timeout))
+        except asyncio.TimeoutError:
+            logger.warning(f"Health check timed out: {name}", timeout=self.timeout)
+            healthy = False
+        except Exception as e:
+            logger.error(f"Health check failed for {name}: {e}")
+            healthy = False
+
+        if healthy:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        return healthy
+
+    def _snapshot(self) -> Dict:
+        health = {name: self._results.get(name, False) for name in self.probes}
+        health["all_healthy"] = bool(self._results) and all(self._results.values())
+        health["open_breakers"] = self.open_breakers()
+        return health
+
+    def open_breakers(self, critical_only: bool = True) -> List[str]:
+        """Integrações com circuito aberto"""
+        return [
+            name for name, breaker in self.breakers.items()
+            if breaker.is_open and (self.critical[name] or not critical_only)
+        ]
+
+    def is_available(self, name: str) -> bool:
+        """Consulta sem I/O: False apenas com o circuito da integração aberto"""
+        breaker = self.breakers.get(name)
+        return breaker is None or not breaker.is_open
+
+    def get_status(self) -> Dict:
+        return {
+            "integrations": {
+                name: {
+                    "healthy": self._results.get(name),
+                    "critical": self.critical[name],
+                    **self.breakers[name].get_status()
+                }
+                for name in self.probes
+            },
+            "last_check": self._last_check.isoformat() if self._last_check else None
+        }
@@ -0,0 +1,255 @@
+"""
+Portfolio VaR / CVaR with EWMA Covariance
+"""
+
+import math
+import time
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Retornos mantidos para a simulação histórica
+RETURN_HISTORY_SIZE = 250
+
+# Amostras mínimas de um token antes de o modelo avaliar seu risco
+MIN_SAMPLES = 30
+
+class PortfolioRiskModel:
+    """
+    Modelo de risco de portfólio (estilo RiskMetrics)
+
+    A matriz de covariância dos log-retornos dos tokens é exponencialmente
+    ponderada e atualizada de forma incremental a cada amostra do feed de
+    preços (Σ = λΣ + (1 - λ)rrᵀ, média zero), com tokens novos entrando como
+    novas linhas/colunas. Os retornos também ficam em um buffer circular para
+    a simulação histórica.
+
+    O livro é o vetor de exposição em USDT por token. Σw e wᵀΣw ficam em cache
+    até a covariância ou o livro mudarem, então a checagem de VaR marginal de um
+    sinal candidato é O(1):
+        σ²(w + Δeᵢ) = wᵀΣw + 2Δ(Σw)ᵢ + Δ²Σᵢᵢ
+    Um lote de aprovações (`batch`) parte do livro em cache e soma cada
+    aprovação com a mesma fórmula, atualizando Σw com a coluna Σeᵢ em O(n).
+    """
+
+    def __init__(self, decay: float = 0.94, confidence: float = 0.95,
+                 horizon_minutes: float = 60, sample_seconds: float = 60,
+                 history_size: int = RETURN_HISTORY_SIZE):
+        self.decay = decay
+        self.confidence = confidence
+        self.sample_seconds = sample_seconds
+        self.history_size = history_size
+
+        # Retornos por amostra escalados para o horizonte pela raiz do tempo
+        self.horizon_scale = math.sqrt(max(horizon_minutes * 60 / sample_seconds, 1.0))
+        normal = NormalDist()
+        self.z = normal.inv_cdf(confidence)
+        self.cvar_factor = normal.pdf(self.z) / (1 - confidence)
+
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._last_prices = np.empty(0)
+        self._cov = np.zeros((0, 0))
+        self._samples = np.zeros(0, dtype=np.int64)
+        self._returns = np.zeros((history_size, 0))
+        self._returns_count = 0
+        self._returns_pos = 0
+        self._last_sample_at: Optional[float] = None
+
+        self.version = 0
+        self._book_cache: Optional[Tuple] = None
+
+    # Feed de preços
+
+    def update_prices(self, prices: Dict[str, float], now: Optional[float] = None) -> bool:
+        """
+        Incorpora um snapshot de preços (no máximo uma amostra por `sample_seconds`)
+
+        Tokens ausentes no snapshot entram com retorno zero nesta amostra.
+
+        Returns:
+            True se a amostra foi incorporada
+        """
+        now = time.monotonic() if now is None else now
+        if self._last_sample_at is not None and now - self._last_sample_at < self.sample_seconds:
+            return False
+
+        valid = {symbol: price for symbol, price in prices.items() if price and price > 0}
+        if not valid:
+            return False
+
+        self._ensure_symbols(valid)
+        price_vector = np.full(len(self._symbols), np.nan)
+        price_vector[[self._index[symbol] for symbol in valid]] = list(valid.values())
+
+        has_return = ~np.isnan(price_vector) & ~np.isnan(self._last_prices)
+        returns = np.zeros(len(self._symbols))
+        returns[has_return] = np.log(price_vector[has_return] / self._last_prices[has_return])
+
+        if has_return.any():
+            self._cov *= self.decay
+            self._cov += (1 - self.decay) * np.outer(returns, returns)
+            self._samples[has_return] += 1
+
+            self._returns[self._returns_pos] = returns
+            self._returns_pos = (self._returns_pos + 1) % self.history_size
+            self._returns_count = min(self._returns_count + 1, self.history_size)
+            self.version += 1
+
+        has_price = ~np.isnan(price_vector)
+        self._last_prices[has_price] = price_vector[has_price]
+        self._last_sample_at = now
+        return True
+
+    def _ensure_symbols(self, symbols):
+        new_symbols = [symbol for symbol in symbols if symbol not in self._index]
+        if not new_symbols:
+            return
+
+        for symbol in new_symbols:
+            self._index[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+
+        added = len(new_symbols)
+        self._cov = np.pad(self._cov, ((0, added), (0, added)))
+        self._returns = np.pad(self._returns, ((0, 0), (0, added)))
+        self._last_prices = np.concatenate([self._last_prices, np.full(added, np.nan)])
+        self._samples = np.concatenate([self._samples, np.zeros(added, dtype=np.int64)])
+        self.version += 1
+
+    def is_ready(self, symbol: str) -> bool:
+        """True quando o token já tem amostras suficientes"""
+        index = self._index.get(symbol)
+        return index is not None and self._samples[index] >= MIN_SAMPLES
+
+    # Livro e medidas de risco
+
+    def _book(self, exposures: Dict[str, float], book_version: Optional[int] = None):
+        """Vetor de exposição, Σw e variância do livro (em cache por versão)"""
+        key = (self.version, book_version)
+        if book_version is not None and self._book_cache and self._book_cache[0] == key:
+            return self._book_cache[1:]
+
+        weights = np.zeros(len(self._symbols))
+        for symbol, exposure in exposures.items():
+            index = self._index.get(symbol)
+            if index is not None:
+                weights[index] += exposure
+
+        cov_weights = self._cov @ weights
+        variance = float(weights @ cov_weights)
+        self._book_cache = (key, weights, cov_weights, variance)
+        return weights, cov_weights, variance
+
+    def parametric_var(self, exposures: Dict[str, float],
+                       book_version: Optional[int] = None) -> Dict[str, float]:
+        """VaR e CVaR paramétricos (normal) do livro no horizonte, em USDT"""
+        _, _, variance = self._book(exposures, book_version)
+        sigma = math.sqrt(max(variance, 0.0)) * self.horizon_scale
+        return {
+            'volatility': sigma,
+            'var': self.z * sigma,
+            'cvar': self.cvar_factor * sigma
+        }
+
+    def historical_var(self, exposures: Dict[str, float],
+                       book_version: Optional[int] = None) -> Dict[str, float]:
+        """VaR e CVaR por simulação histórica do livro atual, em USDT"""
+        if not self._returns_count:
+            return {'var': 0.0, 'cvar': 0.0, 'scenarios': 0}
+
+        weights, _, _ = self._book(exposures, book_version)
+        pnl = (self._returns[:self._returns_count] @ weights) * self.horizon_scale
+
+        var = max(-float(np.quantile(pnl, 1 - self.confidence)), 0.0)
+        tail = pnl[pnl <= -var]
+        cvar = max(-float(tail.mean()), 0.0) if tail.size else var
+        return {'var': var, 'cvar': cvar, 'scenarios': self._returns_count}
+
+    def check_candidate(self, exposures: Dict[str, float], symbol: str, amount: float,
+                        limit: float, book_version: Optional[int] = None) -> Dict:
+        """
+        VaR paramétrico do livro com uma nova posição de `amount` USDT em `symbol`
+
+        O(1) com o livro em cache. Tokens sem histórico suficiente não são
+        avaliados (passam).
+        """
+        _, cov_weights, variance = self._book(exposures, book_version)
+        return self._check_marginal(cov_weights, variance, symbol, amount, limit)
+
+    def batch(self, exposures: Dict[str, float],
+              book_version: Optional[int] = None) -> "PortfolioBatch":
+        """Livro em cache acrescido das posições aprovadas em um lote de sinais"""
+        _, cov_weights, variance = self._book(exposures, book_version)
+        return PortfolioBatch(self, cov_weights, variance)
+
+    def _check_marginal(self, cov_weights: np.ndarray, variance: float,
+                        symbol: str, amount: float, limit: float) -> Dict:
+        var_before = self.z * math.sqrt(max(variance, 0.0)) * self.horizon_scale
+
+        if not self.is_ready(symbol):
+            return {
+                'passed': True,
+                'reason': 'insufficient_history',
+                'var_before': var_before,
+                'var_after': None,
+                'limit': limit
+            }
+
+        new_variance = self._marginal_variance(cov_weights, variance, self._index[symbol], amount)
+        var_after = self.z * math.sqrt(max(new_variance, 0.0)) * self.horizon_scale
+
+        return {
+            'passed': var_after <= limit,
+            'var_before': var_before,
+            'var_after': var_after,
+            'incremental_var': var_after - var_before,
+            'limit': limit
+        }
+
+    def _marginal_variance(self, cov_weights: np.ndarray, variance: float,
+                           index: int, amount: float) -> float:
+        return variance + 2 * amount * cov_weights[index] + amount * amount * self._cov[index, index]
+
+    def get_stats(self) -> Dict:
+        return {
+            'symbols': len(self._symbols),
+            'ready_symbols': int((self._samples >= MIN_SAMPLES).sum()),
+            'return_samples': self._returns_count,
+            'confidence': self.confidence
+        }
+
+class PortfolioBatch:
+    """
+    Livro de um lote de validação: o livro em cache mais as posições aprovadas
+
+    `check` é O(1) como `check_candidate`; `add` soma uma aprovação à variância
+    e atualiza Σw em O(n), sem recalcular o livro inteiro. Σw só é copiado na
+    primeira aprovação, então o cache do modelo não é alterado.
+    """
+
+    def __init__(self, model: PortfolioRiskModel, cov_weights: np.ndarray, variance: float):
+        self.model = model
+        self.cov_weights = cov_weights
+        self.variance = variance
+        self._owned = False
+
+    def check(self, symbol: str, amount: float, limit: float) -> Dict:
+        return self.model._check_marginal(self.cov_weights, self.variance, symbol, amount, limit)
+
+    def add(self, symbol: str, amount: float):
+        """Inclui no livro uma posição aprovada de `amount` USDT em `symbol`"""
+        index = self.model._index.get(symbol)
+        if index is None:
+            return
+
+        self.variance = self.model._marginal_variance(self.cov_weights, self.variance, index, amount)
+        if not self._owned:
+            self.cov_weights = self.cov_weights.copy()
+            self._owned = True
+        self.cov_weights += amount * self.model._cov[:, index]
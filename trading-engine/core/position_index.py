@@ -0,0 +1,152 @@
+"""
+Position Index by Symbol, Chain and Strategy
+"""
+
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+class PositionIndex:
+    """
+    Índices das posições abertas (e reservas pendentes) por símbolo, chain e estratégia
+
+    Mantido junto com `active_trades`: cada abertura/fechamento atualiza os
+    conjuntos de ids e a exposição (capital alocado) de cada chave, então
+    contagens e exposições por token, chain ou estratégia são consultas O(1).
+    """
+
+    def __init__(self, default_chain_id: int = 1, default_strategy: str = "unknown"):
+        self.default_chain_id = default_chain_id
+        self.default_strategy = default_strategy
+
+        # trade_id -> (símbolo, chain, estratégia, exposição)
+        self._positions: Dict[str, Tuple[str, int, str, float]] = {}
+        self._by_symbol: Dict[str, Set[str]] = defaultdict(set)
+        self._by_chain: Dict[int, Set[str]] = defaultdict(set)
+        self._by_strategy: Dict[str, Set[str]] = defaultdict(set)
+        self._symbol_exposure: Dict[str, float] = defaultdict(float)
+        self._chain_exposure: Dict[int, float] = defaultdict(float)
+        self._strategy_exposure: Dict[str, float] = defaultdict(float)
+        self.total_exposure = 0.0
+        # Incrementado a cada mudança (chave de cache para cálculos sobre o livro)
+        self.version = 0
+
+    def add(self, trade_id: str, trade: Dict):
+        """Indexa (ou reindexa) uma posição"""
+        if trade_id in self._positions:
+            self.remove(trade_id)
+
+        symbol = trade.get('symbol') or trade.get('pair')
+        chain_id = trade.get('chain_id', self.default_chain_id)
+        strategy = trade.get('strategy', self.default_strategy)
+        exposure = trade.get('position_size', 0.0) or 0.0
+
+        self._positions[trade_id] = (symbol, chain_id, strategy, exposure)
+        self._by_symbol[symbol].add(trade_id)
+        self._by_chain[chain_id].add(trade_id)
+        self._by_strategy[strategy].add(trade_id)
+        self._symbol_exposure[symbol] += exposure
+        self._chain_exposure[chain_id] += exposure
+        self._strategy_exposure[strategy] += exposure
+        self.total_exposure += exposure
+        self.version += 1
+
+    def remove(self, trade_id: str) -> bool:
+        """Remove uma posição dos índices"""
+        entry = self._positions.pop(trade_id, None)
+        if entry is None:
+            return False
+
+        symbol, chain_id, strategy, exposure = entry
+        self._discard(self._by_symbol, self._symbol_exposure, symbol, trade_id, exposure)
+        self._discard(self._by_chain, self._chain_exposure, chain_id, trade_id, exposure)
+        self._discard(self._by_strategy, self._strategy_exposure, strategy, trade_id, exposure)
+        self.total_exposure -= exposure
+        if not self._positions:
+            self.total_exposure = 0.0
+        self.version += 1
+        return True
+
+    @staticmethod
+    def _discard(index: Dict, exposures: Dict, key, trade_id: str, exposure: float):
+        ids = index[key]
+        ids.discard(trade_id)
+        if ids:
+            exposures[key] -= exposure
+        else:
+            # Remove a chave para não acumular resíduo de ponto flutuante
+            del index[key]
+            exposures.pop(key, None)
+
+    def count_by_symbol(self, symbol: str) -> int:
+        ids = self._by_symbol.get(symbol)
+        return len(ids) if ids else 0
+
+    def count_by_chain(self, chain_id: int) -> int:
+        ids = self._by_chain.get(chain_id)
+        return len(ids) if ids else 0
+
+    def count_by_strategy(self, strategy: str) -> int:
+        ids = self._by_strategy.get(strategy)
+        return len(ids) if ids else 0
+
+    def symbol_exposure(self, symbol: str) -> float:
+        return self._symbol_exposure.get(symbol, 0.0)
+
+    def chain_exposure(self, chain_id: int) -> float:
+        return self._chain_exposure.get(chain_id, 0.0)
+
+    def strategy_exposure(self, strategy: str) -> float:
+        return self._strategy_exposure.get(strategy, 0.0)
+
+    def symbol_exposures(self) -> Dict[str, float]:
+        """Exposição por símbolo (visão interna, não modificar)"""
+        return self._symbol_exposure
+
+    def trades_for_symbol(self, symbol: str) -> Set[str]:
+        return set(self._by_symbol.get(symbol, ()))
+
+    def largest_symbol_exposure(self) -> Optional[Tuple[str, float]]:
+        """Símbolo com maior exposição (O(símbolos), para relatórios)"""
+        if not self._symbol_exposure:
+            return None
+        return max(self._symbol_exposure.items(), key=lambda item: item[1])
+
+    def summary(self) -> Dict:
+        """Exposição agregada por símbolo, chain e estratégia"""
+        largest = self.largest_symbol_exposure()
+        return {
+            'positions': len(self._positions),
+            'total_exposure': self.total_exposure,
+            'by_symbol': {
+                symbol: {'positions': len(ids), 'exposure': self._symbol_exposure[symbol]}
+                for symbol, ids in self._by_symbol.items()
+            },
+            'by_chain': {
+                chain_id: {'positions': len(ids), 'exposure': self._chain_exposure[chain_id]}
+                for chain_id, ids in self._by_chain.items()
+            },
+            'by_strategy': {
+                strategy: {'positions': len(ids), 'exposure': self._strategy_exposure[strategy]}
+                for strategy, ids in self._by_strategy.items()
+            },
+            'max_concentration': (
+                largest[1] / self.total_exposure if largest and self.total_exposure > 0 else 0.0
+            )
+        }
+
+    def clear(self):
+        self._positions.clear()
+        self._by_symbol.clear()
+        self._by_chain.clear()
+        self._by_strategy.clear()
+        self._symbol_exposure.clear()
+        self._chain_exposure.clear()
+        self._strategy_exposure.clear()
+        self.total_exposure = 0.0
+        self.version += 1
+
+    def __contains__(self, trade_id: str) -> bool:
+        return trade_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
@@ -7,6 +7,10 @@ from datetime import datetime, timedelta
 import math
 
 from config.settings import TradingSettings
+from core.portfolio_risk import PortfolioRiskModel
+from core.position_index import PositionIndex
+from core.volatility_service import VolatilityService
+from core.risk_state import RiskLimits, RiskState, RISK_HIGH, RISK_MEDIUM
 from utils.logger import setup_logger, TradingLogger
 
 logger = setup_logger(__name__)
@@ -19,19 +23,46 @@ class RiskManager:
     
     def __init__(self, settings: TradingSettings):
         self.settings = settings
-        self.daily_trades = []
-        self.daily_pnl = 0.0
-        self.consecutive_losses = 0
-        self.last_reset_date = datetime.now().date()
+        
+        # Limites pré-calculados e agregados mantidos a cada trade fechado
+        self.limits = RiskLimits.from_settings(settings)
+        self.state = RiskState(self.limits)
+        
+        # Volatilidade por token para o sizing, alimentada pelo feed de preços
+        self.volatility_service = VolatilityService(
+            window=settings.volatility_window,
+            target_volatility=settings.volatility_target_percent,
+            min_adjustment=settings.volatility_min_adjustment
+        )
+        
+        # Covariância EWMA dos retornos dos tokens, alimentada pelo feed de preços
+        self.portfolio_risk = PortfolioRiskModel(
+            decay=settings.portfolio_risk_decay,
+            confidence=settings.portfolio_var_confidence,
+            horizon_minutes=settings.portfolio_var_horizon_minutes,
+            sample_seconds=settings.portfolio_risk_sample_seconds
+        )
         
         logger.info("Risk Manager initialized",
                    max_position_size=settings.max_position_size_percent,
                    stop_loss=settings.stop_loss_percent,
                    max_trades=settings.max_simultaneous_trades)
 
-    async def validate_trade(self, signal: dict, active_trades: Dict[str, dict]) -> bool:
+    @property
+    def daily_pnl(self) -> float:
+        return self.state.daily_pnl
+
+    @property
+    def consecutive_losses(self) -> int:
+        return self.state.consecutive_losses
+
+    async def validate_trade(self, signal: dict, active_trades: Dict[str, dict],
+                             positions: Optional[PositionIndex] = None) -> bool:
         """
         Valida se um trade pode ser executado baseado nas regras de risco
+        
+        Com `positions` (índice mantido pelo engine, incluindo reservas
+        pendentes), contagem e exposição por símbolo são consultas O(1).
         """
         try:
             # Reset diário se necessário
@@ -39,11 +70,12 @@ class RiskManager:
             
             # Verificações de risco
             checks = [
-                self._check_max_simultaneous_trades(active_trades),
+                self._check_max_simultaneous_trades(active_trades, positions),
                 self._check_daily_loss_limit(),
                 self._check_consecutive_losses(),
                 self._check_position_size_limit(signal),
-                self._check_symbol_exposure(signal, active_trades),
+                self._check_symbol_exposure(signal, active_trades, positions),
+                self._check_portfolio_var(signal, positions),
                 self._check_market_conditions(signal),
                 self._check_time_restrictions()
             ]
@@ -67,10 +99,115 @@ class RiskManager:
             logger.error(f"Error in trade validation: {e}")
             return False
 
-    def _check_max_simultaneous_trades(self, active_trades: Dict[str, dict]) -> dict:
+    async def validate_trades(self, signals: List[dict], active_trades: Dict[str, dict],
+                              positions: Optional[PositionIndex] = None,
+                              available_capital: Optional[float] = None) -> List[dict]:
+        """
+        Valida um lote de sinais (os de um tick) em uma única passada
+        
+        Checagens que não dependem do sinal (perda diária, perdas consecutivas,
+        horário) rodam uma vez. Os sinais são então alocados de forma gulosa, na
+        ordem recebida (a fila de sinais já entrega por score): cada aprovado
+        consome um slot, capital e exposição do símbolo/portfólio, que valem
+        para os sinais seguintes do mesmo lote.
+        
+        Returns:
+            Uma decisão por sinal, na mesma ordem:
+            {'signal', 'approved', 'position_size', 'reasons'}
+        """
+        decisions = [
+            {'signal': signal, 'approved': False, 'position_size': 0.0, 'reasons': []}
+            for signal in signals
+        ]
+        if not signals:
+            return decisions
+        
+        try:
+            self._check_daily_reset()
+            
+            shared_checks = [
+                self._check_daily_loss_limit(),
+                self._check_consecutive_losses(),
+                self._check_time_restrictions()
+            ]
+            shared_failed = [check['name'] for check in shared_checks if not check['passed']]
+            
+            if positions is not None:
+                open_count = len(positions)
+                symbol_count = positions.count_by_symbol
+            else:
+                open_count = len(active_trades)
+                counts: Dict[str, int] = {}
+                for trade in active_trades.values():
+                    symbol = trade.get('symbol', trade.get('pair'))
+                    counts[symbol] = counts.get(symbol, 0) + 1
+                symbol_count = lambda symbol: counts.get(symbol, 0)
+            
+            slots = self.limits.max_simultaneous_trades - open_count
+            remaining_capital = available_capital if available_capital is not None else float('inf')
+            batch_counts: Dict[str, int] = {}
+            # Livro de VaR do lote: parte do livro em cache e soma as aprovações
+            var_batch = None
+            if positions is not None and self.limits.portfolio_var_limit:
+                var_batch = self.portfolio_risk.batch(positions.symbol_exposures(), positions.version)
+            
+            for decision in decisions:
+                if shared_failed:
+                    decision['reasons'] = list(shared_failed)
+                    continue
+                
+                signal = decision['signal']
+                symbol = signal['symbol']
+                position_size = self.calculate_position_size(signal['price'], self.settings.capital_usdt, symbol)
+                decision['position_size'] = position_size
+                
+                reasons = decision['reasons']
+                if slots <= 0:
+                    reasons.append('max_simultaneous_trades')
+                if position_size > self.limits.max_position_value:
+                    reasons.append('position_size_limit')
+                if symbol_count(symbol) + batch_counts.get(symbol, 0) >= self.limits.max_positions_per_symbol:
+                    reasons.append('symbol_exposure')
+                if not self._check_market_conditions(signal)['passed']:
+                    reasons.append('market_conditions')
+                if position_size > remaining_capital:
+                    reasons.append('insufficient_capital')
+                if not reasons and var_batch is not None and not var_batch.check(
+                        symbol, position_size, self.limits.portfolio_var_limit)['passed']:
+                    reasons.append('portfolio_var')
+                
+                if reasons:
+                    continue
+                
+                decision['approved'] = True
+                slots -= 1
+                remaining_capital -= position_size
+                batch_counts[symbol] = batch_counts.get(symbol, 0) + 1
+                if var_batch is not None:
+                    var_batch.add(symbol, position_size)
+            
+        except Exception as e:
+            logger.error(f"Error in batch trade validation: {e}")
+            for decision in decisions:
+                decision['approved'] = False
+                decision['reasons'] = ['validation_error']
+        
+        rejected = {
+            decision['signal']['symbol']: decision['reasons']
+            for decision in decisions if not decision['approved']
+        }
+        if rejected:
+            trading_logger.risk_event("trades_rejected", {'rejected': rejected})
+        logger.info("Batch trade validation",
+                    approved=len(decisions) - len(rejected),
+                    rejected=len(rejected))
+        return decisions
+
+    def _check_max_simultaneous_trades(self, active_trades: Dict[str, dict],
+                                       positions: Optional[PositionIndex] = None) -> dict:
         """Verifica limite de trades simultâneos"""
-        current_count = len(active_trades)
-        max_allowed = self.settings.max_simultaneous_trades
+        current_count = len(positions) if positions is not None else len(active_trades)
+        max_allowed = self.limits.max_simultaneous_trades
         
         return {
             'name': 'max_simultaneous_trades',
@@ -81,49 +218,65 @@ class RiskManager:
 
     def _check_daily_loss_limit(self) -> dict:
         """Verifica limite de perda diária"""
-        daily_loss_limit = self.settings.capital_usdt * (self.settings.max_daily_loss_percent / 100)
-        current_loss = abs(min(0, self.daily_pnl))
-        
         return {
             'name': 'daily_loss_limit',
-            'passed': current_loss < daily_loss_limit,
-            'current_loss': current_loss,
-            'limit': daily_loss_limit
+            'passed': not self.state.daily_loss_limit_hit,
+            'current_loss': self.state.daily_loss,
+            'limit': self.limits.daily_loss_limit
         }
 
     def _check_consecutive_losses(self) -> dict:
         """Verifica limite de perdas consecutivas"""
         return {
             'name': 'consecutive_losses',
-            'passed': self.consecutive_losses < self.settings.consecutive_loss_limit,
-            'current': self.consecutive_losses,
-            'limit': self.settings.consecutive_loss_limit
+            'passed': not self.state.consecutive_loss_limit_hit,
+            'current': self.state.consecutive_losses,
+            'limit': self.limits.consecutive_loss_limit
         }
 
     def _check_position_size_limit(self, signal: dict) -> dict:
         """Verifica se o tamanho da posição está dentro do limite"""
-        position_size = self.calculate_position_size(signal['price'], self.settings.capital_usdt)
-        max_position = self.settings.capital_usdt * (self.settings.max_position_size_percent / 100)
+        position_size = self.calculate_position_size(signal['price'], self.settings.capital_usdt, signal['symbol'])
         
         return {
             'name': 'position_size_limit',
-            'passed': position_size <= max_position,
+            'passed': position_size <= self.limits.max_position_value,
             'position_size': position_size,
-            'limit': max_position
+            'limit': self.limits.max_position_value
         }
 
-    def _check_symbol_exposure(self, signal: dict, active_trades: Dict[str, dict]) -> dict:
-        """Verifica exposição por símbolo (máximo 1 trade por token)"""
-        symbol_trades = [trade for trade in active_trades.values() 
-                        if trade['symbol'] == signal['symbol']]
+    def _check_symbol_exposure(self, signal: dict, active_trades: Dict[str, dict],
+                               positions: Optional[PositionIndex] = None) -> dict:
+        """Verifica exposição por símbolo (máximo de trades por token)"""
+        if positions is not None:
+            symbol_trades = positions.count_by_symbol(signal['symbol'])
+        else:
+            symbol_trades = sum(1 for trade in active_trades.values()
+                                if trade.get('symbol', trade.get('pair')) == signal['symbol'])
         
         return {
             'name': 'symbol_exposure',
-            'passed': len(symbol_trades) == 0,
-            'current_trades': len(symbol_trades),
+            'passed': symbol_trades < self.limits.max_positions_per_symbol,
+            'current_trades': symbol_trades,
+            'limit': self.limits.max_positions_per_symbol,
             'symbol': signal['symbol']
         }
 
+    def _check_portfolio_var(self, signal: dict, positions: Optional[PositionIndex] = None) -> dict:
+        """Verifica se a nova posição mantém o VaR do portfólio dentro do limite"""
+        if positions is None or not self.limits.portfolio_var_limit:
+            return {'name': 'portfolio_var', 'passed': True}
+        
+        position_size = self.calculate_position_size(signal['price'], self.settings.capital_usdt, signal['symbol'])
+        result = self.portfolio_risk.check_candidate(
+            positions.symbol_exposures(),
+            signal['symbol'],
+            position_size,
+            self.limits.portfolio_var_limit,
+            book_version=positions.version
+        )
+        return {'name': 'portfolio_var', **result}
+
     def _check_market_conditions(self, signal: dict) -> dict:
         """Verifica condições de mercado"""
         # Verifica se a confiança do sinal é suficiente
@@ -151,23 +304,28 @@ class RiskManager:
             'restricted_hours': restricted_hours
         }
 
-    def calculate_position_size(self, price: float, available_capital: float) -> float:
+    def calculate_position_size(self, price: float, available_capital: float,
+                                symbol: Optional[str] = None) -> float:
         """
         Calcula o tamanho da posição baseado no capital disponível e regras de risco
+        
+        Chamado várias vezes por sinal (fila, checagens e execução), então é
+        apenas aritmética e uma consulta O(1) ao serviço de volatilidade.
         """
         try:
             # Tamanho base baseado na porcentagem configurada
             base_size = available_capital * (self.settings.max_position_size_percent / 100)
             
-            # Ajusta baseado na volatilidade (implementação simplificada)
-            volatility_adjustment = self._calculate_volatility_adjustment()
+            # Reduz a posição de tokens mais voláteis que o alvo
+            volatility_adjustment = self._calculate_volatility_adjustment(symbol)
             adjusted_size = base_size * volatility_adjustment
             
             # Garante que não excede limites
             max_size = available_capital * 0.1  # Máximo 10% do capital por trade
             final_size = min(adjusted_size, max_size)
             
-            logger.info(f"Position size calculated: ${final_size:.2f}")
+            logger.debug("Position size calculated", symbol=symbol, size=final_size,
+                         volatility_adjustment=volatility_adjustment)
             return final_size
             
         except Exception as e:
@@ -175,13 +333,11 @@ class RiskManager:
             # Retorna tamanho conservador em caso de erro
             return available_capital * 0.02  # 2% do capital
 
-    def _calculate_volatility_adjustment(self) -> float:
+    def _calculate_volatility_adjustment(self, symbol: Optional[str] = None) -> float:
         """
-        Calcula ajuste baseado na volatilidade do mercado
+        Calcula ajuste baseado na volatilidade do token (1.0 sem histórico suficiente)
         """
-        # Implementação simplificada - em produção usaria dados históricos
-        # Por enquanto retorna 1.0 (sem ajuste)
-        return 1.0
+        return self.volatility_service.adjustment(symbol)
 
     def calculate_stop_loss(self, entry_price: float, side: str = "buy") -> float:
         """
@@ -210,23 +366,8 @@ class RiskManager:
         Atualiza estatísticas após fechamento de trade
         """
         try:
-            self._check_daily_reset()
-            
-            # Atualiza P&L diário
-            self.daily_pnl += pnl
-            
-            # Atualiza contador de perdas consecutivas
-            if was_profitable:
-                self.consecutive_losses = 0
-            else:
-                self.consecutive_losses += 1
-            
-            # Registra trade do dia
-            self.daily_trades.append({
-                'timestamp': datetime.now(),
-                'pnl': pnl,
-                'profitable': was_profitable
-            })
+            # Atualiza contadores, P&L, drawdown e perda da janela móvel em O(1)
+            self.state.record(pnl, was_profitable)
             
             # Log de métricas de risco
             trading_logger.performance_metric("daily_pnl", self.daily_pnl, "daily")
@@ -241,62 +382,55 @@ class RiskManager:
         """
         Verifica se precisa resetar estatísticas diárias
         """
-        current_date = datetime.now().date()
-        
-        if current_date > self.last_reset_date:
+        if self.state.roll_day(datetime.now().date()):
             logger.info("Resetting daily statistics")
-            self.daily_trades = []
-            self.daily_pnl = 0.0
-            self.last_reset_date = current_date
+
+    def restore_state(self, daily_pnl: float, consecutive_losses: int):
+        """Restaura P&L do dia e perdas consecutivas (recuperados do journal)"""
+        self.state.restore(daily_pnl, consecutive_losses)
 
     def get_risk_metrics(self) -> dict:
         """
         Retorna métricas atuais de risco
         """
         self._check_daily_reset()
-        
-        # Calcula win rate diário
-        profitable_trades = sum(1 for trade in self.daily_trades if trade['profitable'])
-        total_trades = len(self.daily_trades)
-        win_rate = (profitable_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # Calcula drawdown atual
-        daily_loss_limit = self.settings.capital_usdt * (self.settings.max_daily_loss_percent / 100)
-        current_drawdown = abs(min(0, self.daily_pnl)) / daily_loss_limit * 100
+        state = self.state
         
         return {
-            'daily_pnl': self.daily_pnl,
-            'daily_trades_count': total_trades,
-            'daily_win_rate': win_rate,
-            'consecutive_losses': self.consecutive_losses,
-            'current_drawdown_percent': current_drawdown,
-            'risk_level': self._assess_risk_level()
+            'daily_pnl': state.daily_pnl,
+            'daily_trades_count': state.daily_trades,
+            'daily_win_rate': state.daily_win_rate,
+            'consecutive_losses': state.consecutive_losses,
+            'current_drawdown_percent': state.daily_loss / self.limits.daily_loss_limit * 100,
+            'risk_level': state.risk_level,
+            'total_trades': state.total_trades,
+            'win_rate': state.win_rate,
+            'realized_pnl': state.realized_pnl,
+            'peak_equity': state.peak_equity,
+            'max_drawdown': state.max_drawdown,
+            'rolling_window_loss': state.rolling_window_loss()
         }
 
+    def get_portfolio_risk(self, positions: PositionIndex) -> dict:
+        """VaR/CVaR paramétrico e histórico das posições abertas"""
+        try:
+            exposures = positions.symbol_exposures()
+            return {
+                'parametric': self.portfolio_risk.parametric_var(exposures, positions.version),
+                'historical': self.portfolio_risk.historical_var(exposures, positions.version),
+                'limit': self.limits.portfolio_var_limit,
+                **self.portfolio_risk.get_stats()
+            }
+        except Exception as e:
+            logger.error(f"Error calculating portfolio risk: {e}")
+            return {}
+
     def _assess_risk_level(self) -> str:
         """
-        Avalia o nível de risco atual
+        Avalia o nível de risco atual (mantido pelo RiskState a cada atualização)
         """
-        risk_factors = 0
-        
-        # Fatores de risco
-        if self.consecutive_losses >= self.settings.consecutive_loss_limit * 0.7:
-            risk_factors += 1
-        
-        daily_loss_limit = self.settings.capital_usdt * (self.settings.max_daily_loss_percent / 100)
-        if abs(min(0, self.daily_pnl)) >= daily_loss_limit * 0.7:
-            risk_factors += 1
-        
-        if len(self.daily_trades) > 10:  # Muitos trades em um dia
-            risk_factors += 1
-        
-        # Determina nível
-        if risk_factors == 0:
-            return "LOW"
-        elif risk_factors == 1:
-            return "MEDIUM"
-        else:
-            return "HIGH"
+        self._check_daily_reset()
+        return self.state.risk_level
 
     def should_pause_trading(self) -> bool:
         """
@@ -306,23 +440,23 @@ class RiskManager:
         
         # Pausa se risco alto ou limites atingidos
         return (
-            risk_level == "HIGH" or
-            self.consecutive_losses >= self.settings.consecutive_loss_limit or
-            abs(min(0, self.daily_pnl)) >= self.settings.capital_usdt * (self.settings.max_daily_loss_percent / 100)
+            risk_level == RISK_HIGH or
+            self.state.consecutive_loss_limit_hit or
+            self.state.daily_loss_limit_hit
         )
 
     def get_recommended_position_size(self, signal: dict, available_capital: float) -> float:
         """
         Retorna tamanho de posição recomendado baseado no risco atual
         """
-        base_size = self.calculate_position_size(signal['price'], available_capital)
+        base_size = self.calculate_position_size(signal['price'], available_capital, signal.get('symbol'))
         
         # Ajusta baseado no nível de risco
         risk_level = self._assess_risk_level()
         
-        if risk_level == "HIGH":
+        if risk_level == RISK_HIGH:
             return base_size * 0.5  # Reduz 50%
-        elif risk_level == "MEDIUM":
+        elif risk_level == RISK_MEDIUM:
             return base_size * 0.75  # Reduz 25%
         else:
             return base_size  # Tamanho normal
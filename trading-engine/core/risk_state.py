@@ -0,0 +1,189 @@
+"""
+Incrementally Maintained Risk Aggregates
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Deque, Optional, Tuple
+
+from config.settings import TradingSettings
+
+RISK_LOW = "LOW"
+RISK_MEDIUM = "MEDIUM"
+RISK_HIGH = "HIGH"
+
+# Fração do limite a partir da qual o fator conta para o nível de risco
+RISK_WARNING_RATIO = 0.7
+
+# Trades no dia acima disto contam como fator de risco
+MAX_DAILY_TRADES_WARNING = 10
+
+@dataclass(frozen=True)
+class RiskLimits:
+    """Limites de risco derivados das configurações (calculados uma vez)"""
+    capital: float
+    daily_loss_limit: float
+    daily_loss_warning: float
+    consecutive_loss_limit: int
+    consecutive_loss_warning: float
+    max_position_value: float
+    max_simultaneous_trades: int
+    max_positions_per_symbol: int
+    portfolio_var_limit: float
+    rolling_window: timedelta
+
+    @classmethod
+    def from_settings(cls, settings: TradingSettings) -> "RiskLimits":
+        daily_loss_limit = settings.capital_usdt * (settings.max_daily_loss_percent / 100)
+        return cls(
+            capital=settings.capital_usdt,
+            daily_loss_limit=daily_loss_limit,
+            daily_loss_warning=daily_loss_limit * RISK_WARNING_RATIO,
+            consecutive_loss_limit=settings.consecutive_loss_limit,
+            consecutive_loss_warning=settings.consecutive_loss_limit * RISK_WARNING_RATIO,
+            max_position_value=settings.capital_usdt * (settings.max_position_size_percent / 100),
+            max_simultaneous_trades=settings.max_simultaneous_trades,
+            max_positions_per_symbol=settings.max_positions_per_symbol,
+            portfolio_var_limit=settings.capital_usdt * (settings.portfolio_var_limit_percent / 100),
+            rolling_window=timedelta(hours=settings.risk_rolling_window_hours)
+        )
+
+@dataclass
+class RiskState:
+    """
+    Agregados de risco atualizados em O(1) a cada trade fechado
+
+    Contadores totais e do dia, P&L realizado, pico de equity e drawdown
+    máximo, e a perda dentro da janela móvel (soma mantida com deque; cada
+    trade entra e sai da janela uma única vez). O nível de risco é recalculado
+    apenas quando os contadores mudam, então as consultas só leem campos.
+    """
+    limits: RiskLimits
+
+    total_trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    realized_pnl: float = 0.0
+    consecutive_losses: int = 0
+
+    daily_date: date = field(default_factory=date.today)
+    daily_trades: int = 0
+    daily_wins: int = 0
+    daily_pnl: float = 0.0
+
+    peak_equity: float = 0.0
+    max_drawdown: float = 0.0
+
+    rolling_loss: float = 0.0
+    _rolling: Deque[Tuple[datetime, float]] = field(default_factory=deque, repr=False)
+
+    risk_level: str = RISK_LOW
+
+    def __post_init__(self):
+        self.peak_equity = max(self.peak_equity, self.equity)
+
+    @property
+    def equity(self) -> float:
+        return self.limits.capital + self.realized_pnl
+
+    @property
+    def drawdown(self) -> float:
+        """Distância atual do pico de equity"""
+        return self.peak_equity - self.equity
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.total_trades * 100 if self.total_trades else 0.0
+
+    @property
+    def daily_win_rate(self) -> float:
+        return self.daily_wins / self.daily_trades * 100 if self.daily_trades else 0.0
+
+    @property
+    def daily_loss(self) -> float:
+        return -self.daily_pnl if self.daily_pnl < 0 else 0.0
+
+    def record(self, pnl: float, profitable: bool, now: Optional[datetime] = None):
+        """Registra o resultado de um trade fechado"""
+        now = now or datetime.now()
+        self.roll_day(now.date())
+
+        self.total_trades += 1
+        self.daily_trades += 1
+        self.realized_pnl += pnl
+        self.daily_pnl += pnl
+
+        if profitable:
+            self.wins += 1
+            self.daily_wins += 1
+            self.consecutive_losses = 0
+        else:
+            self.losses += 1
+            self.consecutive_losses += 1
+
+        if self.equity > self.peak_equity:
+            self.peak_equity = self.equity
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+        if pnl < 0:
+            self._rolling.append((now, -pnl))
+            self.rolling_loss += -pnl
+        self._expire_rolling(now)
+
+        self._update_risk_level()
+
+    def roll_day(self, today: date) -> bool:
+        """Zera os contadores diários na virada do dia"""
+        if today <= self.daily_date:
+            return False
+
+        self.daily_date = today
+        self.daily_trades = 0
+        self.daily_wins = 0
+        self.daily_pnl = 0.0
+        self._update_risk_level()
+        return True
+
+    def restore(self, daily_pnl: float, consecutive_losses: int):
+        """Recoloca P&L do dia e perdas consecutivas recuperados (warm restart)"""
+        self.daily_pnl = daily_pnl
+        self.consecutive_losses = consecutive_losses
+        self._update_risk_level()
+
+    def rolling_window_loss(self, now: Optional[datetime] = None) -> float:
+        """Perda realizada dentro da janela móvel"""
+        self._expire_rolling(now or datetime.now())
+        return self.rolling_loss
+
+    def _expire_rolling(self, now: datetime):
+        cutoff = now - self.limits.rolling_window
+        while self._rolling and self._rolling[0][0] < cutoff:
+            _, loss = self._rolling.popleft()
+            self.rolling_loss -= loss
+        if not self._rolling:
+            self.rolling_loss = 0.0
+
+    def _update_risk_level(self):
+        risk_factors = 0
+        if self.consecutive_losses >= self.limits.consecutive_loss_warning:
+            risk_factors += 1
+        if self.daily_loss >= self.limits.daily_loss_warning:
+            risk_factors += 1
+        if self.daily_trades > MAX_DAILY_TRADES_WARNING:
+            risk_factors += 1
+
+        if risk_factors == 0:
+            self.risk_level = RISK_LOW
+        elif risk_factors == 1:
+            self.risk_level = RISK_MEDIUM
+        else:
+            self.risk_level = RISK_HIGH
+
+    @property
+    def daily_loss_limit_hit(self) -> bool:
+        return self.daily_loss >= self.limits.daily_loss_limit
+
+    @property
+    def consecutive_loss_limit_hit(self) -> bool:
+        return self.consecutive_losses >= self.limits.consecutive_loss_limit
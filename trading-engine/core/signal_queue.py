@@ -0,0 +1,183 @@
+"""
+Ranked Signal Priority Queue Between Strategy and Execution
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+RANKING_CONFIDENCE = "confidence"
+RANKING_EDGE = "edge"
+
+def signal_confidence(signal: Dict) -> float:
+    """Score pela confiança do sinal"""
+    return signal.get('confidence', 0.0)
+
+def signal_edge_per_risk(signal: Dict) -> float:
+    """
+    Score pelo retorno esperado por unidade de risco
+
+    Usa a confiança como probabilidade de atingir o alvo:
+    (p * ganho - (1 - p) * perda) / perda, com ganho e perda medidos do
+    preço de entrada até take-profit e stop-loss. Sinais sem níveis usam
+    a confiança.
+    """
+    price = signal.get('price', 0)
+    stop_loss = signal.get('stop_loss')
+    take_profit = signal.get('take_profit')
+    if not price or stop_loss is None or take_profit is None or stop_loss >= price:
+        return signal_confidence(signal)
+
+    probability = signal.get('confidence', 0.0)
+    reward = take_profit - price
+    risk = price - stop_loss
+    return (probability * reward - (1 - probability) * risk) / risk
+
+RANKINGS: Dict[str, Callable[[Dict], float]] = {
+    RANKING_CONFIDENCE: signal_confidence,
+    RANKING_EDGE: signal_edge_per_risk
+}
+
+class SignalPriorityQueue:
+    """
+    Fila de sinais ordenada por score (maior primeiro)
+
+    Um sinal vale até a `expiry` ou até ficar mais velho que `max_age` (o preço
+    de um sinal antigo já não serve para decidir a entrada). O engine usa
+    `max_age` igual ao intervalo de análise e chama `purge_expired` antes de
+    cada análise, então a fila ordena apenas os sinais do tick corrente: os que
+    não forem admitidos são descartados no tick seguinte. Novos sinais entram
+    com push O(log n), sem reordenar a fila inteira; um novo sinal para o mesmo
+    símbolo substitui o anterior (a entrada antiga é descartada de forma
+    preguiçosa, assim como as expiradas).
+
+    `on_drop` é chamado para cada sinal descartado sem execução, para que a
+    estratégia possa reemiti-lo com dados novos.
+    """
+
+    def __init__(self, ranking: str = RANKING_CONFIDENCE,
+                 max_age: Optional[timedelta] = None,
+                 on_drop: Optional[Callable[[Dict], None]] = None):
+        self.ranking = ranking
+        self.score = RANKINGS[ranking]
+        self.max_age = max_age
+        self.on_drop = on_drop
+        self._heap: List[Tuple[float, int, Dict]] = []
+        self._live: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self.admitted = 0
+        self.expired = 0
+        self.replaced = 0
+
+    def push(self, signal: Dict) -> float:
+        """Enfileira um sinal e retorna seu score"""
+        score = self.score(signal)
+        sequence = next(self._counter)
+        if signal['symbol'] in self._live:
+            self.replaced += 1
+        self._live[signal['symbol']] = sequence
+        heapq.heappush(self._heap, (-score, sequence, signal))
+        self._compact()
+        return score
+
+    def extend(self, signals: List[Dict]):
+        for signal in signals:
+            self.push(signal)
+
+    def _is_live(self, sequence: int, signal: Dict) -> bool:
+        return self._live.get(signal['symbol']) == sequence
+
+    def _is_expired(self, signal: Dict, now: datetime) -> bool:
+        expiry = signal.get('expiry')
+        if expiry is not None and now > expiry:
+            return True
+        timestamp = signal.get('timestamp')
+        return self.max_age is not None and timestamp is not None and now - timestamp > self.max_age
+
+    def _drop(self, signal: Dict):
+        del self._live[signal['symbol']]
+        self.expired += 1
+        if self.on_drop:
+            self.on_drop(signal)
+
+    def _compact(self):
+        """Reconstrói o heap quando entradas obsoletas dominam a memória"""
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [entry for entry in self._heap if self._is_live(entry[1], entry[2])]
+            heapq.heapify(self._heap)
+
+    def admit(self, slots: int, available_capital: float,
+              position_size: Callable[[Dict], float],
+              now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Retira os melhores sinais que cabem nos slots e no capital restantes
+
+        Sinais expirados (ou velhos demais) são descartados ao chegar ao topo.
+        Sinais que não cabem no capital restante voltam para a fila até
+        expirarem; com o `max_age` do engine isso acontece no purge do próximo
+        tick, que os entrega a `on_drop`.
+
+        Args:
+            slots: Número de trades que ainda podem ser abertos
+            available_capital: Capital livre para novas posições
+            position_size: Função que calcula o tamanho da posição de um sinal
+
+        Returns:
+            Sinais admitidos, em ordem de score
+        """
+        now = now or datetime.now()
+        admitted = []
+        deferred = []
+
+        while self._heap and len(admitted) < slots:
+            entry = heapq.heappop(self._heap)
+            _, sequence, signal = entry
+            if not self._is_live(sequence, signal):
+                continue
+            if self._is_expired(signal, now):
+                self._drop(signal)
+                continue
+
+            size = position_size(signal)
+            if size > available_capital:
+                deferred.append(entry)
+                continue
+
+            del self._live[signal['symbol']]
+            available_capital -= size
+            admitted.append(signal)
+
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+
+        self.admitted += len(admitted)
+        return admitted
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Remove todos os sinais expirados ou velhos demais (O(n), uma vez por tick)"""
+        now = now or datetime.now()
+        expired = [
+            signal for _, sequence, signal in self._heap
+            if self._is_live(sequence, signal) and self._is_expired(signal, now)
+        ]
+        for signal in expired:
+            self._drop(signal)
+        self._compact()
+        return len(expired)
+
+    def clear(self):
+        self._heap.clear()
+        self._live.clear()
+
+    def get_stats(self) -> Dict:
+        return {
+            'ranking': self.ranking,
+            'queued': len(self._live),
+            'admitted': self.admitted,
+            'expired': self.expired,
+            'replaced': self.replaced
+        }
+
+    def __len__(self) -> int:
+        return len(self._live)
@@ -0,0 +1,229 @@
+"""
+Write-Ahead Trade Journal for Crash-Safe Recovery
+"""
+
+import asyncio
+import copy
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EVENT_EXECUTION = "execution"
+EVENT_STOP_UPDATE = "stop_update"
+EVENT_CLOSE = "close"
+EVENT_TRAILING_PEAK = "trailing_peak"
+
+def empty_state() -> Dict[str, Any]:
+    return {
+        "active_trades": {},
+        "daily_pnl": 0.0,
+        "daily_pnl_date": date.today().isoformat(),
+        "consecutive_losses": 0
+    }
+
+def apply_event(state: Dict[str, Any], event: str, data: Dict[str, Any]):
+    """Aplica um evento do ciclo de vida de um trade ao estado"""
+    trades = state["active_trades"]
+
+    if event == EVENT_EXECUTION:
+        trades[data["id"]] = data
+
+    elif event == EVENT_STOP_UPDATE:
+        trade = trades.get(data["trade_id"])
+        if trade is not None:
+            trade.update({key: value for key, value in data.items() if key != "trade_id"})
+
+    elif event == EVENT_TRAILING_PEAK:
+        # Um preço acima do pico eleva o trailing de todos os trades abertos do símbolo
+        for trade in trades.values():
+            if trade["symbol"] == data["symbol"]:
+                trade["trailing_peak"] = max(trade.get("trailing_peak", trade["entry_price"]), data["peak"])
+
+    elif event == EVENT_CLOSE:
+        trades.pop(data["trade_id"], None)
+
+        closed_on = data["date"]
+        if state.get("daily_pnl_date") != closed_on:
+            state["daily_pnl"] = 0.0
+            state["daily_pnl_date"] = closed_on
+        state["daily_pnl"] += data["pnl"]
+        state["consecutive_losses"] = state["consecutive_losses"] + 1 if data["pnl"] < 0 else 0
+
+class TradeJournal:
+    """
+    Journal append-only (JSON lines) dos eventos de trade
+
+    Só eventos que alteram o estado recuperado (execução, ajuste de stops,
+    novo pico de trailing por símbolo e fechamento) são gravados; sinais não abertos expiram e não são retomados
+    após um restart. Cada evento é gravado e enviado ao SO imediatamente (sobrevive a um crash
+    do processo); o fsync para disco é agrupado por uma task em background a
+    cada `fsync_interval`. A cada `compact_every` eventos o estado é gravado
+    em um snapshot atômico e o journal é truncado, de modo que o replay no
+    startup lê apenas o snapshot e a cauda recente.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.05, compact_every: int = 1000):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_suffix(self.path.suffix + ".snapshot")
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self.state = empty_state()
+        self.seq = 0
+        self._file = None
+        self._dirty = False
+        self._events_since_snapshot = 0
+        self._snapshot_write: Optional[asyncio.Future] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def open(self) -> Dict[str, Any]:
+        """
+        Abre o journal e reconstrói o estado (snapshot + eventos posteriores)
+
+        Returns:
+            Cópia do estado: active_trades, daily_pnl e consecutive_losses
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        started = datetime.now()
+
+        snapshot_seq = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path) as snapshot:
+                data = json.load(snapshot)
+            self.state = data["state"]
+            snapshot_seq = self.seq = data["seq"]
+
+        replayed = 0
+        if self.path.exists():
+            with open(self.path) as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última linha truncada por um crash durante a escrita
+                        logger.warning("Ignoring truncated trade journal record")
+                        continue
+                    if record["seq"] <= snapshot_seq:
+                        continue
+                    apply_event(self.state, record["event"], record["data"])
+                    self.seq = record["seq"]
+                    replayed += 1
+
+        if self.state.get("daily_pnl_date") != date.today().isoformat():
+            self.state["daily_pnl"] = 0.0
+            self.state["daily_pnl_date"] = date.today().isoformat()
+
+        self._events_since_snapshot = replayed
+        self._file = open(self.path, "a")
+
+        elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+        logger.info("Trade journal replayed",
+                    path=str(self.path),
+                    active_trades=len(self.state["active_trades"]),
+                    events=replayed,
+                    elapsed_ms=round(elapsed_ms, 2))
+        return copy.deepcopy(self.state)
+
+    def record(self, event: str, data: Dict[str, Any]):
+        """Grava um evento no journal (fsync agrupado em background)"""
+        if event == EVENT_CLOSE:
+            data = {**data, "date": date.today().isoformat()}
+
+        self.seq += 1
+        record = {"seq": self.seq, "ts": datetime.now().isoformat(), "event": event, "data": data}
+        line = json.dumps(record, default=_json_default)
+
+        # Estado espelhado com os mesmos dados serializados do journal
+        apply_event(self.state, event, json.loads(line)["data"])
+
+        self._file.write(line + "\n")
+        self._file.flush()
+        self._dirty = True
+        self._events_since_snapshot += 1
+
+    def start(self):
+        """Inicia a task de fsync agrupado e compactação"""
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                if self._events_since_snapshot >= self.compact_every:
+                    await self.compact()
+                elif self._dirty:
+                    self._dirty = False
+                    await asyncio.to_thread(os.fsync, self._file.fileno())
+            except Exception as e:
+                logger.error(f"Error syncing trade journal: {e}")
+
+    def sync(self):
+        """Força o fsync dos eventos pendentes"""
+        if self._file and self._dirty:
+            self._dirty = False
+            os.fsync(self._file.fileno())
+
+    async def compact(self):
+        """
+        Grava um snapshot do estado e trunca o journal
+
+        O estado é serializado no loop (ponto consistente) e a escrita, o fsync
+        e o `os.replace` do snapshot rodam em thread. Eventos gravados durante
+        a escrita ficam no journal, que só é truncado se nenhum chegou; o replay
+        ignora eventos com seq já coberto pelo snapshot, então um crash em
+        qualquer ponto é seguro.
+        """
+        # Uma escrita anterior interrompida por cancelamento ainda pode estar na thread
+        if self._snapshot_write is not None and not self._snapshot_write.done():
+            await asyncio.wait({self._snapshot_write})
+
+        seq = self.seq
+        payload = json.dumps({"seq": seq, "state": self.state}, default=_json_default)
+
+        # shield: cancelar o chamador não interrompe a escrita já iniciada
+        self._snapshot_write = asyncio.ensure_future(asyncio.to_thread(self._write_snapshot, payload))
+        await asyncio.shield(self._snapshot_write)
+
+        if self.seq == seq:
+            self._file.truncate(0)
+            self._dirty = False
+        self._events_since_snapshot = self.seq - seq
+        logger.info("Trade journal compacted", seq=seq,
+                    active_trades=len(self.state["active_trades"]))
+
+    def _write_snapshot(self, payload: str):
+        """Escreve o snapshot em arquivo temporário e o troca atomicamente"""
+        tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        with open(tmp_path, "w") as snapshot:
+            snapshot.write(payload)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def close(self):
+        """Para a task, compacta e fecha o journal"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+        if self._file:
+            await self.compact()
+            self._file.close()
+            self._file = None
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,261 @@
+"""
+Price-Level Trigger Index for Stop-Loss / Take-Profit Evaluation
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+STOP_LOSS = "stop_loss"
+TAKE_PROFIT = "take_profit"
+TRAILING_STOP = "trailing_stop"
+
+class _TrailingBucket:
+    """Trades de um grupo trailing que compartilham o mesmo pico de preço"""
+
+    __slots__ = ("peak", "trade_ids")
+
+    def __init__(self, peak: float, trade_ids: Set[str]):
+        self.peak = peak
+        self.trade_ids = trade_ids
+
+class _TrailingGroup:
+    """
+    Trailing stops de um símbolo com o mesmo percentual
+
+    Os picos distintos ficam em um deque ascendente. Um preço novo só mexe nas
+    pontas: os picos abaixo dele (início) são fundidos em um único bucket com
+    o preço, que passa a ser o menor pico, e os acionados (pico * fator >=
+    preço) são os maiores (fim). Cada pico sai do deque uma única vez e a
+    fusão move o menor conjunto para o maior, então cada atualização custa
+    O(1 + k) amortizado. Abrir ou remover um trade usa busca binária e
+    inserção no meio do deque (O(n), uma vez por trade).
+    """
+
+    def __init__(self, percent: float):
+        self.factor = 1 - percent / 100
+        self.peaks: Deque[float] = deque()
+        self.buckets: Dict[float, _TrailingBucket] = {}
+        self.bucket_of: Dict[str, _TrailingBucket] = {}
+
+    def add(self, trade_id: str, peak: float):
+        bucket = self.buckets.get(peak)
+        if bucket is None:
+            bucket = self.buckets[peak] = _TrailingBucket(peak, set())
+            self.peaks.insert(bisect_left(self.peaks, peak), peak)
+        bucket.trade_ids.add(trade_id)
+        self.bucket_of[trade_id] = bucket
+
+    def remove(self, trade_id: str):
+        bucket = self.bucket_of.pop(trade_id, None)
+        if bucket is None:
+            return
+        bucket.trade_ids.discard(trade_id)
+        if not bucket.trade_ids:
+            del self.buckets[bucket.peak]
+            del self.peaks[bisect_left(self.peaks, bucket.peak)]
+
+    def stop_level(self, trade_id: str) -> Optional[float]:
+        bucket = self.bucket_of.get(trade_id)
+        return bucket.peak * self.factor if bucket else None
+
+    def update(self, price: float) -> List[str]:
+        """Eleva os picos abaixo do preço e retorna os trades acionados"""
+        peaks = self.peaks
+        if peaks and peaks[0] <= price:
+            merged = []
+            while peaks and peaks[0] <= price:
+                merged.append(self.buckets.pop(peaks.popleft()))
+
+            target = max(merged, key=lambda bucket: len(bucket.trade_ids))
+            for bucket in merged:
+                if bucket is not target:
+                    target.trade_ids |= bucket.trade_ids
+                    for trade_id in bucket.trade_ids:
+                        self.bucket_of[trade_id] = target
+
+            target.peak = price
+            self.buckets[price] = target
+            peaks.appendleft(price)
+
+        # Acionados: pico * fator >= preço (fim do deque)
+        fired = []
+        while peaks and peaks[-1] * self.factor >= price:
+            bucket = self.buckets.pop(peaks.pop())
+            for trade_id in bucket.trade_ids:
+                del self.bucket_of[trade_id]
+            fired.extend(bucket.trade_ids)
+        return fired
+
+    def __len__(self) -> int:
+        return len(self.bucket_of)
+
+class _SymbolTriggers:
+    """Níveis de stop e alvo de um símbolo em listas ordenadas"""
+
+    def __init__(self):
+        # Stops: (nível, trade_id) ascendente; acionam quando preço <= nível (sufixo)
+        self.stops: List[Tuple[float, str]] = []
+        # Alvos: (-nível, trade_id) ascendente; acionam quando preço >= nível (sufixo)
+        self.targets: List[Tuple[float, str]] = []
+        self.trailing: Dict[float, _TrailingGroup] = {}
+
+    def is_empty(self) -> bool:
+        return not self.stops and not self.targets and not self.trailing
+
+class PriceTriggerIndex:
+    """
+    Índice de gatilhos de preço por símbolo
+
+    Cada atualização de preço dispara exatamente os gatilhos cruzados em
+    O(log n + k), em vez de comparar todas as posições a cada tick. Suporta
+    stop-loss fixo, take-profit e trailing stop percentual.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, _SymbolTriggers] = {}
+        # trade_id -> (símbolo, stop, alvo, percentual trailing)
+        self._trades: Dict[str, Tuple[str, Optional[float], Optional[float], Optional[float]]] = {}
+
+    def add(self, trade_id: str, symbol: str,
+            stop_loss: Optional[float] = None,
+            take_profit: Optional[float] = None,
+            trailing_percent: Optional[float] = None,
+            reference_price: Optional[float] = None):
+        """
+        Registra os gatilhos de um trade
+
+        Args:
+            trade_id: ID do trade
+            symbol: Símbolo negociado
+            stop_loss: Nível de stop-loss fixo
+            take_profit: Nível de take-profit
+            trailing_percent: Distância do trailing stop em % abaixo do pico
+            reference_price: Pico inicial do trailing stop (ex.: preço de entrada)
+        """
+        if trade_id in self._trades:
+            self.remove(trade_id)
+
+        triggers = self._symbols.setdefault(symbol, _SymbolTriggers())
+
+        if stop_loss is not None:
+            insort(triggers.stops, (stop_loss, trade_id))
+        if take_profit is not None:
+            insort(triggers.targets, (-take_profit, trade_id))
+        if trailing_percent and reference_price:
+            group = triggers.trailing.get(trailing_percent)
+            if group is None:
+                group = triggers.trailing[trailing_percent] = _TrailingGroup(trailing_percent)
+            group.add(trade_id, reference_price)
+        else:
+            trailing_percent = None
+
+        if triggers.is_empty():
+            del self._symbols[symbol]
+
+        self._trades[trade_id] = (symbol, stop_loss, take_profit, trailing_percent)
+
+    def remove(self, trade_id: str) -> bool:
+        """Remove todos os gatilhos de um trade"""
+        entry = self._trades.pop(trade_id, None)
+        if entry is None:
+            return False
+
+        symbol, stop_loss, take_profit, trailing_percent = entry
+        triggers = self._symbols.get(symbol)
+        if triggers is None:
+            return True
+
+        if stop_loss is not None:
+            self._discard(triggers.stops, (stop_loss, trade_id))
+        if take_profit is not None:
+            self._discard(triggers.targets, (-take_profit, trade_id))
+        if trailing_percent is not None:
+            group = triggers.trailing.get(trailing_percent)
+            if group is not None:
+                group.remove(trade_id)
+                if not len(group):
+                    del triggers.trailing[trailing_percent]
+
+        if triggers.is_empty():
+            del self._symbols[symbol]
+        return True
+
+    @staticmethod
+    def _discard(levels: List[Tuple[float, str]], item: Tuple[float, str]):
+        index = bisect_left(levels, item)
+        if index < len(levels) and levels[index] == item:
+            del levels[index]
+
+    def update_price(self, symbol: str, price: float) -> List[Tuple[str, str]]:
+        """
+        Processa um novo preço e retorna os gatilhos acionados
+
+        Os trades acionados são removidos do índice.
+
+        Returns:
+            Lista de (trade_id, motivo) com motivo em stop_loss, trailing_stop
+            ou take_profit
+        """
+        triggers = self._symbols.get(symbol)
+        if triggers is None or price is None:
+            return []
+
+        fired: List[Tuple[str, str]] = []
+
+        first = bisect_left(triggers.stops, (price,))
+        fired.extend((trade_id, STOP_LOSS) for _, trade_id in triggers.stops[first:])
+        del triggers.stops[first:]
+
+        for group in list(triggers.trailing.values()):
+            fired.extend((trade_id, TRAILING_STOP) for trade_id in group.update(price))
+
+        first = bisect_left(triggers.targets, (-price,))
+        fired.extend((trade_id, TAKE_PROFIT) for _, trade_id in triggers.targets[first:])
+        del triggers.targets[first:]
+
+        # Um trade pode cruzar mais de um gatilho; vale o primeiro (stop tem prioridade)
+        result = []
+        for trade_id, reason in fired:
+            if self.remove(trade_id):
+                result.append((trade_id, reason))
+        return result
+
+    def stop_level(self, trade_id: str) -> Optional[float]:
+        """Stop efetivo do trade (maior entre stop fixo e trailing)"""
+        entry = self._trades.get(trade_id)
+        if entry is None:
+            return None
+
+        symbol, stop_loss, _, trailing_percent = entry
+        levels = [stop_loss] if stop_loss is not None else []
+        if trailing_percent is not None:
+            levels.append(self._symbols[symbol].trailing[trailing_percent].stop_level(trade_id))
+        return max(levels) if levels else None
+
+    def trailing_peak(self, trade_id: str) -> Optional[float]:
+        """Pico corrente do trailing stop do trade (None se não houver)"""
+        entry = self._trades.get(trade_id)
+        if entry is None or entry[3] is None:
+            return None
+
+        symbol, _, _, trailing_percent = entry
+        bucket = self._symbols[symbol].trailing[trailing_percent].bucket_of.get(trade_id)
+        return bucket.peak if bucket else None
+
+    def lowest_peak(self, symbol: str) -> Optional[float]:
+        """Menor pico trailing do símbolo (um preço acima dele eleva picos)"""
+        triggers = self._symbols.get(symbol)
+        if triggers is None:
+            return None
+        peaks = [group.peaks[0] for group in triggers.trailing.values() if group.peaks]
+        return min(peaks) if peaks else None
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def __contains__(self, trade_id: str) -> bool:
+        return trade_id in self._trades
+
+    def __len__(self) -> int:
+        return len(self._trades)
@@ -0,0 +1,95 @@
+"""
+Per-Token Volatility Service for Position Sizing
+"""
+
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+from strategies.indicators import ATR, SMA, IndicatorBank, Volatility
+
+class VolatilityService:
+    """
+    Volatilidade realizada e ATR por token, mantidas a partir do feed de preços
+
+    Os indicadores são incrementais (O(1) por tick) e a volatilidade efetiva
+    (a maior entre a realizada e o ATR em % do preço, convertida para base
+    horária) e o ajuste de tamanho são calculados na atualização, então as
+    consultas do sizing são apenas leituras de dicionário.
+
+    Preços repetidos (ex.: servidos do cache entre atualizações da API) não
+    são amostras novas e são ignorados. A conversão para base horária usa o
+    intervalo médio medido entre as amostras de cada token, na mesma janela
+    da volatilidade, e não o intervalo nominal do loop.
+
+    O ajuste segue volatility targeting: `target / volatilidade`, limitado a
+    [min_adjustment, 1] para nunca exceder o tamanho base da posição. Tokens
+    sem histórico suficiente usam ajuste 1.0.
+    """
+
+    def __init__(self, window: int = 20, atr_period: int = 14,
+                 target_volatility: float = 2.0, min_adjustment: float = 0.25):
+        self.target_volatility = target_volatility
+        self.min_adjustment = min_adjustment
+
+        self.bank = IndicatorBank()
+        self.bank.register('volatility', lambda: Volatility(window))
+        self.bank.register('atr', lambda: ATR(atr_period))
+        # Intervalo médio (s) entre amostras, para converter a volatilidade por amostra
+        self._intervals = IndicatorBank()
+        self._intervals.register('interval', lambda: SMA(window))
+
+        self._last_sample: Dict[str, Tuple[float, float]] = {}
+        self._volatility: Dict[str, float] = {}
+        self._adjustment: Dict[str, float] = {}
+
+    def update(self, prices: Dict[str, float], now: Optional[float] = None):
+        """Incorpora um tick de preços (símbolo -> preço); `now` em segundos monotônicos"""
+        now = time.monotonic() if now is None else now
+
+        for symbol, price in prices.items():
+            if not price or price <= 0:
+                continue
+
+            last = self._last_sample.get(symbol)
+            if last is not None:
+                last_price, last_at = last
+                if price == last_price or now <= last_at:
+                    continue
+                self._intervals.update(symbol, now - last_at)
+            self._last_sample[symbol] = (price, now)
+
+            self.bank.update(symbol, price)
+            realized = self.bank.get(symbol, 'volatility')
+            atr = self.bank.get(symbol, 'atr')
+            if not realized.ready or not atr.ready:
+                continue
+
+            # Volatilidade por amostra -> horária (raiz do tempo)
+            hourly_scale = math.sqrt(3600 / self._intervals.value(symbol, 'interval'))
+            atr_percent = atr.value / price * 100
+            volatility = max(realized.value, atr_percent) * hourly_scale
+            self._volatility[symbol] = volatility
+            self._adjustment[symbol] = self._compute_adjustment(volatility)
+
+    def _compute_adjustment(self, volatility: float) -> float:
+        if not self.target_volatility or volatility <= 0:
+            return 1.0
+        return max(self.min_adjustment, min(1.0, self.target_volatility / volatility))
+
+    def volatility(self, symbol: str) -> Optional[float]:
+        """Volatilidade horária efetiva em % (None sem histórico suficiente)"""
+        return self._volatility.get(symbol)
+
+    def adjustment(self, symbol: Optional[str]) -> float:
+        """Multiplicador do tamanho da posição para o token"""
+        if symbol is None:
+            return 1.0
+        return self._adjustment.get(symbol, 1.0)
+
+    def get_stats(self) -> Dict:
+        return {
+            'tracked_symbols': len(self.bank),
+            'ready_symbols': len(self._volatility),
+            'target_volatility': self.target_volatility
+        }
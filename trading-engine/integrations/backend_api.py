@@ -4,6 +4,9 @@ Backend API Client for Trading Engine Communication
 
 import aiohttp
 import asyncio
+import gzip
+import time
+import uuid
 from typing import Dict, List, Optional, Any
 import json
 from datetime import datetime
@@ -13,6 +16,36 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Endpoints de cada tipo de relatório enviado pelo outbox
+REPORT_ENDPOINTS = {
+    "signal": "/api/trading/signal",
+    "execution": "/api/trading/execution",
+    "close": "/api/trading/close"
+}
+
+# Rota de batch do backend e intervalo para nova tentativa quando ela não existe
+BATCH_ENDPOINT = "/api/trading/batch"
+BATCH_ENDPOINT_RETRY_SECONDS = 600
+
+# Corpos menores que isto não compensam a compressão
+GZIP_MIN_BYTES = 1024
+
+def report_key(report: Dict) -> str:
+    """
+    Chave de idempotência do relatório (única por relatório)
+
+    Relatórios gravados no spool por versões anteriores não têm `key` e usam
+    "<type>_<id>".
+    """
+    return report.get("key") or f"{report.get('type')}_{report.get('id')}"
+
+def _new_report(report_type: str, report_id: Any, payload: Dict) -> Dict:
+    return {"type": report_type, "id": report_id, "key": uuid.uuid4().hex, "payload": payload}
+
+def _is_rejection(status: int) -> bool:
+    """Erros 4xx definitivos: o relatório não deve ser reenviado"""
+    return 400 <= status < 500 and status not in (408, 429)
+
 class BackendAPIClient:
     """
     Cliente para comunicação com o backend Node.js
@@ -29,6 +62,11 @@ class BackendAPIClient:
             "User-Agent": "TradingEngine/1.0"
         }
         
+        # Envio em batch: formato do corpo (json/ndjson) e compressão gzip
+        self.batch_format = settings.backend_batch_format
+        self.batch_gzip = settings.backend_batch_gzip
+        self._batch_unsupported_until = 0.0
+        
         logger.info("Backend API Client initialized", base_url=self.base_url)
 
     async def initialize(self, session: aiohttp.ClientSession):
@@ -46,95 +84,96 @@ class BackendAPIClient:
             logger.error(f"Backend health check failed: {e}")
             return False
 
+    def build_signal_payload(self, signal: Dict) -> Dict:
+        """Monta o payload de um sinal de trading"""
+        return {
+            "symbol": signal.get("symbol"),
+            "type": signal.get("type"),
+            "price": signal.get("price"),
+            "confidence": signal.get("confidence"),
+            "timestamp": datetime.now().isoformat(),
+            "strategy": "momentum",
+            "metadata": signal.get("metadata", {})
+        }
+
+    def build_execution_payload(self, trade: Dict) -> Dict:
+        """Monta o payload de execução de um trade"""
+        return {
+            "trade_id": trade.get("id"),
+            "symbol": trade.get("symbol"),
+            "side": "buy",  # Assumindo compra para momentum
+            "amount": trade.get("amount"),
+            "entry_price": trade.get("entry_price"),
+            "stop_loss": trade.get("stop_loss"),
+            "take_profit": trade.get("take_profit"),
+            "timestamp": trade.get("timestamp", datetime.now()).isoformat(),
+            "tx_hash": trade.get("tx_hash"),
+            "status": "active"
+        }
+
+    def build_close_payload(self, trade_id: str, pnl: float, reason: str) -> Dict:
+        """Monta o payload de fechamento de um trade"""
+        return {
+            "trade_id": trade_id,
+            "pnl": pnl,
+            "close_reason": reason,
+            "close_timestamp": datetime.now().isoformat(),
+            "status": "closed"
+        }
+
+    def signal_report(self, signal: Dict) -> Dict:
+        """Relatório de sinal no formato do outbox"""
+        return _new_report("signal", signal.get("symbol"), self.build_signal_payload(signal))
+
+    def execution_report(self, trade: Dict) -> Dict:
+        """Relatório de execução no formato do outbox"""
+        return _new_report("execution", trade.get("id"), self.build_execution_payload(trade))
+
+    def close_report(self, trade_id: str, pnl: float, reason: str) -> Dict:
+        """Relatório de fechamento no formato do outbox"""
+        return _new_report("close", trade_id, self.build_close_payload(trade_id, pnl, reason))
+
     async def report_trade_signal(self, signal: Dict) -> bool:
         """
         Reporta sinal de trading para o backend
         """
-        try:
-            url = f"{self.base_url}/api/trading/signal"
-            
-            payload = {
-                "symbol": signal.get("symbol"),
-                "type": signal.get("type"),
-                "price": signal.get("price"),
-                "confidence": signal.get("confidence"),
-                "timestamp": datetime.now().isoformat(),
-                "strategy": "momentum",
-                "metadata": signal.get("metadata", {})
-            }
-            
-            async with self.session.post(url, json=payload, headers=self.headers) as response:
-                if response.status == 200:
-                    logger.info(f"Signal reported: {signal['symbol']}")
-                    return True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Failed to report signal: {response.status} - {error_text}")
-                    return False
-                    
-        except Exception as e:
-            logger.error(f"Error reporting signal: {e}")
-            return False
+        return await self.send_report(self.signal_report(signal))
 
     async def report_trade_execution(self, trade: Dict) -> bool:
         """
         Reporta execução de trade para o backend
         """
-        try:
-            url = f"{self.base_url}/api/trading/execution"
-            
-            payload = {
-                "trade_id": trade.get("id"),
-                "symbol": trade.get("symbol"),
-                "side": "buy",  # Assumindo compra para momentum
-                "amount": trade.get("amount"),
-                "entry_price": trade.get("entry_price"),
-                "stop_loss": trade.get("stop_loss"),
-                "take_profit": trade.get("take_profit"),
-                "timestamp": trade.get("timestamp", datetime.now()).isoformat(),
-                "tx_hash": trade.get("tx_hash"),
-                "status": "active"
-            }
-            
-            async with self.session.post(url, json=payload, headers=self.headers) as response:
-                if response.status == 200:
-                    logger.info(f"Trade execution reported: {trade['id']}")
-                    return True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Failed to report execution: {response.status} - {error_text}")
-                    return False
-                    
-        except Exception as e:
-            logger.error(f"Error reporting execution: {e}")
-            return False
+        return await self.send_report(self.execution_report(trade))
 
     async def report_trade_close(self, trade_id: str, pnl: float, reason: str) -> bool:
         """
         Reporta fechamento de trade para o backend
         """
+        return await self.send_report(self.close_report(trade_id, pnl, reason))
+
+    async def send_report(self, report: Dict) -> Optional[bool]:
+        """
+        Envia um relatório {type, id, payload} para o endpoint do seu tipo
+        
+        Returns:
+            True se entregue, False em falha transitória (rede, 5xx, 408, 429) e
+            None se o backend rejeitou o relatório (demais 4xx, não reenviar)
+        """
+        report_type = report.get("type")
         try:
-            url = f"{self.base_url}/api/trading/close"
+            url = f"{self.base_url}{REPORT_ENDPOINTS[report_type]}"
             
-            payload = {
-                "trade_id": trade_id,
-                "pnl": pnl,
-                "close_reason": reason,
-                "close_timestamp": datetime.now().isoformat(),
-                "status": "closed"
-            }
-            
-            async with self.session.post(url, json=payload, headers=self.headers) as response:
+            async with self.session.post(url, json=report["payload"], headers=self.headers) as response:
                 if response.status == 200:
-                    logger.info(f"Trade close reported: {trade_id}")
+                    logger.info(f"Report {report_type} delivered: {report.get('id')}")
                     return True
                 else:
                     error_text = await response.text()
-                    logger.error(f"Failed to report close: {response.status} - {error_text}")
-                    return False
+                    self._handle_api_error(response.status, error_text, REPORT_ENDPOINTS[report_type])
+                    return None if _is_rejection(response.status) else False
                     
         except Exception as e:
-            logger.error(f"Error reporting close: {e}")
+            logger.error(f"Error reporting {report_type}: {e}")
             return False
 
     async def report_performance(self, metrics: Dict) -> bool:
@@ -379,23 +418,112 @@ class BackendAPIClient:
         else:
             logger.error(f"API error for {endpoint}: {response_status} - {error_text}")
 
-    async def batch_report(self, reports: List[Dict]) -> Dict[str, bool]:
+    async def batch_report(self, reports: List[Dict]) -> Dict[str, Optional[bool]]:
         """
-        Envia múltiplos relatórios em batch
+        Envia múltiplos relatórios {type, id, key, payload} em uma única requisição
+        
+        O corpo vai para a rota de batch como array JSON ou NDJSON, com gzip
+        opcional, e o backend devolve o resultado de cada item. Se a rota não
+        existir (backend antigo), usa os endpoints individuais e tenta a rota
+        de batch novamente após `BATCH_ENDPOINT_RETRY_SECONDS`.
+        
+        Returns:
+            Resultado por relatório, indexado por `report_key` (ver `send_report`)
         """
-        results = {}
+        if not reports:
+            return {}
         
-        for report in reports:
-            report_type = report.get("type")
+        if time.monotonic() < self._batch_unsupported_until:
+            return await self._batch_report_individually(reports)
+        
+        try:
+            url = f"{self.base_url}{BATCH_ENDPOINT}"
+            body, headers = self._encode_batch(reports)
             
-            if report_type == "signal":
-                results[f"signal_{report.get('id')}"] = await self.report_trade_signal(report)
-            elif report_type == "execution":
-                results[f"execution_{report.get('id')}"] = await self.report_trade_execution(report)
-            elif report_type == "close":
-                results[f"close_{report.get('id')}"] = await self.report_trade_close(
-                    report.get('trade_id'), report.get('pnl'), report.get('reason')
-                )
+            async with self.session.post(url, data=body, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return self._parse_batch_results(reports, data)
+                
+                error_text = await response.text()
+                if response.status in (404, 405):
+                    logger.warning("Backend batch endpoint unavailable, using individual reports")
+                    self._batch_unsupported_until = time.monotonic() + BATCH_ENDPOINT_RETRY_SECONDS
+                    return await self._batch_report_individually(reports)
+                
+                self._handle_api_error(response.status, error_text, BATCH_ENDPOINT)
+                if _is_rejection(response.status):
+                    # Lote recusado como um todo (ex.: muito grande): tenta item a item
+                    return await self._batch_report_individually(reports)
+                return {report_key(report): False for report in reports}
+                
+        except Exception as e:
+            logger.error(f"Error sending report batch: {e}")
+            return {report_key(report): False for report in reports}
+
+    def _encode_batch(self, reports: List[Dict]):
+        """Serializa o lote (array JSON ou NDJSON) e comprime se vale a pena"""
+        items = [
+            {"type": report.get("type"), "id": report.get("id"), "key": report_key(report),
+             "payload": report.get("payload")}
+            for report in reports
+        ]
+        
+        headers = {**self.headers}
+        if self.batch_format == "ndjson":
+            body = "".join(json.dumps(item, default=str) + "\n" for item in items).encode()
+            headers["Content-Type"] = "application/x-ndjson"
+        else:
+            body = json.dumps(items, default=str).encode()
+        
+        if self.batch_gzip and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
         
+        return body, headers
+
+    def _parse_batch_results(self, reports: List[Dict], data: Dict) -> Dict[str, Optional[bool]]:
+        """
+        Converte o resultado por item do backend
+        
+        Cada item volta como {type, id, key, status} com status "ok", "rejected"
+        (não reenviar) ou "error" (falha transitória). Itens ausentes contam
+        como falha transitória. Backends que não devolvem `key` são casados
+        por "<type>_<id>".
+        """
+        statuses = {}
+        for item in (data.get("data") or {}).get("results", []):
+            statuses[item.get("key") or f"{item.get('type')}_{item.get('id')}"] = item.get("status")
+        
+        results = {}
+        for report in reports:
+            key = report_key(report)
+            status = statuses.get(key, statuses.get(f"{report.get('type')}_{report.get('id')}"))
+            results[key] = True if status == "ok" else None if status == "rejected" else False
+        
+        failed = sum(1 for result in results.values() if result is not True)
+        logger.info(f"Report batch delivered: {len(reports) - failed}/{len(reports)}")
         return results
 
+    async def _batch_report_individually(self, reports: List[Dict]) -> Dict[str, Optional[bool]]:
+        """
+        Envia os relatórios pelos endpoints individuais
+        
+        Relatórios de ids distintos são enviados em paralelo; os do mesmo id
+        (ex.: execução e fechamento de um trade) seguem em ordem e param na
+        primeira falha, para que a ordem seja preservada na nova tentativa.
+        """
+        results = {}
+        chains: Dict[Any, List[Dict]] = {}
+        for report in reports:
+            chains.setdefault(report.get("id"), []).append(report)
+        
+        async def send_chain(chain: List[Dict]):
+            for report in chain:
+                key = report_key(report)
+                results[key] = await self.send_report(report)
+                if results[key] is False:
+                    break
+        
+        await asyncio.gather(*(send_chain(chain) for chain in chains.values()))
+        return results
@@ -0,0 +1,379 @@
+"""
+Asynchronous Outbox for Backend Reporting
+"""
+
+import asyncio
+import json
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from integrations.backend_api import report_key
+from utils.logger import setup_logger
+from utils.metrics import time_stage, STAGE_REPORT
+
+logger = setup_logger(__name__)
+
+class BackendOutbox:
+    """
+    Fila limitada de relatórios drenada por um worker em background
+
+    O caminho de trading apenas enfileira (`enqueue` nunca bloqueia); o worker
+    acumula os relatórios de cada `flush_interval` e os envia em lote via
+    `BackendAPIClient.batch_report`, com retry e backoff exponencial. Quando a
+    fila está cheia ou o backend fica indisponível, os relatórios são gravados
+    em um spool JSONL local e reenviados quando o backend volta a responder.
+
+    Todo acesso ao spool é feito pelo worker, em thread (`asyncio.to_thread`):
+    `enqueue` só mexe em memória e é O(1), deixando o excedente em `_overflow`
+    até o worker gravá-lo.
+    """
+
+    def __init__(self, client,
+                 max_size: int = 1000,
+                 batch_size: int = 50,
+                 max_retries: int = 5,
+                 spool_path: str = "",
+                 spill_after_failures: int = 3,
+                 max_backoff: float = 30.0,
+                 flush_interval: float = 0.0):
+        self.client = client
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.spool_path = Path(spool_path) if spool_path else None
+        self.spill_after_failures = spill_after_failures
+        self.max_backoff = max_backoff
+        self.flush_interval = flush_interval
+
+        self._queue: Deque[Dict] = deque()
+        # Relatórios que chegaram com a fila cheia (ou spool pendente), a gravar no spool
+        self._overflow: Deque[Dict] = deque()
+        self._inflight: List[Dict] = []
+        # Gravação no spool em andamento: novos relatórios esperam no excedente
+        self._spilling = False
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self.task: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        # Relatórios pendentes no spool (de execuções anteriores inclusive)
+        self._spooled = self._count_spool()
+
+        self.stats = {
+            "enqueued": 0,
+            "delivered": 0,
+            "retried": 0,
+            "spilled": 0,
+            "dropped": 0
+        }
+
+    def start(self):
+        """Inicia o worker de envio"""
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info("Backend outbox started",
+                    max_size=self.max_size,
+                    spool=str(self.spool_path) if self.spool_path else None)
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Para o worker, tentando entregar o que resta dentro do `timeout`
+
+        Relatórios não entregues vão para o spool (se configurado).
+        """
+        if self.task and not self.task.done():
+            try:
+                await asyncio.wait_for(self._drained(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+        # Itens da fila são mais antigos que os do spool (vão para o início);
+        # o excedente é mais novo (vai para o fim)
+        pending = self._inflight + list(self._queue)
+        overflow = list(self._overflow)
+        self._inflight = []
+        self._queue.clear()
+        self._overflow.clear()
+        await self._spill_in_thread(pending, front=True)
+        await self._spill_in_thread(overflow)
+
+    async def _drained(self):
+        while self._queue or self._inflight:
+            await asyncio.sleep(0.05)
+
+    def enqueue(self, report: Dict) -> bool:
+        """
+        Enfileira um relatório sem bloquear (O(1), sem I/O)
+
+        Com a fila cheia, ou enquanto houver relatórios a caminho do spool (para
+        manter a ordem de entrega), o relatório fica no excedente que o worker
+        grava no spool; sem spool configurado, é descartado quando a fila está
+        cheia.
+
+        Returns:
+            True se o relatório ficou na fila em memória
+        """
+        report.setdefault("attempts", 0)
+        self.stats["enqueued"] += 1
+
+        if self.spool_path and (len(self._queue) >= self.max_size or self._spooled
+                                or self._overflow or self._spilling):
+            self._overflow.append(report)
+            self._has_items.set()
+            return False
+
+        if len(self._queue) >= self.max_size:
+            self.stats["dropped"] += 1
+            logger.warning("Backend outbox full, report dropped (no spool configured)")
+            return False
+
+        self._queue.append(report)
+        self._signal_state()
+        return True
+
+    async def put(self, report: Dict, timeout: Optional[float] = None) -> bool:
+        """
+        Enfileira aguardando espaço na fila (backpressure para produtores não críticos)
+        """
+        if len(self._queue) >= self.max_size:
+            try:
+                await asyncio.wait_for(self._has_space.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.enqueue(report)
+
+    def _signal_state(self):
+        if self._queue or self._spooled or self._overflow:
+            self._has_items.set()
+        else:
+            self._has_items.clear()
+
+        if len(self._queue) < self.max_size:
+            self._has_space.set()
+        else:
+            self._has_space.clear()
+
+    async def _run(self):
+        backoff = 0.0
+        while True:
+            try:
+                if backoff:
+                    await asyncio.sleep(backoff)
+
+                await self._flush_overflow()
+                if not self._queue:
+                    await self._load_spool()
+                if not self._queue:
+                    await self._has_items.wait()
+                    continue
+                
+                # Agrupa os relatórios de um intervalo em uma única requisição
+                if self.flush_interval and len(self._queue) < self.batch_size and not backoff:
+                    await asyncio.sleep(self.flush_interval)
+
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._inflight = batch
+                self._signal_state()
+
+                with time_stage(STAGE_REPORT):
+                    results = await self.client.batch_report(batch)
+                self._inflight = []
+                
+                failed = []
+                for report in batch:
+                    result = results.get(report_key(report), False)
+                    if result:
+                        self.stats["delivered"] += 1
+                    elif result is None:
+                        # Rejeitado pelo backend: reenviar não adianta
+                        self.stats["dropped"] += 1
+                        logger.error(f"Backend rejected report {report.get('type')} {report.get('id')}")
+                    else:
+                        failed.append(report)
+
+                if not failed:
+                    self._consecutive_failures = 0
+                    backoff = 0.0
+                    continue
+
+                backoff = min(self.max_backoff, max(0.5, backoff * 2))
+                await self._handle_failures(failed, backend_down=len(failed) == len(batch))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in backend outbox worker: {e}")
+                self._queue.extendleft(reversed(self._inflight))
+                self._inflight = []
+                backoff = min(self.max_backoff, max(0.5, backoff * 2))
+
+    async def _flush_overflow(self):
+        """
+        Tira do excedente os relatórios que chegaram com a fila cheia
+
+        Sem nada no spool, o que couber volta direto para a fila (a ordem é
+        preservada, pois a fila só tem itens mais antigos); o resto é anexado
+        ao spool em thread.
+        """
+        if not self._overflow:
+            return
+
+        while self._overflow and not self._spooled and len(self._queue) < self.max_size:
+            self._queue.append(self._overflow.popleft())
+
+        if self._overflow:
+            reports = list(self._overflow)
+            self._overflow.clear()
+            await self._spill_in_thread(reports)
+        self._signal_state()
+
+    async def _handle_failures(self, failed: List[Dict], backend_down: bool):
+        """
+        Recoloca as falhas na frente da fila
+
+        Falha parcial (backend respondendo) conta tentativas por relatório e
+        descarta os que excedem `max_retries`. Falha total conta
+        como indisponibilidade do backend; após `spill_after_failures` lotes
+        seguidos, o restante da fila vai para o spool e apenas o lote com falha
+        fica em memória, servindo de sonda.
+        """
+        retry = failed
+        if backend_down:
+            self._consecutive_failures += 1
+        else:
+            self._consecutive_failures = 0
+            retry = []
+            for report in failed:
+                report["attempts"] = report.get("attempts", 0) + 1
+                if report["attempts"] > self.max_retries:
+                    logger.error(f"Backend report {report.get('type')} {report.get('id')} dropped after "
+                                 f"{self.max_retries} retries")
+                    self.stats["dropped"] += 1
+                else:
+                    retry.append(report)
+
+        if (backend_down and self.spool_path
+                and self._consecutive_failures >= self.spill_after_failures and self._queue):
+            # Itens na fila são mais antigos que os do spool: vão para o início
+            pending = list(self._queue)
+            self._queue.clear()
+            await self._spill_in_thread(pending, front=True)
+
+        self.stats["retried"] += len(retry)
+        self._queue.extendleft(reversed(retry))
+        self._signal_state()
+
+    async def _spill_in_thread(self, reports: List[Dict], front: bool = False):
+        """Grava no spool fora do event loop"""
+        self._spilling = True
+        try:
+            await asyncio.to_thread(self._spill, reports, front)
+        finally:
+            self._spilling = False
+
+    def _spill(self, reports: List[Dict], front: bool = False):
+        """
+        Grava relatórios no spool JSONL (ou descarta se não houver spool)
+
+        I/O síncrono: chamado apenas pelo worker (ou por `stop`) via
+        `_spill_in_thread`. `front=True` insere antes do conteúdo existente,
+        preservando a ordem quando os relatórios são mais antigos que os já
+        gravados.
+        """
+        if not reports:
+            return
+
+        if not self.spool_path:
+            self.stats["dropped"] += len(reports)
+            logger.warning(f"Backend outbox dropped {len(reports)} reports (no spool configured)")
+            return
+
+        try:
+            lines = [json.dumps(report, default=str) + "\n" for report in reports]
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+
+            if front and self._spooled:
+                with open(self.spool_path) as spool:
+                    lines.extend(spool)
+                self._write_spool(lines)
+            else:
+                with open(self.spool_path, "a") as spool:
+                    spool.writelines(lines)
+
+            self._spooled += len(reports)
+            self.stats["spilled"] += len(reports)
+        except Exception as e:
+            self.stats["dropped"] += len(reports)
+            logger.error(f"Error writing backend outbox spool: {e}")
+
+    def _write_spool(self, lines: List[str]):
+        """Regrava o spool de forma atômica"""
+        tmp_path = self.spool_path.with_suffix(self.spool_path.suffix + ".tmp")
+        with open(tmp_path, "w") as spool:
+            spool.writelines(lines)
+        tmp_path.replace(self.spool_path)
+
+    def _count_spool(self) -> int:
+        if not self.spool_path or not self.spool_path.exists():
+            return 0
+        with open(self.spool_path) as spool:
+            return sum(1 for line in spool if line.strip())
+
+    async def _load_spool(self):
+        """Traz de volta para a fila até `max_size` relatórios do spool"""
+        if not self._spooled or not self.spool_path:
+            return
+
+        reports = await asyncio.to_thread(self._read_spool, self.max_size - len(self._queue))
+        if reports:
+            logger.info(f"Replaying {len(reports)} spooled backend reports")
+            self._queue.extend(reports)
+        self._signal_state()
+
+    def _read_spool(self, limit: int) -> List[Dict]:
+        """Lê até `limit` relatórios e regrava o restante no spool"""
+        if limit <= 0:
+            return []
+
+        if not self.spool_path.exists():
+            self._spooled = 0
+            return []
+
+        with open(self.spool_path) as spool:
+            lines = [line for line in spool if line.strip()]
+
+        head, rest = lines[:limit], lines[limit:]
+        if rest:
+            self._write_spool(rest)
+        else:
+            self.spool_path.unlink()
+        self._spooled = len(rest)
+
+        reports = []
+        for line in head:
+            try:
+                reports.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.error("Discarding corrupt backend outbox spool line")
+        return reports
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "queued": len(self._queue),
+            "overflow": len(self._overflow),
+            "spooled": self._spooled,
+            "consecutive_failures": self._consecutive_failures,
+            "running": self.task is not None and not self.task.done()
+        }
+
+    def __len__(self) -> int:
+        return len(self._queue)
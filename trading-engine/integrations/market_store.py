@@ -0,0 +1,152 @@
+"""
+Persistent Market Data Store for Warm Restarts
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class MarketDataStore:
+    """
+    Armazena em SQLite os últimos snapshots de preço e o histórico recente
+
+    Permite que o engine reinicie com cache e histórico da estratégia já
+    populados, em vez de esperar `lookback_period` ticks para operar.
+    """
+
+    def __init__(self, path: str, history_limit: int = 50):
+        self.path = Path(path)
+        self.history_limit = history_limit
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._appends_since_prune = 0
+
+    def open(self):
+        """Abre (ou cria) o banco de dados"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                token_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                token_id TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                price REAL NOT NULL,
+                volume REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_token_ts ON history (token_id, ts);
+        """)
+        self._conn.commit()
+        logger.info("Market data store opened", path=str(self.path))
+
+    def close(self):
+        """Fecha o banco de dados"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def save_snapshots(self, snapshots: Dict[str, Dict], updated_at: Dict[str, datetime]):
+        """Grava (upsert) o último snapshot de cada token"""
+        rows = [
+            (token_id, json.dumps(data, default=str),
+             updated_at.get(token_id, datetime.now()).isoformat())
+            for token_id, data in snapshots.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO snapshots (token_id, data, updated_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def load_snapshots(self) -> Tuple[Dict[str, Dict], Dict[str, datetime]]:
+        """Carrega snapshots e seus horários de atualização"""
+        with self._lock:
+            rows = self._conn.execute("SELECT token_id, data, updated_at FROM snapshots").fetchall()
+
+        snapshots = {}
+        updated_at = {}
+        for token_id, data, ts in rows:
+            snapshots[token_id] = json.loads(data)
+            updated_at[token_id] = datetime.fromisoformat(ts)
+
+        return snapshots, updated_at
+
+    def append_history(self, points: Iterable[Tuple[str, float, float]], ts: Optional[datetime] = None):
+        """
+        Adiciona um ponto (preço, volume) por token
+
+        O excedente além de `history_limit` pontos por token é descartado a
+        cada `history_limit` chamadas, amortizando o custo da limpeza.
+        """
+        ts = (ts or datetime.now()).isoformat()
+        rows = [(token_id, ts, price, volume) for token_id, price, volume in points]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO history (token_id, ts, price, volume) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._appends_since_prune += 1
+            if self._appends_since_prune >= self.history_limit:
+                self._prune_history()
+                self._appends_since_prune = 0
+            self._conn.commit()
+
+    def _prune_history(self):
+        """Mantém apenas os últimos `history_limit` pontos por token"""
+        self._conn.execute("""
+            DELETE FROM history WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, ROW_NUMBER() OVER (
+                        PARTITION BY token_id ORDER BY ts DESC, rowid DESC
+                    ) AS rn FROM history
+                ) WHERE rn > ?
+            )
+        """, (self.history_limit,))
+
+    def load_history(self, max_age: Optional[timedelta] = None) -> Dict[str, Tuple[List[float], List[float]]]:
+        """Carrega o histórico recente em ordem cronológica por token"""
+        query = "SELECT token_id, price, volume FROM history"
+        params: tuple = ()
+        if max_age is not None:
+            query += " WHERE ts >= ?"
+            params = ((datetime.now() - max_age).isoformat(),)
+        query += " ORDER BY token_id, ts, rowid"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        history: Dict[str, Tuple[List[float], List[float]]] = {}
+        for token_id, price, volume in rows:
+            prices, volumes = history.setdefault(token_id, ([], []))
+            prices.append(price)
+            volumes.append(volume)
+
+        return {
+            token_id: (prices[-self.history_limit:], volumes[-self.history_limit:])
+            for token_id, (prices, volumes) in history.items()
+        }
+
+    # Versões assíncronas: o I/O de disco roda fora do event loop
+
+    async def save_snapshots_async(self, snapshots: Dict[str, Dict], updated_at: Dict[str, datetime]):
+        await asyncio.to_thread(self.save_snapshots, snapshots, updated_at)
+
+    async def append_history_async(self, points: List[Tuple[str, float, float]], ts: Optional[datetime] = None):
+        await asyncio.to_thread(self.append_history, points, ts)
@@ -10,6 +10,7 @@ from datetime import datetime
 
 from config.settings import TradingSettings
 from utils.logger import setup_logger, TradingLogger
+from utils.metrics import time_stage, STAGE_QUOTE, STAGE_SWAP
 
 logger = setup_logger(__name__)
 trading_logger = TradingLogger(__name__)
@@ -96,13 +97,15 @@ class OneInchClient:
         """
         try:
             # Primeiro obtém a cotação
-            quote = await self.get_quote(from_token, to_token, amount)
+            with time_stage(STAGE_QUOTE):
+                quote = await self.get_quote(from_token, to_token, amount)
             if not quote:
                 return {"success": False, "error": "Failed to get quote"}
             
             # Para desenvolvimento, simula execução
             # Em produção, executaria transação real na blockchain
-            simulated_result = self._simulate_swap_execution(quote, from_token, to_token, amount)
+            with time_stage(STAGE_SWAP):
+                simulated_result = self._simulate_swap_execution(quote, from_token, to_token, amount)
             
             # Log da execução
             trading_logger.trade_execution(
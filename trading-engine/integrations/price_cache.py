@@ -0,0 +1,142 @@
+"""
+Stale-While-Revalidate Support for Price Data Caches
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_MODE_BLOCKING = "blocking"
+CACHE_MODE_SWR = "swr"
+
+def with_cache_age(entry: Dict, updated_at: Optional[datetime]) -> Dict:
+    """
+    Retorna uma cópia da entrada do cache com sua idade em segundos
+    """
+    age = (datetime.now() - updated_at).total_seconds() if updated_at else None
+    return {**entry, "cache_age": age}
+
+def get_cached(cache: Dict[str, Dict], last_update: Dict[str, datetime], key: str,
+               ttl: float, max_stale: float, serve_stale: bool) -> Optional[Dict]:
+    """
+    Retorna a entrada do cache se puder ser servida sem bloquear
+
+    Sem `serve_stale` (modo blocking, ou refresher parado) só entradas dentro
+    do TTL são servidas. Com `serve_stale` (modo swr com o refresher ativo) a
+    entrada é servida após o TTL, até `max_stale` segundos de idade, e carrega
+    sua idade em `cache_age`. Em ambos os casos None indica que o chamador
+    deve buscar o dado de forma síncrona.
+    """
+    if key not in cache or key not in last_update:
+        return None
+
+    updated_at = last_update[key]
+    age = (datetime.now() - updated_at).total_seconds()
+    if not serve_stale:
+        return cache[key] if age < ttl else None
+    if age >= max_stale:
+        return None
+    return with_cache_age(cache[key], updated_at)
+
+class BackgroundCacheRefresher:
+    """
+    Task assíncrona que atualiza entradas do cache antes do TTL expirar
+
+    Acorda quando a entrada mais antiga atinge `ttl * refresh_ahead_ratio` e
+    atualiza em lote todas as que já passaram desse ponto, mantendo a latência
+    de rede fora do caminho de leitura.
+    """
+
+    def __init__(self, name: str,
+                 last_update: Dict[str, datetime],
+                 keys: Callable[[], Iterable[str]],
+                 refresh: Callable[[List[str]], Awaitable],
+                 ttl: float,
+                 refresh_ahead_ratio: float = 0.8,
+                 min_interval: float = 0.5):
+        self.name = name
+        self.last_update = last_update
+        self.keys = keys
+        self.refresh = refresh
+        self.refresh_after = ttl * refresh_ahead_ratio
+        self.min_interval = min_interval
+        self.task: Optional[asyncio.Task] = None
+        self.refresh_count = 0
+        self._retry_at: Dict[str, datetime] = {}
+
+    def start(self):
+        """Inicia a task de atualização em background"""
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"Background cache refresher started for {self.name}",
+                    refresh_after=self.refresh_after)
+
+    async def stop(self):
+        """Para a task de atualização"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def _run(self):
+        while True:
+            try:
+                due = self._due_keys()
+                if due:
+                    previous = {key: self.last_update.get(key) for key in due}
+                    await self.refresh(due)
+                    self.refresh_count += 1
+                    
+                    # Chaves que não foram atualizadas esperam um ciclo antes de nova tentativa
+                    retry_at = datetime.now() + timedelta(seconds=self.refresh_after)
+                    for key, updated_at in previous.items():
+                        if self.last_update.get(key) == updated_at:
+                            self._retry_at[key] = retry_at
+            except Exception as e:
+                logger.error(f"Error refreshing {self.name} cache: {e}")
+
+            await asyncio.sleep(self._next_wakeup())
+
+    def _next_due(self, key: str) -> Optional[datetime]:
+        """Momento em que a chave deve ser atualizada (None = imediatamente)"""
+        updated_at = self.last_update.get(key)
+        due_at = updated_at + timedelta(seconds=self.refresh_after) if updated_at else None
+
+        retry_at = self._retry_at.get(key)
+        if retry_at and (due_at is None or retry_at > due_at):
+            return retry_at
+        return due_at
+
+    def _due_keys(self) -> List[str]:
+        """Chaves ausentes ou com idade acima do limiar de atualização"""
+        now = datetime.now()
+        due = []
+        for key in self.keys():
+            due_at = self._next_due(key)
+            if due_at is None or due_at <= now:
+                due.append(key)
+        return due
+
+    def _next_wakeup(self) -> float:
+        """Segundos até a próxima chave atingir o limiar de atualização"""
+        now = datetime.now()
+        wakeup = self.refresh_after
+
+        for key in self.keys():
+            due_at = self._next_due(key)
+            if due_at is None:
+                return self.min_interval
+            wakeup = min(wakeup, (due_at - now).total_seconds())
+
+        return max(self.min_interval, wakeup)
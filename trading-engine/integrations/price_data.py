@@ -4,12 +4,15 @@ Price Data Client for Market Analysis
 
 import aiohttp
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 import json
 from datetime import datetime, timedelta
 import random
 
 from config.settings import TradingSettings
+from integrations.price_cache import BackgroundCacheRefresher, CACHE_MODE_SWR, get_cached, with_cache_age
+from integrations.rate_limiter import get_coingecko_rate_limiter
+from utils.concurrency import gather_bounded
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -24,10 +27,16 @@ class PriceDataClient:
         self.coingecko_url = settings.coingecko_api_url
         self.session: Optional[aiohttp.ClientSession] = None
         
+        # Limitador compartilhado com os demais clientes CoinGecko do processo
+        self.rate_limiter = get_coingecko_rate_limiter(settings)
+        
         # Cache de dados
         self.price_cache: Dict[str, Dict] = {}
         self.last_update: Dict[str, datetime] = {}
         
+        # Requisições em voo por token (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
         # Tokens para monitoramento (top altcoins para altseason)
         self.monitored_tokens = [
             "ethereum", "cardano", "solana", "polkadot", "chainlink",
@@ -35,20 +44,45 @@ class PriceDataClient:
             "maker", "the-graph", "synthetix", "yearn-finance", "1inch"
         ]
         
+        # Atualização em background (modo stale-while-revalidate)
+        self.cache_mode = settings.price_cache_mode
+        self.cache_refresher = BackgroundCacheRefresher(
+            "coingecko_markets",
+            self.last_update,
+            keys=lambda: set(self.monitored_tokens) | self.price_cache.keys(),
+            refresh=self._refresh_tokens,
+            ttl=settings.price_update_interval,
+            refresh_ahead_ratio=settings.price_refresh_ahead_ratio
+        )
+        
         logger.info("Price Data Client initialized", 
-                   tokens_count=len(self.monitored_tokens))
+                   tokens_count=len(self.monitored_tokens),
+                   cache_mode=self.cache_mode)
 
     async def initialize(self, session: aiohttp.ClientSession):
         """Inicializa o cliente com sessão HTTP"""
         self.session = session
         logger.info("Price Data Client session initialized")
 
+    def start_background_refresh(self):
+        """Inicia a atualização do cache em background (apenas no modo swr)"""
+        if self.cache_mode == CACHE_MODE_SWR:
+            self.cache_refresher.start()
+
+    async def stop_background_refresh(self):
+        """Para a atualização do cache em background"""
+        await self.cache_refresher.stop()
+
+    async def _refresh_tokens(self, token_ids: List[str]):
+        """Busca novamente os tokens informados ignorando o cache"""
+        await self._get_market_data_batched(token_ids, use_cache=False)
+
     async def health_check(self) -> bool:
         """Verifica se a API está funcionando"""
         try:
             url = f"{self.coingecko_url}/ping"
-            async with self.session.get(url) as response:
-                return response.status == 200
+            status, _ = await self._get_json(url)
+            return status == 200
         except Exception as e:
             logger.error(f"Price data health check failed: {e}")
             return False
@@ -58,13 +92,10 @@ class PriceDataClient:
         Obtém dados de mercado para todos os tokens monitorados
         """
         try:
-            market_data = {}
-            
-            # Obtém dados para cada token
-            for token_id in self.monitored_tokens:
-                token_data = await self.get_token_data(token_id)
-                if token_data:
-                    market_data[token_id] = token_data
+            if self.settings.market_data_batch_mode:
+                market_data = await self._get_market_data_batched(self.monitored_tokens)
+            else:
+                market_data = await self.get_tokens_data(self.monitored_tokens)
             
             logger.info(f"Market data retrieved for {len(market_data)} tokens")
             return market_data
@@ -73,16 +104,194 @@ class PriceDataClient:
             logger.error(f"Error getting market data: {e}")
             return {}
 
+    async def _get_market_data_batched(self, token_ids: List[str],
+                                       use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Obtém dados de mercado em lote via /coins/markets
+
+        O universo é dividido em páginas de até `market_data_batch_size` ids,
+        de modo que a latência depende do número de páginas e não de tokens.
+
+        Uma página que falha por inteiro (429, timeout, 5xx) não é refeita token
+        a token, o que multiplicaria as requisições justamente quando a API está
+        sob pressão: os tokens dela recebem o último dado do cache (com
+        `cache_age`) e a página é tentada de novo no próximo ciclo. Só ids
+        ausentes de uma página bem-sucedida usam o endpoint individual.
+        """
+        market_data = {}
+        tokens_to_fetch = []
+        
+        # Verifica cache primeiro
+        for token_id in token_ids:
+            cached = self._get_cached(token_id) if use_cache else None
+            if cached is not None:
+                market_data[token_id] = cached
+            else:
+                tokens_to_fetch.append(token_id)
+        
+        if not tokens_to_fetch:
+            return market_data
+        
+        # Tokens já em voo (ex.: loop de monitoramento) são aguardados, não re-buscados
+        shared = {
+            token_id: self._inflight[token_id]
+            for token_id in tokens_to_fetch if token_id in self._inflight
+        }
+        tokens_to_fetch = [token_id for token_id in tokens_to_fetch if token_id not in shared]
+        
+        # Registra os tokens do lote para que chamadores concorrentes aguardem esta busca
+        loop = asyncio.get_running_loop()
+        claims = {}
+        for token_id in tokens_to_fetch:
+            claims[token_id] = loop.create_future()
+            self._inflight[token_id] = claims[token_id]
+        
+        try:
+            batch_size = self.settings.market_data_batch_size
+            pages = [
+                tokens_to_fetch[i:i + batch_size]
+                for i in range(0, len(tokens_to_fetch), batch_size)
+            ]
+            
+            results = await asyncio.gather(
+                *(self._fetch_markets_page(page) for page in pages),
+                return_exceptions=True
+            )
+            
+            missing_tokens = []
+            for page, result in zip(pages, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error fetching markets page: {result}")
+                    result = None
+                
+                if result is None:
+                    market_data.update(self._get_stale(page))
+                    continue
+                
+                market_data.update(result)
+                for token_id in page:
+                    if token_id in result:
+                        self._release_claim(token_id, claims.pop(token_id), result[token_id])
+                    else:
+                        missing_tokens.append(token_id)
+            
+            # Tokens ausentes de uma página bem-sucedida usam o endpoint individual
+            if missing_tokens:
+                for token_id in missing_tokens:
+                    if self._inflight.get(token_id) is claims[token_id]:
+                        del self._inflight[token_id]
+                market_data.update(await self.get_tokens_data(missing_tokens))
+            
+            if shared:
+                shared_results = await asyncio.gather(
+                    *(asyncio.shield(future) for future in shared.values()),
+                    return_exceptions=True
+                )
+                for token_id, result in zip(shared, shared_results):
+                    if result and not isinstance(result, Exception):
+                        market_data[token_id] = result
+        finally:
+            for token_id, claim in claims.items():
+                self._release_claim(token_id, claim, market_data.get(token_id))
+        
+        return market_data
+
+    def _release_claim(self, token_id: str, claim: asyncio.Future, result: Optional[Dict]):
+        """
+        Resolve uma requisição em voo registrada pelo lote e remove do registro
+        """
+        if self._inflight.get(token_id) is claim:
+            del self._inflight[token_id]
+        if not claim.done():
+            claim.set_result(result)
+
+    async def _single_flight(self, token_id: str, fetch) -> Optional[Dict]:
+        """
+        Compartilha uma única requisição pendente entre chamadores concorrentes do mesmo token
+        """
+        pending = self._inflight.get(token_id)
+        if pending is None:
+            pending = asyncio.ensure_future(fetch())
+            self._inflight[token_id] = pending
+            
+            def _unregister(future, token_id=token_id):
+                if self._inflight.get(token_id) is future:
+                    del self._inflight[token_id]
+            
+            pending.add_done_callback(_unregister)
+        
+        # shield: o cancelamento de um chamador (ex.: timeout) não cancela os demais
+        return await asyncio.shield(pending)
+
+    async def get_tokens_data(self, token_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtém dados de vários tokens em paralelo, com concorrência limitada
+        """
+        return await gather_bounded(
+            token_ids,
+            self.get_token_data,
+            limit=self.settings.price_fetch_concurrency
+        )
+
+    async def _fetch_markets_page(self, token_ids: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Busca uma página de /coins/markets e atualiza o cache
+
+        Returns:
+            Dados por token, ou None se a página falhou
+        """
+        url = f"{self.coingecko_url}/coins/markets"
+        params = {
+            "vs_currency": "usd",
+            "ids": ",".join(token_ids),
+            "per_page": str(len(token_ids)),
+            "page": "1",
+            "sparkline": "true",
+            "price_change_percentage": "7d"
+        }
+        
+        status, data = await self._get_json(url, params)
+        if status != 200:
+            logger.error(f"Failed to get markets page ({len(token_ids)} tokens): {status}")
+            return None
+        
+        page_data = {}
+        now = datetime.now()
+        
+        for entry in data:
+            processed_data = self._process_market_entry(entry)
+            token_id = processed_data.get("id")
+            if not token_id:
+                continue
+            
+            # Atualiza cache
+            self.price_cache[token_id] = processed_data
+            self.last_update[token_id] = now
+            page_data[token_id] = processed_data
+        
+        return page_data
+
     async def get_token_data(self, token_id: str) -> Optional[Dict]:
         """
         Obtém dados detalhados de um token específico
         """
         try:
             # Verifica cache
-            if self._is_cache_valid(token_id):
-                return self.price_cache[token_id]
+            cached = self._get_cached(token_id)
+            if cached is not None:
+                return cached
             
-            # Busca dados da API
+            return await self._single_flight(token_id, lambda: self._fetch_token_data(token_id))
+            
+        except Exception as e:
+            logger.error(f"Error getting token data for {token_id}: {e}")
+            return self._get_simulated_data(token_id)
+
+    async def _fetch_token_data(self, token_id: str) -> Optional[Dict]:
+        """
+        Busca dados de um token na API e atualiza o cache
+        """
+        try:
             url = f"{self.coingecko_url}/coins/{token_id}"
             params = {
                 "localization": "false",
@@ -93,19 +302,28 @@ class PriceDataClient:
                 "sparkline": "true"
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    processed_data = self._process_token_data(data)
-                    
-                    # Atualiza cache
-                    self.price_cache[token_id] = processed_data
-                    self.last_update[token_id] = datetime.now()
-                    
-                    return processed_data
-                else:
-                    logger.error(f"Failed to get data for {token_id}: {response.status}")
-                    return self._get_simulated_data(token_id)
+            status, data = await self._get_json(url, params)
+            
+            if status == 200:
+                processed_data = self._process_token_data(data)
+                
+                # Atualiza cache
+                self.price_cache[token_id] = processed_data
+                self.last_update[token_id] = datetime.now()
+                
+                return processed_data
+            elif status == 429 and token_id in self.price_cache:
+                # Limite esgotado: prefere o último dado real a dados simulados
+                logger.warning(f"Rate limited for {token_id}, serving cached data")
+                return self.price_cache[token_id]
+            else:
+                logger.error(f"Failed to get data for {token_id}: {status}")
+                return self._get_simulated_data(token_id)
+        
+        except asyncio.TimeoutError:
+            # Timeout da requisição: usa o último dado real, se houver
+            logger.warning(f"Request timed out for {token_id}")
+            return self.price_cache.get(token_id)
                     
         except Exception as e:
             logger.error(f"Error getting token data for {token_id}: {e}")
@@ -128,6 +346,42 @@ class PriceDataClient:
             logger.error(f"Error getting current price for {symbol}: {e}")
             return None
 
+    async def get_current_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """
+        Obtém preços atuais de vários símbolos em uma única consulta
+
+        Os símbolos são mapeados para ids do CoinGecko e buscados juntos (cache,
+        /coins/markets em lote ou requisições paralelas limitadas), de modo que o
+        custo não cresce em round trips com o número de símbolos.
+        """
+        try:
+            symbol_ids = {}
+            for symbol in set(symbols):
+                token_id = self._symbol_to_id(symbol)
+                if token_id:
+                    symbol_ids[symbol] = token_id
+            
+            if not symbol_ids:
+                return {}
+            
+            token_ids = list(dict.fromkeys(symbol_ids.values()))
+            if self.settings.market_data_batch_mode:
+                tokens_data = await self._get_market_data_batched(token_ids)
+            else:
+                tokens_data = await self.get_tokens_data(token_ids)
+            
+            prices = {}
+            for symbol, token_id in symbol_ids.items():
+                price = tokens_data.get(token_id, {}).get("price")
+                if price is not None:
+                    prices[symbol] = price
+            
+            return prices
+            
+        except Exception as e:
+            logger.error(f"Error getting current prices: {e}")
+            return {}
+
     async def get_price_history(self, token_id: str, days: int = 7) -> List[Dict]:
         """
         Obtém histórico de preços
@@ -140,18 +394,28 @@ class PriceDataClient:
                 "interval": "hourly" if days <= 7 else "daily"
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._process_price_history(data)
-                else:
-                    logger.error(f"Failed to get price history for {token_id}")
-                    return self._get_simulated_history(token_id, days)
+            status, data = await self._get_json(url, params)
+            
+            if status == 200:
+                return self._process_price_history(data)
+            else:
+                logger.error(f"Failed to get price history for {token_id}")
+                return self._get_simulated_history(token_id, days)
                     
         except Exception as e:
             logger.error(f"Error getting price history: {e}")
             return self._get_simulated_history(token_id, days)
 
+    async def get_price_histories(self, token_ids: List[str], days: int = 7) -> Dict[str, List[Dict]]:
+        """
+        Obtém históricos de preços de vários tokens em paralelo
+        """
+        return await gather_bounded(
+            token_ids,
+            lambda token_id: self.get_price_history(token_id, days),
+            limit=self.settings.price_fetch_concurrency
+        )
+
     async def get_trending_tokens(self) -> List[Dict]:
         """
         Obtém tokens em tendência
@@ -159,13 +423,13 @@ class PriceDataClient:
         try:
             url = f"{self.coingecko_url}/search/trending"
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._process_trending_data(data)
-                else:
-                    logger.error("Failed to get trending tokens")
-                    return []
+            status, data = await self._get_json(url)
+            
+            if status == 200:
+                return self._process_trending_data(data)
+            else:
+                logger.error("Failed to get trending tokens")
+                return []
                     
         except Exception as e:
             logger.error(f"Error getting trending tokens: {e}")
@@ -178,18 +442,36 @@ class PriceDataClient:
         try:
             url = f"{self.coingecko_url}/global"
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._process_market_overview(data)
-                else:
-                    logger.error("Failed to get market overview")
-                    return self._get_simulated_market_overview()
+            status, data = await self._get_json(url)
+            
+            if status == 200:
+                return self._process_market_overview(data)
+            else:
+                logger.error("Failed to get market overview")
+                return self._get_simulated_market_overview()
                     
         except Exception as e:
             logger.error(f"Error getting market overview: {e}")
             return self._get_simulated_market_overview()
 
+    async def _get_json(self, url: str, params: Optional[Dict] = None):
+        """
+        GET na API do CoinGecko através do limitador de taxa compartilhado
+
+        O timeout cobre só a requisição HTTP, não a espera pelo orçamento.
+        """
+        return await self.rate_limiter.get_json(
+            self.session, url, params,
+            max_retries=self.settings.coingecko_max_retries,
+            timeout=self.settings.price_request_timeout
+        )
+
+    def get_rate_limit_stats(self) -> Dict:
+        """
+        Retorna contadores de throughput do limitador do CoinGecko
+        """
+        return self.rate_limiter.get_stats()
+
     def _process_token_data(self, raw_data: Dict) -> Dict:
         """
         Processa dados brutos do token
@@ -218,6 +500,32 @@ class PriceDataClient:
             logger.error(f"Error processing token data: {e}")
             return {}
 
+    def _process_market_entry(self, raw_entry: Dict) -> Dict:
+        """
+        Processa uma entrada de /coins/markets no mesmo formato de _process_token_data
+        """
+        try:
+            return {
+                "id": raw_entry.get("id"),
+                "symbol": (raw_entry.get("symbol") or "").upper(),
+                "name": raw_entry.get("name"),
+                "price": raw_entry.get("current_price", 0),
+                "market_cap": raw_entry.get("market_cap", 0),
+                "volume_24h": raw_entry.get("total_volume", 0),
+                "price_change_24h": raw_entry.get("price_change_percentage_24h", 0),
+                "price_change_7d": raw_entry.get("price_change_percentage_7d_in_currency", 0),
+                "market_cap_rank": raw_entry.get("market_cap_rank", 0),
+                "circulating_supply": raw_entry.get("circulating_supply", 0),
+                "total_supply": raw_entry.get("total_supply", 0),
+                "ath": raw_entry.get("ath", 0),
+                "atl": raw_entry.get("atl", 0),
+                "sparkline": (raw_entry.get("sparkline_in_7d") or {}).get("price", []),
+                "last_updated": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Error processing market entry: {e}")
+            return {}
+
     def _process_price_history(self, raw_data: Dict) -> List[Dict]:
         """
         Processa histórico de preços
@@ -283,15 +591,25 @@ class PriceDataClient:
             logger.error(f"Error processing market overview: {e}")
             return {}
 
-    def _is_cache_valid(self, token_id: str) -> bool:
+    def _get_cached(self, token_id: str) -> Optional[Dict]:
         """
-        Verifica se o cache é válido
+        Retorna a entrada do cache se puder ser servida sem bloquear (TTL = intervalo de atualização)
         """
-        if token_id not in self.price_cache or token_id not in self.last_update:
-            return False
-        
-        cache_age = datetime.now() - self.last_update[token_id]
-        return cache_age.total_seconds() < self.settings.price_update_interval
+        return get_cached(
+            self.price_cache, self.last_update, token_id,
+            ttl=self.settings.price_update_interval,
+            max_stale=self.settings.price_cache_max_stale,
+            serve_stale=self.cache_mode == CACHE_MODE_SWR and self.cache_refresher.is_running()
+        )
+
+    def _get_stale(self, token_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Últimos dados conhecidos dos tokens, independente do TTL, com `cache_age`
+        """
+        return {
+            token_id: with_cache_age(self.price_cache[token_id], self.last_update.get(token_id))
+            for token_id in token_ids if token_id in self.price_cache
+        }
 
     def _symbol_to_id(self, symbol: str) -> Optional[str]:
         """
@@ -9,6 +9,9 @@ import json
 from datetime import datetime, timedelta
 import logging
 
+from integrations.price_cache import BackgroundCacheRefresher, CACHE_MODE_SWR, get_cached
+from integrations.rate_limiter import DEFAULT_MAX_RETRIES, get_coingecko_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class RealPriceDataClient:
@@ -20,6 +23,11 @@ class RealPriceDataClient:
         self.coingecko_url = "https://api.coingecko.com/api/v3"
         self.session: Optional[aiohttp.ClientSession] = None
         
+        # Limitador compartilhado com os demais clientes CoinGecko do processo
+        self.rate_limiter = get_coingecko_rate_limiter(settings)
+        self.max_retries = getattr(settings, "coingecko_max_retries", DEFAULT_MAX_RETRIES)
+        self.request_timeout = getattr(settings, "price_request_timeout", None)
+        
         # Cache de dados com TTL de 60 segundos (rate limit da API gratuita)
         self.price_cache: Dict[str, Dict] = {}
         self.last_update: Dict[str, datetime] = {}
@@ -51,6 +59,18 @@ class RealPriceDataClient:
             "1INCH": "1inch"
         }
         
+        # Atualização em background (modo stale-while-revalidate)
+        self.cache_mode = getattr(settings, "price_cache_mode", "blocking")
+        self.cache_max_stale = max(getattr(settings, "price_cache_max_stale", 0), self.cache_ttl * 2)
+        self.cache_refresher = BackgroundCacheRefresher(
+            "coingecko_simple_price",
+            self.last_update,
+            keys=lambda: set(self.monitored_tokens) | self.price_cache.keys(),
+            refresh=lambda token_ids: self.get_real_prices(token_ids, use_cache=False),
+            ttl=self.cache_ttl,
+            refresh_ahead_ratio=getattr(settings, "price_refresh_ahead_ratio", 0.8)
+        )
+        
         logger.info(f"Real Price Data Client initialized with {len(self.monitored_tokens)} tokens")
 
     async def initialize(self, session: aiohttp.ClientSession):
@@ -62,30 +82,41 @@ class RealPriceDataClient:
         """Verifica se a API está funcionando"""
         try:
             url = f"{self.coingecko_url}/ping"
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get("gecko_says") == "(V3) To the Moon!"
-                return False
+            status, data = await self._get_json(url)
+            if status == 200:
+                return data.get("gecko_says") == "(V3) To the Moon!"
+            return False
         except Exception as e:
             logger.error(f"Price data health check failed: {e}")
             return False
 
-    async def get_real_prices(self, token_ids: List[str] = None) -> Dict[str, Dict]:
+    def start_background_refresh(self):
+        """Inicia a atualização do cache em background (apenas no modo swr)"""
+        if self.cache_mode == CACHE_MODE_SWR:
+            self.cache_refresher.start()
+
+    async def stop_background_refresh(self):
+        """Para a atualização do cache em background"""
+        await self.cache_refresher.stop()
+
+    async def get_real_prices(self, token_ids: List[str] = None,
+                              use_cache: bool = True) -> Dict[str, Dict]:
         """
         Obtém preços reais para uma lista de tokens
         """
         if not token_ids:
             token_ids = self.monitored_tokens
-            
+        
+        cached_data = {}
+        
         try:
             # Verifica cache primeiro
-            cached_data = {}
             tokens_to_fetch = []
             
             for token_id in token_ids:
-                if self._is_cache_valid(token_id):
-                    cached_data[token_id] = self.price_cache[token_id]
+                cached = self._get_cached(token_id) if use_cache else None
+                if cached is not None:
+                    cached_data[token_id] = cached
                 else:
                     tokens_to_fetch.append(token_id)
             
@@ -105,26 +136,37 @@ class RealPriceDataClient:
                 "include_last_updated_at": "true"
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    api_data = await response.json()
-                    
-                    # Processa e armazena em cache
-                    for token_id, data in api_data.items():
-                        processed_data = self._process_price_data(token_id, data)
-                        self.price_cache[token_id] = processed_data
-                        self.last_update[token_id] = datetime.now()
-                        cached_data[token_id] = processed_data
-                    
-                    logger.info(f"Fetched real prices for {len(api_data)} tokens")
-                    return cached_data
-                    
-                elif response.status == 429:
-                    logger.warning("Rate limit exceeded, using cached data")
-                    return cached_data
-                else:
-                    logger.error(f"API error: {response.status}")
-                    return cached_data
+            status, api_data = await self._get_json(url, params)
+            
+            if status == 200:
+                # Processa e armazena em cache
+                for token_id, data in api_data.items():
+                    processed_data = self._process_price_data(token_id, data)
+                    self.price_cache[token_id] = processed_data
+                    self.last_update[token_id] = datetime.now()
+                    cached_data[token_id] = processed_data
+                
+                logger.info(f"Fetched real prices for {len(api_data)} tokens")
+                return cached_data
+                
+            elif status == 429:
+                # Retries esgotados: devolve também entradas expiradas do cache
+                logger.warning("Rate limit exceeded, using cached data")
+                for token_id in tokens_to_fetch:
+                    if token_id in self.price_cache:
+                        cached_data[token_id] = self.price_cache[token_id]
+                return cached_data
+            else:
+                logger.error(f"API error: {status}")
+                return cached_data
+        
+        except asyncio.TimeoutError:
+            # Timeout da requisição: devolve também entradas expiradas do cache
+            logger.warning("Price request timed out, using cached data")
+            for token_id in tokens_to_fetch:
+                if token_id in self.price_cache:
+                    cached_data[token_id] = self.price_cache[token_id]
+            return cached_data
                     
         except Exception as e:
             logger.error(f"Error getting real prices: {e}")
@@ -171,26 +213,26 @@ class RealPriceDataClient:
         try:
             url = f"{self.coingecko_url}/search/trending"
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    trending = []
-                    
-                    for coin in data.get("coins", [])[:10]:  # Top 10
-                        coin_data = coin.get("item", {})
-                        trending.append({
-                            "id": coin_data.get("id"),
-                            "name": coin_data.get("name"),
-                            "symbol": coin_data.get("symbol"),
-                            "market_cap_rank": coin_data.get("market_cap_rank"),
-                            "price_btc": coin_data.get("price_btc")
-                        })
-                    
-                    logger.info(f"Fetched {len(trending)} trending tokens")
-                    return trending
-                else:
-                    logger.error(f"Failed to get trending tokens: {response.status}")
-                    return []
+            status, data = await self._get_json(url)
+            
+            if status == 200:
+                trending = []
+                
+                for coin in data.get("coins", [])[:10]:  # Top 10
+                    coin_data = coin.get("item", {})
+                    trending.append({
+                        "id": coin_data.get("id"),
+                        "name": coin_data.get("name"),
+                        "symbol": coin_data.get("symbol"),
+                        "market_cap_rank": coin_data.get("market_cap_rank"),
+                        "price_btc": coin_data.get("price_btc")
+                    })
+                
+                logger.info(f"Fetched {len(trending)} trending tokens")
+                return trending
+            else:
+                logger.error(f"Failed to get trending tokens: {status}")
+                return []
                     
         except Exception as e:
             logger.error(f"Error getting trending tokens: {e}")
@@ -203,27 +245,41 @@ class RealPriceDataClient:
         try:
             url = f"{self.coingecko_url}/global"
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    global_data = data.get("data", {})
-                    
-                    return {
-                        "total_market_cap_usd": global_data.get("total_market_cap", {}).get("usd", 0),
-                        "total_volume_usd": global_data.get("total_volume", {}).get("usd", 0),
-                        "market_cap_percentage": global_data.get("market_cap_percentage", {}),
-                        "active_cryptocurrencies": global_data.get("active_cryptocurrencies", 0),
-                        "markets": global_data.get("markets", 0),
-                        "market_cap_change_24h": global_data.get("market_cap_change_percentage_24h_usd", 0)
-                    }
-                else:
-                    logger.error(f"Failed to get global market data: {response.status}")
-                    return {}
+            status, data = await self._get_json(url)
+            
+            if status == 200:
+                global_data = data.get("data", {})
+                
+                return {
+                    "total_market_cap_usd": global_data.get("total_market_cap", {}).get("usd", 0),
+                    "total_volume_usd": global_data.get("total_volume", {}).get("usd", 0),
+                    "market_cap_percentage": global_data.get("market_cap_percentage", {}),
+                    "active_cryptocurrencies": global_data.get("active_cryptocurrencies", 0),
+                    "markets": global_data.get("markets", 0),
+                    "market_cap_change_24h": global_data.get("market_cap_change_percentage_24h_usd", 0)
+                }
+            else:
+                logger.error(f"Failed to get global market data: {status}")
+                return {}
                     
         except Exception as e:
             logger.error(f"Error getting global market data: {e}")
             return {}
 
+    async def _get_json(self, url: str, params: Optional[Dict] = None):
+        """
+        GET na API do CoinGecko através do limitador de taxa compartilhado
+        """
+        return await self.rate_limiter.get_json(self.session, url, params,
+                                                max_retries=self.max_retries,
+                                                timeout=self.request_timeout)
+
+    def get_rate_limit_stats(self) -> Dict:
+        """
+        Retorna contadores de throughput do limitador do CoinGecko
+        """
+        return self.rate_limiter.get_stats()
+
     def _process_price_data(self, token_id: str, raw_data: Dict) -> Dict:
         """
         Processa dados brutos da API
@@ -238,15 +294,16 @@ class RealPriceDataClient:
             "timestamp": datetime.now().isoformat()
         }
 
-    def _is_cache_valid(self, token_id: str) -> bool:
+    def _get_cached(self, token_id: str) -> Optional[Dict]:
         """
-        Verifica se o cache é válido (dentro do TTL)
+        Retorna a entrada do cache se puder ser servida sem bloquear (TTL = `cache_ttl`)
         """
-        if token_id not in self.last_update:
-            return False
-            
-        time_diff = datetime.now() - self.last_update[token_id]
-        return time_diff.total_seconds() < self.cache_ttl
+        return get_cached(
+            self.price_cache, self.last_update, token_id,
+            ttl=self.cache_ttl,
+            max_stale=self.cache_max_stale,
+            serve_stale=self.cache_mode == CACHE_MODE_SWR and self.cache_refresher.is_running()
+        )
 
     async def get_portfolio_value(self, holdings: Dict[str, float]) -> Dict:
         """
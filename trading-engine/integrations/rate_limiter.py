@@ -0,0 +1,228 @@
+"""
+Shared Rate Limiter for CoinGecko API Clients
+"""
+
+import aiohttp
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Plano gratuito do CoinGecko: ~30 requisições por minuto
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_MAX_RETRIES = 3
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket com backoff adaptativo para respostas 429
+
+    O orçamento é reabastecido continuamente. Um 429 bloqueia todos os
+    chamadores pelo Retry-After (ou backoff exponencial com jitter) e reduz a
+    taxa efetiva pela metade; cada sucesso recupera a taxa gradualmente até o
+    orçamento configurado.
+
+    `acquire` dorme segurando o lock de propósito: os chamadores esperam em
+    fila FIFO atrás de quem aguarda o próximo token, sem acordarem todos a
+    cada reabastecimento. O lock é criado sob demanda para o loop em execução,
+    então o singleton do processo pode ser criado no import e usado por
+    loops diferentes (ex.: um loop por teste), um de cada vez.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None,
+                 max_backoff: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst or max(1, int(requests_per_minute // 6))
+        self.max_backoff = max_backoff
+
+        self._rate = requests_per_minute / 60.0
+        self._min_rate = self._rate / 8
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._consecutive_429 = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.stats = {
+            "requests": 0,
+            "successes": 0,
+            "rate_limited": 0,
+            "throttled": 0,
+            "wait_seconds": 0.0
+        }
+        self._started_at = time.monotonic()
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Lock do loop em execução (um asyncio.Lock fica preso ao primeiro loop que o usa)"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self):
+        """Aguarda até haver orçamento disponível para uma requisição"""
+        async with self._get_lock():
+            throttled = False
+
+            while True:
+                now = time.monotonic()
+
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.stats["requests"] += 1
+                        return
+                    wait = (1 - self._tokens) / self._rate
+
+                if not throttled:
+                    self.stats["throttled"] += 1
+                    throttled = True
+                self.stats["wait_seconds"] += wait
+                await asyncio.sleep(wait)
+
+    def _refill(self, now: float):
+        """Reabastece o bucket proporcionalmente ao tempo decorrido"""
+        elapsed = now - self._last_refill
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self._rate)
+        self._last_refill = now
+
+    def record_success(self):
+        """Registra sucesso e recupera a taxa gradualmente"""
+        self.stats["successes"] += 1
+        self._consecutive_429 = 0
+
+        configured_rate = self.requests_per_minute / 60.0
+        if self._rate < configured_rate:
+            self._rate = min(configured_rate, self._rate + configured_rate * 0.05)
+
+    def penalize(self, retry_after: Optional[float] = None) -> float:
+        """
+        Registra um 429 e bloqueia novas requisições
+
+        Returns:
+            Segundos de espera aplicados
+        """
+        self.stats["rate_limited"] += 1
+        self._consecutive_429 += 1
+
+        if retry_after is not None:
+            backoff = retry_after
+        else:
+            backoff = min(self.max_backoff, 2 ** self._consecutive_429)
+        backoff += random.uniform(0, backoff * 0.25)
+
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + backoff)
+        self._tokens = 0.0
+        self._last_refill = now
+        self._rate = max(self._min_rate, self._rate / 2)
+
+        logger.warning(f"Rate limited by upstream, backing off {backoff:.1f}s",
+                       effective_rpm=round(self._rate * 60, 2))
+        return backoff
+
+    async def get_json(self, session: aiohttp.ClientSession, url: str,
+                       params: Optional[Dict] = None,
+                       max_retries: int = DEFAULT_MAX_RETRIES,
+                       timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """
+        Executa um GET respeitando o limite e repetindo em caso de 429
+
+        O `timeout` vale para cada requisição HTTP, contado depois de obtido o
+        orçamento: a espera na fila do limitador (inclusive backoff de 429) não
+        consome o tempo da requisição.
+
+        Returns:
+            (status, json) - json é None quando o status não é 200
+
+        Raises:
+            asyncio.TimeoutError: Se uma requisição exceder o timeout
+        """
+        status = 429
+
+        for _ in range(max_retries + 1):
+            await self.acquire()
+
+            request = self._request(session, url, params)
+            status, data, retry_after = await (
+                asyncio.wait_for(request, timeout=timeout) if timeout else request
+            )
+
+            if status == 200:
+                self.record_success()
+                return status, data
+
+            if status != 429:
+                return status, None
+
+            self.penalize(parse_retry_after(retry_after))
+
+        logger.error(f"Rate limit retries exhausted for {url}")
+        return status, None
+
+    @staticmethod
+    async def _request(session: aiohttp.ClientSession, url: str,
+                       params: Optional[Dict]) -> Tuple[int, Any, Optional[str]]:
+        """GET simples: (status, json se 200, header Retry-After)"""
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                return response.status, await response.json(), None
+            return response.status, None, response.headers.get("Retry-After")
+
+    def get_stats(self) -> Dict:
+        """Retorna contadores de throughput do limitador"""
+        uptime = time.monotonic() - self._started_at
+        return {
+            **self.stats,
+            "configured_rpm": self.requests_per_minute,
+            "effective_rpm": round(self._rate * 60, 2),
+            "observed_rpm": round(self.stats["requests"] / uptime * 60, 2) if uptime > 0 else 0.0,
+            "backoff_remaining": max(0.0, round(self._blocked_until - time.monotonic(), 2))
+        }
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Converte o header Retry-After (segundos ou data HTTP) em segundos
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+_coingecko_limiter: Optional[TokenBucketRateLimiter] = None
+
+def get_coingecko_rate_limiter(settings=None) -> TokenBucketRateLimiter:
+    """
+    Retorna o limitador compartilhado pelo processo para a API do CoinGecko
+
+    A primeira chamada define o orçamento; chamadas seguintes reutilizam a
+    mesma instância para que todos os clientes dividam o limite.
+    """
+    global _coingecko_limiter
+
+    if _coingecko_limiter is None:
+        requests_per_minute = getattr(settings, "coingecko_requests_per_minute",
+                                      DEFAULT_REQUESTS_PER_MINUTE)
+        _coingecko_limiter = TokenBucketRateLimiter(requests_per_minute)
+        logger.info("CoinGecko rate limiter initialized", requests_per_minute=requests_per_minute)
+
+    return _coingecko_limiter
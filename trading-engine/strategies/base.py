@@ -4,9 +4,10 @@ Base Strategy Class for Trading Engine
 
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
 
+from strategies.indicators import IndicatorBank
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -28,6 +29,12 @@ class BaseStrategy(ABC):
             "avg_pnl_per_trade": 0.0
         }
         
+        # Tempo máximo de uma posição aberta por esta estratégia
+        self.max_holding_period = timedelta(hours=settings.max_holding_hours_for(name))
+        
+        # Indicadores incrementais por token (subclasses registram os seus)
+        self.indicators = IndicatorBank()
+        
         logger.info(f"Strategy {self.name} initialized")
 
     @abstractmethod
@@ -56,6 +63,41 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def release_signal(self, signal: Dict):
+        """
+        Chamado quando um sinal emitido é descartado sem execução
+        
+        Estratégias que suprimem sinais repetidos devem liberar o par aqui,
+        para que um sinal novo possa ser emitido no próximo tick.
+        
+        Args:
+            signal: Sinal descartado
+        """
+        pass
+
+    def update_indicators(self, market_data: Dict[str, Dict]):
+        """
+        Atualiza os indicadores registrados com o tick atual de todos os tokens
+        
+        Args:
+            market_data: Dados de mercado por token
+        """
+        if not self.indicators.factories:
+            return
+        
+        # Ticks sem preço válido são ignorados para não contaminar os indicadores
+        self.indicators.update_many(
+            (token_id, data['price'], data.get('volume_24h', 0))
+            for token_id, data in market_data.items()
+            if data.get('price', 0) > 0
+        )
+
+    def get_indicator(self, token_id: str, name: str):
+        """
+        Retorna o valor corrente de um indicador sem recalcular histórico
+        """
+        return self.indicators.value(token_id, name)
+
     def update_performance(self, trade_result: Dict):
         """
         Atualiza métricas de performance da estratégia
@@ -0,0 +1,135 @@
+"""
+Ring Buffer Price/Volume History for Strategies
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+class RingBufferHistory:
+    """
+    Histórico de preço e volume em buffers circulares NumPy pré-alocados
+
+    Cada token ocupa uma linha de uma matriz 2-D compartilhada pelo universo.
+    Cada valor é gravado duas vezes (posição `h` e `h + capacity`), de modo
+    que a janela dos últimos N pontos é sempre uma fatia contígua: `append`
+    é O(1) e `window` retorna views sem cópia.
+    """
+
+    def __init__(self, capacity: int, initial_tokens: int = 64):
+        self.capacity = capacity
+        self._index: Dict[str, int] = {}
+        self._allocate(max(1, initial_tokens))
+
+    def _allocate(self, rows: int):
+        self._prices = np.zeros((rows, 2 * self.capacity), dtype=np.float64)
+        self._volumes = np.zeros((rows, 2 * self.capacity), dtype=np.float64)
+        self._heads = np.zeros(rows, dtype=np.int64)
+        self._counts = np.zeros(rows, dtype=np.int64)
+
+    def _grow(self):
+        """Dobra o número de linhas quando o universo de tokens cresce"""
+        rows = self._prices.shape[0]
+        extra = ((0, rows), (0, 0))
+        self._prices = np.pad(self._prices, extra)
+        self._volumes = np.pad(self._volumes, extra)
+        self._heads = np.pad(self._heads, (0, rows))
+        self._counts = np.pad(self._counts, (0, rows))
+
+    def _row(self, token_id: str) -> int:
+        row = self._index.get(token_id)
+        if row is None:
+            row = len(self._index)
+            if row >= self._prices.shape[0]:
+                self._grow()
+            self._index[token_id] = row
+        return row
+
+    def append(self, token_id: str, price: float, volume: float):
+        """Adiciona um ponto ao histórico do token em O(1)"""
+        row = self._row(token_id)
+        head = self._heads[row]
+
+        self._prices[row, head] = self._prices[row, head + self.capacity] = price
+        self._volumes[row, head] = self._volumes[row, head + self.capacity] = volume
+
+        self._heads[row] = (head + 1) % self.capacity
+        if self._counts[row] < self.capacity:
+            self._counts[row] += 1
+
+    def extend(self, token_id: str, prices: Iterable[float], volumes: Iterable[float]):
+        """Adiciona vários pontos em ordem cronológica"""
+        for price, volume in zip(prices, volumes):
+            self.append(token_id, price, volume)
+
+    def window(self, token_id: str, length: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna views (preços, volumes) dos últimos `length` pontos
+
+        Sem `length`, retorna todo o histórico disponível. As views apontam
+        para o buffer interno e são invalidadas por appends posteriores.
+        """
+        row = self._index.get(token_id)
+        if row is None:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty
+
+        count = int(self._counts[row])
+        length = count if length is None else min(length, count)
+
+        end = int(self._heads[row]) + self.capacity
+        start = end - length
+        return self._prices[row, start:end], self._volumes[row, start:end]
+
+    def window_matrix(self, token_ids: List[str], length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna matrizes (tokens × length) com os últimos `length` pontos
+
+        Todos os tokens devem ter pelo menos `length` pontos. Uma única
+        indexação vetorizada substitui um loop Python por token.
+        """
+        rows = np.fromiter((self._index[token_id] for token_id in token_ids),
+                           dtype=np.int64, count=len(token_ids))
+        starts = self._heads[rows] + self.capacity - length
+        columns = starts[:, None] + np.arange(length)
+        return self._prices[rows[:, None], columns], self._volumes[rows[:, None], columns]
+
+    def counts(self, token_ids: List[str]) -> np.ndarray:
+        """Número de pontos armazenados para cada token (0 se ausente)"""
+        return np.fromiter((self.count(token_id) for token_id in token_ids),
+                           dtype=np.int64, count=len(token_ids))
+
+    def count(self, token_id: str) -> int:
+        """Número de pontos armazenados para o token"""
+        row = self._index.get(token_id)
+        return 0 if row is None else int(self._counts[row])
+
+    def tokens(self) -> List[str]:
+        return list(self._index)
+
+    def resize(self, capacity: int):
+        """Altera a capacidade preservando os pontos mais recentes"""
+        if capacity == self.capacity:
+            return
+
+        windows = {token_id: self.window(token_id) for token_id in self._index}
+        snapshot = {
+            token_id: (prices[-capacity:].copy(), volumes[-capacity:].copy())
+            for token_id, (prices, volumes) in windows.items()
+        }
+
+        self.capacity = capacity
+        self._allocate(max(1, self._prices.shape[0]))
+        for token_id, (prices, volumes) in snapshot.items():
+            self.extend(token_id, prices, volumes)
+
+    def clear(self):
+        """Remove todo o histórico mantendo a memória alocada"""
+        self._index.clear()
+        self._heads[:] = 0
+        self._counts[:] = 0
+
+    def __contains__(self, token_id: str) -> bool:
+        return token_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
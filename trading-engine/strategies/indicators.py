@@ -0,0 +1,342 @@
+"""
+Streaming Technical Indicators for Strategies
+
+Cada indicador é atualizado em O(1) (amortizado) por novo tick, sem
+recalcular o histórico. EMA, SMA, RollingVariance, Volatility, RSI, ATR,
+VWAP e BollingerBands também aceitam vetores NumPy alinhados (um elemento
+por token); RollingMax/RollingMin são escalares.
+
+`IndicatorBank` mantém uma instância escalar por token e atualiza o
+universo com um laço Python: o custo por tick é O(tokens × indicadores),
+sem reprocessar janelas, mas não vetorizado.
+"""
+
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+class StreamingIndicator(ABC):
+    """
+    Classe base abstrata para indicadores incrementais
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.value: Any = None
+
+    @abstractmethod
+    def update(self, price, volume=0.0):
+        """
+        Incorpora um novo tick e retorna o valor corrente
+
+        Args:
+            price: Preço (escalar ou vetor NumPy alinhado por token)
+            volume: Volume do tick
+
+        Returns:
+            Valor do indicador após a atualização
+        """
+        pass
+
+    @property
+    def ready(self) -> bool:
+        """True quando o indicador já acumulou `period` amostras"""
+        return self.count >= self.period
+
+class EMA(StreamingIndicator):
+    """Média móvel exponencial (semeada com o primeiro valor)"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.alpha = 2.0 / (period + 1)
+
+    def update(self, price, volume=0.0):
+        self.count += 1
+        if self.value is None:
+            self.value = price
+        else:
+            self.value = self.value + self.alpha * (price - self.value)
+        return self.value
+
+class SMA(StreamingIndicator):
+    """Média móvel simples com soma corrente"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, price, volume=0.0):
+        self.count += 1
+        self._window.append(price)
+        self._sum = self._sum + price
+        if len(self._window) > self.period:
+            self._sum = self._sum - self._window.popleft()
+        self.value = self._sum / len(self._window)
+        return self.value
+
+class RollingVariance(StreamingIndicator):
+    """
+    Variância em janela deslizante pelo algoritmo de Welford
+
+    Usa atualização de entrada e saída da janela, numericamente estável,
+    sem somar quadrados. `ddof=0` reproduz `np.var`/`np.std`.
+    """
+
+    def __init__(self, period: int, ddof: int = 0):
+        super().__init__(period)
+        self.ddof = ddof
+        self._window = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, price, volume=0.0):
+        self.count += 1
+        self._window.append(price)
+        n = len(self._window)
+
+        delta = price - self.mean
+        self.mean = self.mean + delta / n
+        self._m2 = self._m2 + delta * (price - self.mean)
+
+        if n > self.period:
+            old = self._window.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean = self.mean - delta / n
+            self._m2 = self._m2 - delta * (old - self.mean)
+
+        self.value = np.maximum(self._m2, 0.0) / (n - self.ddof) if n > self.ddof else 0.0
+        return self.value
+
+    @property
+    def std(self):
+        return np.sqrt(self.value) if self.value is not None else None
+
+class Volatility(StreamingIndicator):
+    """
+    Volatilidade em % (desvio padrão dos retornos simples na janela)
+
+    Equivalente a `PriceDataClient.calculate_volatility` sobre os últimos
+    `period + 1` preços.
+    """
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._returns = RollingVariance(period)
+        self._last_price = None
+
+    def update(self, price, volume=0.0):
+        if self._last_price is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change = (price - self._last_price) / self._last_price
+            self._returns.update(change)
+            self.count = self._returns.count
+            self.value = self._returns.std * 100
+        self._last_price = price
+        return self.value
+
+class RSI(StreamingIndicator):
+    """Índice de força relativa com suavização de Wilder"""
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self._last_price = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, price, volume=0.0):
+        if self._last_price is None:
+            self._last_price = price
+            return self.value
+
+        change = price - self._last_price
+        self._last_price = price
+        gain = np.maximum(change, 0.0)
+        loss = np.maximum(-change, 0.0)
+
+        self.count += 1
+        if self.count <= self.period:
+            # Semeia com a média simples dos primeiros `period` movimentos
+            self._avg_gain = self._avg_gain + (gain - self._avg_gain) / self.count
+            self._avg_loss = self._avg_loss + (loss - self._avg_loss) / self.count
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self._avg_gain / self._avg_loss
+            self.value = np.where(self._avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+        if np.ndim(self.value) == 0:
+            self.value = float(self.value)
+        return self.value
+
+class ATR(StreamingIndicator):
+    """
+    Average True Range com suavização de Wilder
+
+    `update_bar` usa máxima/mínima/fechamento; `update` aceita apenas o
+    preço e usa o movimento fechamento-a-fechamento como true range.
+    """
+
+    def __init__(self, period: int = 14):
+        super().__init__(period)
+        self._last_close = None
+
+    def update_bar(self, high, low, close):
+        if self._last_close is None:
+            true_range = high - low
+        else:
+            true_range = np.maximum(high - low, np.maximum(np.abs(high - self._last_close),
+                                                           np.abs(low - self._last_close)))
+        self._last_close = close
+
+        self.count += 1
+        if self.count <= self.period:
+            previous = self.value if self.value is not None else 0.0
+            self.value = previous + (true_range - previous) / self.count
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+    def update(self, price, volume=0.0):
+        if self._last_close is None:
+            self._last_close = price
+            return self.value
+        return self.update_bar(price, price, price)
+
+class VWAP(StreamingIndicator):
+    """Preço médio ponderado por volume (cumulativo ou em janela)"""
+
+    def __init__(self, period: Optional[int] = None):
+        super().__init__(period or 1)
+        self.window = period
+        self._points = deque()
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def update(self, price, volume=0.0):
+        self.count += 1
+        self._pv = self._pv + price * volume
+        self._volume = self._volume + volume
+
+        if self.window:
+            self._points.append((price, volume))
+            if len(self._points) > self.window:
+                old_price, old_volume = self._points.popleft()
+                self._pv = self._pv - old_price * old_volume
+                self._volume = self._volume - old_volume
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.value = np.where(self._volume > 0, self._pv / self._volume, price)
+        if np.ndim(self.value) == 0:
+            self.value = float(self.value)
+        return self.value
+
+class BollingerBands(StreamingIndicator):
+    """Bandas de Bollinger: SMA ± k desvios padrão da janela"""
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        super().__init__(period)
+        self.k = k
+        self._variance = RollingVariance(period)
+        self.middle = self.upper = self.lower = None
+
+    def update(self, price, volume=0.0):
+        self._variance.update(price)
+        self.count = self._variance.count
+
+        self.middle = self._variance.mean
+        deviation = self.k * self._variance.std
+        self.upper = self.middle + deviation
+        self.lower = self.middle - deviation
+        self.value = self.middle
+        return self.value
+
+    @property
+    def bands(self) -> Tuple[Any, Any, Any]:
+        return self.lower, self.middle, self.upper
+
+class RollingMax(StreamingIndicator):
+    """Máximo da janela via deque monotônica (O(1) amortizado)"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self._deque = deque()
+
+    def _dominates(self, new, old) -> bool:
+        return new >= old
+
+    def update(self, price, volume=0.0):
+        self.count += 1
+        while self._deque and self._dominates(price, self._deque[-1][1]):
+            self._deque.pop()
+        self._deque.append((self.count, price))
+        if self._deque[0][0] <= self.count - self.period:
+            self._deque.popleft()
+        self.value = self._deque[0][1]
+        return self.value
+
+class RollingMin(RollingMax):
+    """Mínimo da janela via deque monotônica (O(1) amortizado)"""
+
+    def _dominates(self, new, old) -> bool:
+        return new <= old
+
+class IndicatorBank:
+    """
+    Conjunto de indicadores por token
+
+    Cada nome registrado tem uma fábrica; as instâncias são criadas sob
+    demanda para cada token. `update_many` é uma conveniência que percorre os
+    ticks e chama `update` token a token (O(1) por token e indicador) e
+    `value` é uma consulta O(1) ao valor corrente.
+    """
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], StreamingIndicator]] = {}
+        self._indicators: Dict[str, Dict[str, StreamingIndicator]] = {}
+
+    def register(self, name: str, factory: Callable[[], StreamingIndicator]):
+        """Registra um indicador calculado para todos os tokens"""
+        self.factories[name] = factory
+        for indicators in self._indicators.values():
+            indicators[name] = factory()
+
+    def update(self, token_id: str, price: float, volume: float = 0.0):
+        indicators = self._indicators.get(token_id)
+        if indicators is None:
+            indicators = {name: factory() for name, factory in self.factories.items()}
+            self._indicators[token_id] = indicators
+
+        for indicator in indicators.values():
+            indicator.update(price, volume)
+
+    def update_many(self, ticks: Iterable[Tuple[str, float, float]]):
+        """Atualiza vários tokens: itens (token_id, preço, volume)"""
+        for token_id, price, volume in ticks:
+            self.update(token_id, price, volume)
+
+    def get(self, token_id: str, name: str) -> Optional[StreamingIndicator]:
+        return self._indicators.get(token_id, {}).get(name)
+
+    def value(self, token_id: str, name: str):
+        """Valor corrente do indicador (None se ainda não calculado)"""
+        indicator = self.get(token_id, name)
+        return indicator.value if indicator is not None else None
+
+    def snapshot(self, token_id: str) -> Dict[str, Any]:
+        """Valores correntes de todos os indicadores do token"""
+        return {name: indicator.value
+                for name, indicator in self._indicators.get(token_id, {}).items()}
+
+    def clear(self):
+        self._indicators.clear()
+
+    def __contains__(self, token_id: str) -> bool:
+        return token_id in self._indicators
+
+    def __len__(self) -> int:
+        return len(self._indicators)
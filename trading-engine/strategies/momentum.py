@@ -8,6 +8,9 @@ from datetime import datetime, timedelta
 import asyncio
 
 from strategies.base import BaseStrategy
+from strategies.history import RingBufferHistory
+from strategies.indicators import Volatility
+from strategies.signal_registry import SignalRegistry
 from config.settings import TradingSettings
 from utils.logger import setup_logger, TradingLogger
 
@@ -30,11 +33,20 @@ class MomentumStrategy(BaseStrategy):
         self.volume_multiplier = 1.5        # 150% do volume médio
         self.lookback_period = 5            # Períodos para análise
         self.confidence_threshold = 0.7     # Confiança mínima para sinal
+        self.vectorized = settings.momentum_vectorized  # Análise do universo inteiro via NumPy
         
-        # Histórico de dados para análise
-        self.price_history: Dict[str, List[float]] = {}
-        self.volume_history: Dict[str, List[float]] = {}
-        self.signal_history: Dict[str, List[Dict]] = {}
+        # Histórico de dados para análise (mantém dados extras além do lookback)
+        self.history = RingBufferHistory(capacity=self.lookback_period * 2)
+        
+        # Sinais recentes por (símbolo, estratégia) para supressão de duplicados
+        self.signal_registry = SignalRegistry(
+            ttl=settings.signal_dedup_minutes * 60,
+            max_entries=settings.signal_registry_max_entries
+        )
+        
+        # Volatilidade incremental por token, exposta apenas nos metadados do sinal;
+        # o score (momentum, volume, tendência) vem da janela do histórico
+        self.indicators.register('volatility', lambda: Volatility(self.lookback_period * 2))
         
         # Filtros de qualidade
         self.min_market_cap = 10000000      # $10M mínimo
@@ -50,19 +62,29 @@ class MomentumStrategy(BaseStrategy):
         signals = []
         
         try:
+            # Atualiza histórico e indicadores
             for token_id, data in market_data.items():
-                # Atualiza histórico
                 self._update_history(token_id, data)
-                
-                # Verifica se há dados suficientes
-                if not self._has_sufficient_data(token_id):
-                    continue
-                
-                # Analisa momentum
-                momentum_signal = await self._analyze_momentum(token_id, data)
-                
-                if momentum_signal and self.validate_signal(momentum_signal):
+            self.update_indicators(market_data)
+            
+            if self.vectorized:
+                candidates = self._analyze_momentum_vectorized(market_data)
+            else:
+                candidates = []
+                for token_id, data in market_data.items():
+                    # Verifica se há dados suficientes
+                    if not self._has_sufficient_data(token_id):
+                        continue
+                    
+                    # Analisa momentum
+                    momentum_signal = await self._analyze_momentum(token_id, data)
+                    if momentum_signal:
+                        candidates.append(momentum_signal)
+            
+            for momentum_signal in candidates:
+                if self.validate_signal(momentum_signal):
                     signals.append(momentum_signal)
+                    self.signal_registry.register(momentum_signal['symbol'], self.name)
                     
                     # Log do sinal
                     trading_logger.trade_signal(
@@ -84,9 +106,8 @@ class MomentumStrategy(BaseStrategy):
         Analisa momentum para um token específico
         """
         try:
-            # Obtém dados históricos
-            prices = np.array(self.price_history[token_id])
-            volumes = np.array(self.volume_history[token_id])
+            # Obtém dados históricos (views sem cópia do ring buffer)
+            prices, volumes = self.history.window(token_id)
             
             # Calcula indicadores
             price_momentum = self._calculate_price_momentum(prices)
@@ -115,6 +136,7 @@ class MomentumStrategy(BaseStrategy):
                 'price_momentum': price_momentum,
                 'volume_confirmation': volume_confirmation,
                 'trend_strength': trend_strength,
+                'volatility': self.get_indicator(token_id, 'volatility'),
                 'breakout_type': 'bullish_momentum',
                 'analysis_timestamp': datetime.now().isoformat()
             }
@@ -125,6 +147,82 @@ class MomentumStrategy(BaseStrategy):
             logger.error(f"Error analyzing momentum for {token_id}: {e}")
             return None
 
+    def _analyze_momentum_vectorized(self, market_data: Dict[str, Dict]) -> List[Dict]:
+        """
+        Analisa momentum de todo o universo de uma vez
+
+        Tokens com o mesmo tamanho de histórico formam uma matriz
+        (tokens × janela) e todos os indicadores são calculados com operações
+        NumPy por coluna. Produz os mesmos sinais de `_analyze_momentum`;
+        apenas os breakouts seguem para o cálculo de confiança em Python.
+        """
+        token_ids = list(market_data)
+        if not token_ids:
+            return []
+        
+        counts = self.history.counts(token_ids)
+        signals = []
+        
+        for length in np.unique(counts[counts >= self.lookback_period]):
+            group = [token_ids[i] for i in np.flatnonzero(counts == length)]
+            prices, volumes = self.history.window_matrix(group, int(length))
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_change = (prices[:, -1] - prices[:, 0]) / prices[:, 0]
+                avg_volume = volumes[:, :-1].mean(axis=1)
+                current_volume = volumes[:, -1]
+                
+                # Breakout: mudança de preço e volume acima da média
+                is_breakout = (
+                    (price_change > self.price_change_threshold) &
+                    (current_volume > avg_volume * self.volume_multiplier)
+                )
+                
+                rows = np.flatnonzero(is_breakout)
+                if rows.size == 0:
+                    continue
+                
+                change = price_change[rows]
+                price_momentum = np.where(change > 0, np.minimum(np.abs(change) / 0.1, 1.0), 0.0)
+                
+                avg = avg_volume[rows]
+                volume_confirmation = np.where(
+                    avg == 0, 0.0,
+                    np.minimum(current_volume[rows] / avg / self.volume_multiplier, 1.0)
+                )
+            
+            # Períodos consecutivos de alta a partir do início da janela
+            if length < 3:
+                trend_strength = np.zeros(rows.size)
+            else:
+                window = prices[rows]
+                ups = window[:, 1:] > window[:, :-1]
+                trend_strength = np.cumprod(ups, axis=1).sum(axis=1) / (length - 1)
+            
+            for i, row in enumerate(rows):
+                token_id = group[row]
+                data = market_data[token_id]
+                
+                confidence = self._calculate_signal_confidence(
+                    float(price_momentum[i]), float(volume_confirmation[i]),
+                    float(trend_strength[i]), data
+                )
+                if confidence < self.confidence_threshold:
+                    continue
+                
+                signal = self._generate_momentum_signal(token_id, data, confidence)
+                signal['metadata'] = {
+                    'price_momentum': float(price_momentum[i]),
+                    'volume_confirmation': float(volume_confirmation[i]),
+                    'trend_strength': float(trend_strength[i]),
+                    'volatility': self.get_indicator(token_id, 'volatility'),
+                    'breakout_type': 'bullish_momentum',
+                    'analysis_timestamp': datetime.now().isoformat()
+                }
+                signals.append(signal)
+        
+        return signals
+
     def _calculate_price_momentum(self, prices: np.ndarray) -> float:
         """
         Calcula momentum de preço
@@ -314,59 +412,42 @@ class MomentumStrategy(BaseStrategy):
 
     def _is_duplicate_signal(self, signal: Dict) -> bool:
         """
-        Verifica se é um sinal duplicado recente
+        Verifica se é um sinal duplicado recente (consulta O(1) ao registro)
         """
-        symbol = signal['symbol']
-        
-        if symbol not in self.signal_history:
-            self.signal_history[symbol] = []
-            return False
-        
-        # Verifica sinais dos últimos 30 minutos
-        cutoff_time = datetime.now() - timedelta(minutes=30)
-        recent_signals = [
-            s for s in self.signal_history[symbol] 
-            if s['timestamp'] > cutoff_time
-        ]
-        
-        # Se já há sinal recente para este símbolo, é duplicado
-        return len(recent_signals) > 0
+        return self.signal_registry.is_duplicate(signal['symbol'], self.name)
+
+    def release_signal(self, signal: Dict):
+        """
+        Libera o registro de deduplicação de um sinal descartado sem execução
+        """
+        self.signal_registry.discard(signal['symbol'], self.name)
 
     def _update_history(self, token_id: str, data: Dict):
         """
         Atualiza histórico de preços e volume
         """
         try:
-            # Inicializa histórico se necessário
-            if token_id not in self.price_history:
-                self.price_history[token_id] = []
-                self.volume_history[token_id] = []
-            
-            # Adiciona dados atuais
+            # Adiciona dados atuais (o ring buffer descarta os mais antigos)
             price = data.get('price', 0)
             volume = data.get('volume_24h', 0)
             
-            self.price_history[token_id].append(price)
-            self.volume_history[token_id].append(volume)
-            
-            # Mantém apenas o período de lookback
-            max_length = self.lookback_period * 2  # Mantém dados extras para análise
-            self.price_history[token_id] = self.price_history[token_id][-max_length:]
-            self.volume_history[token_id] = self.volume_history[token_id][-max_length:]
+            self.history.append(token_id, price, volume)
             
         except Exception as e:
             logger.error(f"Error updating history for {token_id}: {e}")
 
+    def seed_history(self, token_id: str, prices: List[float], volumes: List[float]):
+        """
+        Pré-carrega histórico (ex.: restaurado do disco após um restart)
+        """
+        max_length = self.history.capacity
+        self.history.extend(token_id, list(prices)[-max_length:], list(volumes)[-max_length:])
+
     def _has_sufficient_data(self, token_id: str) -> bool:
         """
         Verifica se há dados suficientes para análise
         """
-        return (
-            token_id in self.price_history and
-            len(self.price_history[token_id]) >= self.lookback_period and
-            token_id in self.volume_history and
-            len(self.volume_history[token_id]) >= self.lookback_period
-        )
+        return self.history.count(token_id) >= self.lookback_period
 
     def update_parameters(self, new_params: Dict):
         """
@@ -382,8 +463,12 @@ class MomentumStrategy(BaseStrategy):
             if 'confidence_threshold' in new_params:
                 self.confidence_threshold = new_params['confidence_threshold']
             
+            if 'vectorized' in new_params:
+                self.vectorized = new_params['vectorized']
+            
             if 'lookback_period' in new_params:
                 self.lookback_period = new_params['lookback_period']
+                self.history.resize(self.lookback_period * 2)
             
             logger.info(f"Momentum strategy parameters updated: {new_params}")
             
@@ -401,10 +486,12 @@ class MomentumStrategy(BaseStrategy):
                 'price_change_threshold': self.price_change_threshold,
                 'volume_multiplier': self.volume_multiplier,
                 'confidence_threshold': self.confidence_threshold,
-                'lookback_period': self.lookback_period
+                'lookback_period': self.lookback_period,
+                'vectorized': self.vectorized
             },
             'performance': self.get_performance_metrics(),
-            'monitored_tokens': len(self.price_history),
+            'monitored_tokens': len(self.history),
+            'signal_registry': self.signal_registry.get_stats(),
             'last_analysis': datetime.now().isoformat()
         }
 
@@ -412,8 +499,8 @@ class MomentumStrategy(BaseStrategy):
         """
         Limpa histórico de dados (útil para reset)
         """
-        self.price_history.clear()
-        self.volume_history.clear()
-        self.signal_history.clear()
+        self.history.clear()
+        self.indicators.clear()
+        self.signal_registry.clear()
         logger.info("Momentum strategy history cleared")
 
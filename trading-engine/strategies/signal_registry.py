@@ -0,0 +1,114 @@
+"""
+Expiring Signal Registry for Duplicate Suppression
+"""
+
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+SignalKey = Tuple[str, str]
+
+class SignalRegistry:
+    """
+    Registro de sinais recentes indexado por (símbolo, estratégia)
+
+    A consulta de duplicidade é O(1) via dicionário; a expiração usa um heap
+    de prazos com remoção preguiçosa (entradas renovadas deixam registros
+    obsoletos no heap, descartados ao chegar ao topo). `max_entries` limita
+    a memória: ao exceder, as entradas com vencimento mais próximo saem primeiro.
+    """
+
+    def __init__(self, ttl: float = 1800, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expiry: Dict[SignalKey, float] = {}
+        self._heap: List[Tuple[float, SignalKey]] = []
+        self.registered = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    def _expire(self, now: float):
+        """Remove entradas vencidas e registros obsoletos do topo do heap"""
+        while self._heap:
+            expires_at, key = self._heap[0]
+            current = self._expiry.get(key)
+            if current is not None and current != expires_at:
+                # Registro obsoleto (a chave foi renovada depois)
+                heapq.heappop(self._heap)
+                continue
+            if current is not None and expires_at > now:
+                break
+            heapq.heappop(self._heap)
+            self._expiry.pop(key, None)
+
+    def _evict_overflow(self):
+        """Descarta as entradas mais próximas do vencimento acima do limite"""
+        while len(self._expiry) > self.max_entries and self._heap:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expiry.get(key) == expires_at:
+                del self._expiry[key]
+                self.evicted += 1
+
+        # Reconstrói o heap se os registros obsoletos dominarem a memória
+        if len(self._heap) > 2 * max(self.max_entries, len(self._expiry)):
+            self._heap = [(expires_at, key) for key, expires_at in self._expiry.items()]
+            heapq.heapify(self._heap)
+
+    def contains(self, symbol: str, strategy: str, now: Optional[float] = None) -> bool:
+        """True se há sinal ativo (não expirado) para o par"""
+        expires_at = self._expiry.get((symbol, strategy))
+        if expires_at is None:
+            return False
+        return expires_at > (time.monotonic() if now is None else now)
+
+    def register(self, symbol: str, strategy: str, ttl: Optional[float] = None,
+                 now: Optional[float] = None):
+        """Registra (ou renova) um sinal emitido para o par"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        key = (symbol, strategy)
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._expiry[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+        self.registered += 1
+
+        self._evict_overflow()
+
+    def is_duplicate(self, symbol: str, strategy: str) -> bool:
+        """
+        Verifica se o sinal duplica um ativo, contabilizando a supressão
+
+        Returns:
+            True se já há sinal ativo para o par (o novo deve ser descartado)
+        """
+        if self.contains(symbol, strategy):
+            self.suppressed += 1
+            return True
+        return False
+
+    def discard(self, symbol: str, strategy: str):
+        """Remove o par do registro (o registro no heap expira preguiçosamente)"""
+        self._expiry.pop((symbol, strategy), None)
+
+    def clear(self):
+        self._expiry.clear()
+        self._heap.clear()
+
+    def get_stats(self) -> Dict:
+        """Métricas do registro"""
+        self._expire(time.monotonic())
+        return {
+            'active': len(self._expiry),
+            'registered': self.registered,
+            'suppressed': self.suppressed,
+            'evicted': self.evicted,
+            'ttl_seconds': self.ttl,
+            'max_entries': self.max_entries
+        }
+
+    def __contains__(self, key: SignalKey) -> bool:
+        return self.contains(*key)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
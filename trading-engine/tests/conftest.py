@@ -0,0 +1,14 @@
+"""
+Configuração comum dos testes
+"""
+
+import os
+import sys
+
+# Permite importar os módulos do engine (core, integrations, ...) a partir de tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Variáveis obrigatórias de load_settings (valores fictícios, sem chamadas externas)
+os.environ.setdefault('ONEINCH_API_KEY', 'test-key')
+os.environ.setdefault('BACKEND_API_URL', 'http://localhost:3000')
+os.environ.setdefault('CLAUDE_API_KEY', 'test-key')
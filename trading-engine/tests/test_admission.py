@@ -0,0 +1,94 @@
+"""
+Testes da admissão concorrente de sinais e do lock por símbolo no TradingEngine
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from config.settings import load_settings
+from core.engine import TradingEngine
+
+class RecordingSwap:
+    """execute_swap fictício que mede swaps simultâneos por token"""
+
+    def __init__(self, engine: TradingEngine, delay: float = 0.02):
+        self.engine = engine
+        self.delay = delay
+        self.running = {}
+        self.overlap = 0
+        self.violations = []
+
+    async def __call__(self, from_token, to_token, amount, slippage):
+        token = to_token if from_token == "USDT" else from_token
+        self.running[token] = self.running.get(token, 0) + 1
+        self.overlap = max(self.overlap, self.running[token])
+
+        engine = self.engine
+        if len(engine.positions) > engine.settings.max_simultaneous_trades:
+            self.violations.append(('slots', len(engine.positions)))
+        if engine.allocated_capital > engine.settings.capital_usdt + 1e-9:
+            self.violations.append(('capital', engine.allocated_capital))
+
+        await asyncio.sleep(self.delay)
+        self.running[token] -= 1
+        if from_token == "USDT":
+            return {'success': True, 'execution_price': 10.0, 'amount_out': amount / 10.0, 'tx_hash': '0x1'}
+        return {'success': True, 'amount_out': amount * 10.0}
+
+def make_engine(monkeypatch, max_trades: int = 3) -> TradingEngine:
+    settings = load_settings()
+    settings.capital_usdt = 1000.0
+    settings.max_position_size_percent = 10.0
+    settings.max_simultaneous_trades = max_trades
+    settings.max_positions_per_symbol = 1
+    engine = TradingEngine(settings)
+    monkeypatch.setattr(engine.risk_manager, '_check_time_restrictions',
+                        lambda: {'name': 'time_restrictions', 'passed': True})
+    return engine
+
+def make_signal(symbol: str) -> dict:
+    return {'symbol': symbol, 'type': 'buy', 'price': 10.0, 'confidence': 0.9}
+
+@pytest.mark.asyncio
+async def test_concurrent_admission_keeps_capital_and_slots_consistent(monkeypatch):
+    engine = make_engine(monkeypatch, max_trades=3)
+    swap = engine.oneinch_client.execute_swap = RecordingSwap(engine)
+
+    batches = [[make_signal(f"T{batch}{i}") for i in range(3)] for batch in range(4)]
+    await asyncio.gather(*(engine._process_trading_signals(batch) for batch in batches))
+
+    assert swap.violations == []
+    assert len(engine.active_trades) == 3
+    assert not engine.pending_trades
+    assert len(engine.positions) == 3
+    assert engine.allocated_capital == pytest.approx(
+        sum(trade['position_size'] for trade in engine.active_trades.values())
+    )
+
+@pytest.mark.asyncio
+async def test_open_and_close_of_same_symbol_do_not_overlap(monkeypatch):
+    engine = make_engine(monkeypatch, max_trades=5)
+    engine.settings.max_positions_per_symbol = 2
+    swap = engine.oneinch_client.execute_swap = RecordingSwap(engine)
+
+    trade = {
+        'id': 'open-1', 'symbol': 'ETH', 'entry_price': 10.0, 'amount': 10.0,
+        'stop_loss': 9.0, 'take_profit': 12.0, 'position_size': 100.0, 'timestamp': datetime.now()
+    }
+    engine.active_trades['open-1'] = trade
+    engine.allocated_capital += trade['position_size']
+    engine.positions.add('open-1', trade)
+
+    signal = make_signal('ETH')
+    reservation = engine._reserve(signal, 100.0)
+    await asyncio.gather(
+        engine._execute_reserved(signal, reservation),
+        engine._close_trade('open-1', "manual")
+    )
+
+    assert swap.overlap == 1
+    assert 'open-1' not in engine.active_trades
+    assert [trade['symbol'] for trade in engine.active_trades.values()] == ['ETH']
+    assert engine.allocated_capital == pytest.approx(100.0)
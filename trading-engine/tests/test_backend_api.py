@@ -0,0 +1,47 @@
+"""
+Testes do envio de relatórios em lote ao backend
+"""
+
+from config.settings import load_settings
+from integrations.backend_api import BackendAPIClient, report_key
+
+def make_client() -> BackendAPIClient:
+    return BackendAPIClient(load_settings())
+
+def test_reports_with_same_type_and_id_have_distinct_keys():
+    client = make_client()
+
+    first = client.close_report("trade-1", -1.0, "stop_loss")
+    retry = client.close_report("trade-1", -1.0, "stop_loss")
+
+    assert report_key(first) != report_key(retry)
+    assert report_key({'type': 'close', 'id': 'trade-1'}) == "close_trade-1"
+
+def test_batch_results_are_matched_by_key():
+    client = make_client()
+    reports = [client.signal_report({'symbol': 'ETH', 'type': 'buy', 'price': 1.0}) for _ in range(2)]
+    data = {'data': {'results': [
+        {'type': 'signal', 'id': 'ETH', 'key': report_key(reports[0]), 'status': 'ok'},
+        {'type': 'signal', 'id': 'ETH', 'key': report_key(reports[1]), 'status': 'rejected'}
+    ]}}
+
+    results = client._parse_batch_results(reports, data)
+
+    assert results == {report_key(reports[0]): True, report_key(reports[1]): None}
+
+def test_batch_results_without_key_fall_back_to_type_and_id():
+    client = make_client()
+    reports = [client.execution_report({'id': 'trade-1', 'symbol': 'ETH'})]
+    data = {'data': {'results': [{'type': 'execution', 'id': 'trade-1', 'status': 'ok'}]}}
+
+    assert client._parse_batch_results(reports, data) == {report_key(reports[0]): True}
+
+def test_encoded_batch_carries_keys():
+    client = make_client()
+    client.batch_format = "json"
+    client.batch_gzip = False
+    report = client.close_report("trade-1", 2.0, "take_profit")
+
+    body, _ = client._encode_batch([report])
+
+    assert report_key(report).encode() in body
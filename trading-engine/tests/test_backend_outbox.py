@@ -0,0 +1,79 @@
+"""
+Testes do outbox de relatórios ao backend (spool e recarga)
+"""
+
+import asyncio
+
+import pytest
+
+from integrations.backend_api import report_key
+from integrations.backend_outbox import BackendOutbox
+
+class FakeBackend:
+    """batch_report fictício que pode ficar fora do ar"""
+
+    def __init__(self, up: bool = True):
+        self.up = up
+        self.delivered = []
+
+    async def batch_report(self, batch):
+        await asyncio.sleep(0)
+        if not self.up:
+            return {report_key(report): False for report in batch}
+        self.delivered.extend(report['id'] for report in batch)
+        return {report_key(report): True for report in batch}
+
+def make_report(report_id: str) -> dict:
+    return {'type': 'execution', 'id': report_id, 'payload': {}}
+
+@pytest.mark.asyncio
+async def test_enqueue_overflow_stays_in_memory_until_worker_spills(tmp_path):
+    spool = tmp_path / "outbox.jsonl"
+    outbox = BackendOutbox(FakeBackend(up=False), max_size=2, spool_path=str(spool))
+
+    accepted = [outbox.enqueue(make_report(f"r{i}")) for i in range(5)]
+
+    assert accepted == [True, True, False, False, False]
+    assert outbox.get_stats()['overflow'] == 3
+    assert not spool.exists()
+
+    await outbox._flush_overflow()
+
+    assert outbox.get_stats()['overflow'] == 0
+    assert outbox.get_stats()['spooled'] == 3
+    assert len(spool.read_text().splitlines()) == 3
+
+@pytest.mark.asyncio
+async def test_spooled_reports_are_reloaded_in_order(tmp_path):
+    spool = tmp_path / "outbox.jsonl"
+    backend = FakeBackend(up=False)
+    outbox = BackendOutbox(backend, max_size=2, spool_path=str(spool))
+    for i in range(5):
+        outbox.enqueue(make_report(f"r{i}"))
+
+    # Parado com o backend fora: fila e excedente vão para o spool, na ordem
+    await outbox.stop()
+    assert outbox.get_stats()['spooled'] == 5
+
+    backend.up = True
+    restarted = BackendOutbox(backend, max_size=2, batch_size=2, spool_path=str(spool))
+    assert restarted.get_stats()['spooled'] == 5
+
+    restarted.start()
+    restarted.enqueue(make_report("r5"))
+    for _ in range(100):
+        if len(backend.delivered) == 6:
+            break
+        await asyncio.sleep(0.01)
+    await restarted.stop()
+
+    assert backend.delivered == [f"r{i}" for i in range(6)]
+    assert not spool.exists()
+
+def test_full_queue_without_spool_drops():
+    outbox = BackendOutbox(FakeBackend(), max_size=1)
+
+    assert outbox.enqueue(make_report("r0"))
+    assert not outbox.enqueue(make_report("r1"))
+    assert outbox.get_stats()['dropped'] == 1
+    assert len(outbox) == 1
@@ -0,0 +1,106 @@
+"""
+Testes do fechamento concorrente de trades no TradingEngine
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from core.engine import TradingEngine
+from core.trigger_index import STOP_LOSS
+
+class SlowSwap:
+    """execute_swap fictício que demora e conta as vendas"""
+
+    def __init__(self, success: bool = True, delay: float = 0.05):
+        self.success = success
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, from_token, to_token, amount, slippage):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if not self.success:
+            return {'success': False, 'error': 'swap failed'}
+        return {'success': True, 'amount_out': amount * 110.0}
+
+def make_engine(swap: SlowSwap) -> TradingEngine:
+    engine = TradingEngine(load_settings())
+    engine.oneinch_client.execute_swap = swap
+
+    trade = {
+        'id': 'trade-1',
+        'symbol': 'ETH',
+        'entry_price': 100.0,
+        'amount': 1.0,
+        'stop_loss': 95.0,
+        'take_profit': 120.0,
+        'position_size': 100.0,
+        'timestamp': datetime.now()
+    }
+    engine.active_trades['trade-1'] = trade
+    engine.allocated_capital += trade['position_size']
+    engine.positions.add('trade-1', trade)
+    engine._arm_triggers('trade-1', trade, trade['entry_price'])
+    engine.time_limit_scheduler.schedule('trade-1', datetime.now() + timedelta(hours=1))
+    return engine
+
+@pytest.mark.asyncio
+async def test_concurrent_closes_sell_once():
+    swap = SlowSwap()
+    engine = make_engine(swap)
+
+    await asyncio.gather(
+        engine._close_trade('trade-1', STOP_LOSS, 94.0),
+        engine._close_expired_trade('trade-1'),
+        engine._close_all_positions("shutdown")
+    )
+
+    assert swap.calls == 1
+    assert 'trade-1' not in engine.active_trades
+    assert engine.risk_manager.state.total_trades == 1
+    assert engine.allocated_capital == 0.0
+    assert not engine._closing
+
+@pytest.mark.asyncio
+async def test_triggers_and_deadline_disarmed_while_closing():
+    swap = SlowSwap()
+    engine = make_engine(swap)
+
+    task = asyncio.create_task(engine._close_trade('trade-1', "manual"))
+    await asyncio.sleep(0.01)
+
+    assert 'trade-1' in engine._closing
+    assert 'trade-1' not in engine.trigger_index
+    assert 'trade-1' not in engine.time_limit_scheduler
+    assert engine.trigger_index.update_price('ETH', 50.0) == []
+
+    await task
+    assert 'trade-1' not in engine.active_trades
+
+@pytest.mark.asyncio
+async def test_failed_close_rearms_triggers_and_deadline():
+    swap = SlowSwap(success=False)
+    engine = make_engine(swap)
+    deadline = engine.time_limit_scheduler.deadline('trade-1')
+
+    await engine._close_trade('trade-1', "manual")
+
+    assert 'trade-1' in engine.active_trades
+    assert 'trade-1' in engine.trigger_index
+    assert engine.time_limit_scheduler.deadline('trade-1') == deadline
+    assert not engine._closing
+
+@pytest.mark.asyncio
+async def test_failed_time_limit_close_is_retried():
+    swap = SlowSwap(success=False)
+    engine = make_engine(swap)
+    engine.time_limit_scheduler.cancel('trade-1')
+
+    await engine._close_expired_trade('trade-1')
+
+    assert swap.calls == 1
+    assert 'trade-1' in engine.active_trades
+    assert engine.time_limit_scheduler.deadline('trade-1') > datetime.now()
@@ -0,0 +1,124 @@
+"""
+Testes do agendador de prazos (saída por tempo limite)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from core.deadline_scheduler import DeadlineScheduler
+from core.engine import TradingEngine
+from strategies.momentum import MomentumStrategy
+
+async def noop(key: str):
+    pass
+
+def test_pop_due_returns_only_expired_keys_in_order():
+    scheduler = DeadlineScheduler("test", noop)
+    now = datetime.now()
+    scheduler.schedule("late", now + timedelta(seconds=10))
+    scheduler.schedule("b", now - timedelta(seconds=1))
+    scheduler.schedule("a", now - timedelta(seconds=2))
+
+    assert scheduler.pop_due(now) == ["a", "b"]
+    assert len(scheduler) == 1
+    assert scheduler.next_deadline() == now + timedelta(seconds=10)
+
+def test_cancel_and_reschedule_discard_stale_entries():
+    scheduler = DeadlineScheduler("test", noop)
+    now = datetime.now()
+    scheduler.schedule("a", now - timedelta(seconds=5))
+    scheduler.schedule("b", now - timedelta(seconds=5))
+
+    assert scheduler.cancel("a")
+    assert not scheduler.cancel("a")
+    scheduler.schedule("b", now + timedelta(seconds=5))
+
+    assert scheduler.pop_due(now) == []
+    assert scheduler.deadline("b") == now + timedelta(seconds=5)
+    assert scheduler.pop_due(now + timedelta(seconds=6)) == ["b"]
+    assert len(scheduler) == 0
+
+@pytest.mark.asyncio
+async def test_task_fires_rescheduled_and_skips_cancelled():
+    fired = []
+
+    async def on_expire(key: str):
+        fired.append(key)
+
+    scheduler = DeadlineScheduler("test", on_expire)
+    scheduler.start()
+    now = datetime.now()
+    scheduler.schedule("cancelled", now + timedelta(seconds=0.05))
+    scheduler.schedule("moved", now + timedelta(hours=1))
+    scheduler.cancel("cancelled")
+
+    # Reagendar para mais cedo acorda a task
+    scheduler.schedule("moved", now + timedelta(seconds=0.05))
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+
+    assert fired == ["moved"]
+    assert scheduler.fired == 1
+
+@pytest.mark.asyncio
+async def test_due_callbacks_run_concurrently_up_to_limit():
+    running = 0
+    peak = 0
+    fired = []
+
+    async def on_expire(key: str):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        fired.append(key)
+
+    scheduler = DeadlineScheduler("test", on_expire, concurrency=2)
+    scheduler.start()
+    now = datetime.now()
+    for key in ("a", "b", "c", "d"):
+        scheduler.schedule(key, now)
+
+    # Quatro callbacks de 50ms com dois em voo terminam em ~100ms
+    await asyncio.sleep(0.13)
+    assert sorted(fired) == ["a", "b", "c", "d"]
+    assert peak == 2
+    await scheduler.stop()
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_inflight_callbacks():
+    fired = []
+
+    async def on_expire(key: str):
+        await asyncio.sleep(0.05)
+        fired.append(key)
+
+    scheduler = DeadlineScheduler("test", on_expire)
+    scheduler.start()
+    scheduler.schedule("a", datetime.now())
+    await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert fired == ["a"]
+
+def test_holding_deadline_follows_trade_strategy():
+    settings = load_settings()
+    settings.max_holding_hours = 4.0
+    settings.strategy_max_holding_hours = {'Scalp': 0.5}
+    engine = TradingEngine(settings)
+    opened = datetime(2026, 1, 1, 12, 0)
+
+    assert engine._holding_deadline({'strategy': 'Scalp', 'timestamp': opened}) == opened + timedelta(minutes=30)
+    assert engine._holding_deadline({'strategy': 'Momentum', 'timestamp': opened}) == opened + timedelta(hours=4)
+    assert engine._holding_deadline({'timestamp': opened}) == opened + timedelta(hours=4)
+
+def test_strategy_holding_hours_parsed_from_env(monkeypatch):
+    monkeypatch.setenv('STRATEGY_MAX_HOLDING_HOURS', 'Momentum=2, Scalp=0.25')
+    settings = load_settings()
+
+    assert settings.strategy_max_holding_hours == {'Momentum': 2.0, 'Scalp': 0.25}
+    assert MomentumStrategy(settings).max_holding_period == timedelta(hours=2)
@@ -0,0 +1,176 @@
+"""
+Testes dos circuit breakers e do monitor de saúde
+"""
+
+import asyncio
+
+import pytest
+
+from config.settings import load_settings
+from core.engine import TradingEngine
+from core.health import CircuitBreaker, HealthMonitor, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+
+class Clock:
+    """time.monotonic controlável"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("core.health.time.monotonic", clock)
+    return clock
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("api", failure_threshold=3, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("api", failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == STATE_CLOSED
+
+def test_half_open_trial_closes_or_reopens(clock):
+    breaker = CircuitBreaker("api", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now += 31
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    # Apenas uma tentativa por vez no estado meio-aberto
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 31
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+@pytest.mark.asyncio
+async def test_monitor_caches_results_within_ttl(clock):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        return True
+
+    monitor = HealthMonitor(ttl=10)
+    monitor.register("api", probe)
+
+    assert (await monitor.check())["all_healthy"]
+    await monitor.check()
+    assert len(calls) == 1
+
+    clock.now += 11
+    await monitor.check()
+    assert len(calls) == 2
+
+    await monitor.check(force=True)
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_concurrent_checks_share_one_probe_run():
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return True
+
+    monitor = HealthMonitor()
+    monitor.register("api", probe)
+
+    results = await asyncio.gather(*(monitor.check(force=True) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result["api"] for result in results)
+
+@pytest.mark.asyncio
+async def test_open_breaker_is_reported_and_skips_probe(clock):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        return False
+
+    monitor = HealthMonitor(failure_threshold=2, reset_timeout=30)
+    monitor.register("critical_api", probe)
+    monitor.register("optional_api", probe, critical=False)
+
+    await monitor.check(force=True)
+    status = await monitor.check(force=True)
+
+    assert status["open_breakers"] == ["critical_api"]
+    assert not monitor.is_available("critical_api")
+    assert len(calls) == 4
+
+    await monitor.check(force=True)
+    assert len(calls) == 4
+
+@pytest.mark.asyncio
+async def test_open_breaker_pauses_admission_without_liquidating():
+    engine = TradingEngine(load_settings())
+    closed = []
+
+    async def close_all(reason):
+        closed.append(reason)
+
+    async def check_apis():
+        return {'oneinch': False, 'all_healthy': False, 'open_breakers': ['oneinch']}
+
+    engine._close_all_positions = close_all
+    engine._check_apis_health = check_apis
+    engine.health_monitor.breakers['oneinch'].state = STATE_OPEN
+    engine.signal_queue.push({'symbol': 'ETH', 'price': 1.0, 'confidence': 0.9})
+
+    engine.active = True
+    task = asyncio.create_task(engine._health_check_loop())
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    assert engine.active
+    assert closed == []
+    assert engine._admit_queued_signals() == []
+
+@pytest.mark.asyncio
+async def test_risk_limit_breach_still_liquidates():
+    engine = TradingEngine(load_settings())
+    closed = []
+
+    async def close_all(reason):
+        closed.append(reason)
+
+    async def check_apis():
+        return {'oneinch': True, 'all_healthy': True, 'open_breakers': []}
+
+    engine._close_all_positions = close_all
+    engine._check_apis_health = check_apis
+    engine.consecutive_losses = engine.settings.consecutive_loss_limit
+
+    engine.active = True
+    task = asyncio.create_task(engine._health_check_loop())
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    assert closed == ["emergency_stop"]
+    assert not engine.active
@@ -0,0 +1,36 @@
+"""
+Testes dos indicadores incrementais
+"""
+
+import numpy as np
+import pytest
+
+from strategies.indicators import EMA, RollingMax, RollingMin, SMA, StreamingIndicator
+
+def test_base_indicator_is_abstract():
+    with pytest.raises(TypeError):
+        StreamingIndicator(5)
+
+def test_sma_and_ema_match_batch_computation():
+    prices = [10.0, 11.0, 12.5, 11.5, 13.0, 14.0, 12.0]
+    sma, ema = SMA(3), EMA(3)
+    for price in prices:
+        sma.update(price)
+        ema.update(price)
+
+    expected_ema = prices[0]
+    for price in prices[1:]:
+        expected_ema += 0.5 * (price - expected_ema)
+
+    assert sma.ready
+    assert sma.value == pytest.approx(np.mean(prices[-3:]))
+    assert ema.value == pytest.approx(expected_ema)
+
+def test_rolling_extremes_follow_window():
+    high, low = RollingMax(3), RollingMin(3)
+    for price in [5.0, 9.0, 7.0, 6.0, 4.0]:
+        high.update(price)
+        low.update(price)
+
+    assert high.value == 7.0
+    assert low.value == 4.0
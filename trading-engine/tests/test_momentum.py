@@ -0,0 +1,102 @@
+"""
+Testes de paridade entre a análise de momentum vetorizada e a escalar
+"""
+
+import numpy as np
+import pytest
+
+from config.settings import load_settings
+from strategies.momentum import MomentumStrategy
+
+def _market_data(rng, tokens):
+    return {
+        token_id: {
+            'symbol': token_id.upper(),
+            'price': float(rng.uniform(0.5, 50.0)),
+            'volume_24h': float(rng.uniform(1e5, 1e7)),
+            'market_cap': float(rng.choice([5e6, 5e7, 5e8])),
+            'market_cap_rank': int(rng.integers(1, 500)),
+            'price_change_24h': float(rng.uniform(-20.0, 20.0)),
+        }
+        for token_id in tokens
+    }
+
+def _histories(rng, lookback):
+    """Históricos aleatórios com tamanhos mistos e casos de borda"""
+    histories = {}
+    for i in range(40):
+        length = int(rng.integers(1, lookback * 3))
+        start = rng.uniform(0.5, 50.0)
+        # Tendência de alta frequente para gerar breakouts
+        prices = start * np.cumprod(1 + rng.normal(0.01, 0.02, length))
+        volumes = rng.uniform(1e5, 1e6, length)
+        volumes[-1] *= rng.uniform(0.5, 4.0)
+        histories[f"tok{i}"] = (prices.tolist(), volumes.tolist())
+
+    # Menos que lookback_period
+    histories['short'] = ([1.0] * (lookback - 1), [1e5] * (lookback - 1))
+    # Preço estável
+    histories['flat'] = ([2.0] * lookback * 2, [1e5] * (lookback * 2 - 1) + [1e7])
+    # Preços zerados (divisão por zero não pode gerar sinal)
+    histories['zero'] = ([0.0] * (lookback - 1) + [1.0], [1e5] * (lookback - 1) + [1e7])
+    histories['zero_tail'] = ([1.0] * (lookback - 1) + [0.0], [1e5] * (lookback - 1) + [1e7])
+    # Volume médio zero
+    histories['no_volume'] = (
+        [1.0 + 0.05 * i for i in range(lookback)], [0.0] * (lookback - 1) + [1e6]
+    )
+    return histories
+
+def _strategy(vectorized, histories):
+    settings = load_settings()
+    settings.momentum_vectorized = vectorized
+    strategy = MomentumStrategy(settings)
+    for token_id, (prices, volumes) in histories.items():
+        strategy.seed_history(token_id, prices, volumes)
+    return strategy
+
+def _key(signal):
+    return signal['token_id'], signal['type'], signal['confidence'], signal['metadata']['trend_strength']
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", range(8))
+async def test_vectorized_matches_scalar_analysis(seed):
+    rng = np.random.default_rng(seed)
+    lookback = MomentumStrategy(load_settings()).lookback_period
+    histories = _histories(rng, lookback)
+    market_data = _market_data(rng, histories)
+
+    vectorized = _strategy(True, histories)
+    scalar = _strategy(False, histories)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = []
+        for token_id, data in market_data.items():
+            if scalar._has_sufficient_data(token_id):
+                signal = await scalar._analyze_momentum(token_id, data)
+                if signal:
+                    expected.append(signal)
+        actual = vectorized._analyze_momentum_vectorized(market_data)
+
+    expected_keys = sorted(_key(signal) for signal in expected)
+    actual_keys = sorted(_key(signal) for signal in actual)
+
+    assert [k[:2] for k in actual_keys] == [k[:2] for k in expected_keys]
+    for got, want in zip(actual_keys, expected_keys):
+        assert got[2] == pytest.approx(want[2])
+        assert got[3] == pytest.approx(want[3])
+    assert not {'short', 'flat', 'zero_tail'} & {k[0] for k in actual_keys}
+
+@pytest.mark.asyncio
+async def test_analyze_generates_signals_with_default_settings():
+    settings = load_settings()
+    assert settings.momentum_vectorized is False
+
+    strategy = MomentumStrategy(settings)
+    prices = [1.0, 1.02, 1.05, 1.08, 1.12]
+    strategy.seed_history('pump', prices[:-1], [1e5] * 4)
+    signals = await strategy.analyze({
+        'pump': {'symbol': 'PUMP', 'price': prices[-1], 'volume_24h': 1e6,
+                 'market_cap': 5e8, 'market_cap_rank': 50, 'price_change_24h': 8.0}
+    })
+
+    assert [signal['symbol'] for signal in signals] == ['PUMP']
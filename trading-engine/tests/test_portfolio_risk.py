@@ -0,0 +1,157 @@
+"""
+Testes do modelo de risco de portfólio (covariância EWMA, VaR/CVaR e lotes)
+"""
+
+import math
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from config.settings import load_settings
+from core.portfolio_risk import MIN_SAMPLES, PortfolioRiskModel
+from core.position_index import PositionIndex
+from core.risk_manager import RiskManager
+
+def random_walk(seed: int, symbols, steps: int):
+    rng = np.random.default_rng(seed)
+    prices = {symbol: 100.0 for symbol in symbols}
+    for _ in range(steps):
+        prices = {symbol: price * math.exp(rng.normal(0, 0.01)) for symbol, price in prices.items()}
+        yield prices
+
+def feed(model: PortfolioRiskModel, ticks, start: int = 0):
+    for i, prices in enumerate(ticks, start):
+        model.update_prices(prices, now=i * model.sample_seconds)
+
+def full_variance(model: PortfolioRiskModel, exposures) -> float:
+    weights = np.array([exposures.get(symbol, 0.0) for symbol in model._symbols])
+    return float(weights @ model._cov @ weights)
+
+def test_ewma_covariance_update():
+    model = PortfolioRiskModel(decay=0.9)
+    ticks = [{'A': 100.0, 'B': 50.0}, {'A': 101.0, 'B': 49.0}, {'A': 100.0, 'B': 49.5}]
+    feed(model, ticks)
+
+    expected = np.zeros((2, 2))
+    for previous, current in zip(ticks, ticks[1:]):
+        r = np.log([current['A'] / previous['A'], current['B'] / previous['B']])
+        expected = 0.9 * expected + 0.1 * np.outer(r, r)
+
+    assert model._cov == pytest.approx(expected)
+    assert list(model._samples) == [2, 2]
+
+def test_samples_closer_than_interval_are_ignored():
+    model = PortfolioRiskModel(sample_seconds=60)
+
+    assert model.update_prices({'A': 100.0}, now=0.0)
+    assert not model.update_prices({'A': 110.0}, now=30.0)
+    assert model.update_prices({'A': 101.0}, now=60.0)
+    assert model._samples[0] == 1
+
+def test_new_tokens_extend_the_matrix():
+    model = PortfolioRiskModel()
+    feed(model, random_walk(1, ['A'], 5))
+    version = model.version
+
+    model.update_prices({'A': 100.0, 'B': 10.0}, now=10 * model.sample_seconds)
+
+    assert model._symbols == ['A', 'B']
+    assert model._cov.shape == (2, 2)
+    assert model._cov[1].tolist() == [0.0, 0.0]
+    assert model._samples[1] == 0
+    assert not model.is_ready('B')
+    assert model.version > version
+
+def test_parametric_and_historical_var():
+    model = PortfolioRiskModel(confidence=0.95, horizon_minutes=60, sample_seconds=60)
+    feed(model, random_walk(2, ['A', 'B'], 200))
+    exposures = {'A': 100.0, 'B': 50.0}
+
+    parametric = model.parametric_var(exposures)
+    sigma = math.sqrt(full_variance(model, exposures)) * model.horizon_scale
+    assert parametric['volatility'] == pytest.approx(sigma)
+    assert parametric['var'] == pytest.approx(model.z * sigma)
+    assert parametric['cvar'] > parametric['var']
+
+    historical = model.historical_var(exposures)
+    weights = np.array([100.0, 50.0])
+    pnl = model._returns[:model._returns_count] @ weights * model.horizon_scale
+    assert historical['scenarios'] == 199
+    assert historical['var'] == pytest.approx(-np.quantile(pnl, 0.05))
+    assert historical['cvar'] >= historical['var']
+
+def test_check_candidate_matches_full_recomputation():
+    model = PortfolioRiskModel()
+    feed(model, random_walk(3, ['A', 'B', 'C'], MIN_SAMPLES + 5))
+    exposures = {'A': 100.0, 'B': 40.0}
+
+    cached = model.check_candidate(exposures, 'C', 25.0, limit=1e9, book_version=1)
+    # Segunda consulta usa o livro em cache
+    cached = model.check_candidate(exposures, 'C', 25.0, limit=1e9, book_version=1)
+
+    after = math.sqrt(full_variance(model, {**exposures, 'C': 25.0}))
+    assert cached['var_after'] == pytest.approx(model.z * after * model.horizon_scale)
+    assert cached['var_before'] == pytest.approx(
+        model.z * math.sqrt(full_variance(model, exposures)) * model.horizon_scale
+    )
+
+def test_candidate_without_history_passes():
+    model = PortfolioRiskModel()
+    feed(model, random_walk(4, ['A'], 5))
+
+    result = model.check_candidate({'A': 100.0}, 'A', 1e6, limit=0.0)
+    assert result['passed']
+    assert result['reason'] == 'insufficient_history'
+
+def test_batch_accumulates_approvals_with_marginal_update():
+    model = PortfolioRiskModel()
+    feed(model, random_walk(5, ['A', 'B', 'C'], MIN_SAMPLES + 5))
+    exposures = {'A': 100.0}
+
+    batch = model.batch(exposures, book_version=7)
+    cached_cov_weights = model._book_cache[2].copy()
+    batch.add('B', 30.0)
+    batch.add('A', 20.0)
+    result = batch.check('C', 10.0, limit=1e9)
+
+    expected = math.sqrt(full_variance(model, {'A': 120.0, 'B': 30.0, 'C': 10.0}))
+    assert result['var_after'] == pytest.approx(model.z * expected * model.horizon_scale)
+    assert batch.variance == pytest.approx(full_variance(model, {'A': 120.0, 'B': 30.0}))
+    # O livro em cache do modelo não é alterado pelo lote
+    assert model._book_cache[2] == pytest.approx(cached_cov_weights)
+
+@pytest.mark.asyncio
+async def test_validate_trades_uses_cached_book_for_batch(monkeypatch):
+    settings = load_settings()
+    settings.capital_usdt = 1000.0
+    settings.max_position_size_percent = 10.0
+    settings.max_simultaneous_trades = 10
+    risk_manager = RiskManager(settings)
+    monkeypatch.setattr(risk_manager, '_check_time_restrictions',
+                        lambda: {'name': 'time_restrictions', 'passed': True})
+
+    model = risk_manager.portfolio_risk
+    feed(model, random_walk(6, ['A', 'B', 'C', 'D'], MIN_SAMPLES + 5))
+    positions = PositionIndex()
+    positions.add('open-1', {'symbol': 'A', 'position_size': 100.0})
+
+    # Limite entre o VaR do livro com duas e com três novas posições
+    size = risk_manager.calculate_position_size(10.0, settings.capital_usdt, 'B')
+    var = lambda exposures: model.z * math.sqrt(full_variance(model, exposures)) * model.horizon_scale
+    two = var({'A': 100.0, 'B': size, 'C': size})
+    three = var({'A': 100.0, 'B': size, 'C': size, 'D': size})
+    risk_manager.limits = replace(risk_manager.limits, portfolio_var_limit=(two + three) / 2)
+
+    books = []
+    original_book = model._book
+    monkeypatch.setattr(model, '_book', lambda *args: books.append(args) or original_book(*args))
+
+    decisions = await risk_manager.validate_trades(
+        [{'symbol': symbol, 'price': 10.0, 'confidence': 0.9} for symbol in ('B', 'C', 'D')],
+        {}, positions
+    )
+
+    assert [decision['approved'] for decision in decisions] == [True, True, False]
+    assert decisions[2]['reasons'] == ['portfolio_var']
+    assert len(books) == 1
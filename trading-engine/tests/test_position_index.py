@@ -0,0 +1,110 @@
+"""
+Testes do índice de posições por símbolo, chain e estratégia
+"""
+
+import pytest
+
+from core.position_index import PositionIndex
+
+def position(symbol: str, size: float, chain_id: int = 1, strategy: str = "Momentum") -> dict:
+    return {'symbol': symbol, 'position_size': size, 'chain_id': chain_id, 'strategy': strategy}
+
+def test_add_updates_counts_and_exposures():
+    index = PositionIndex()
+    index.add("t1", position("ETH", 100.0))
+    index.add("t2", position("ETH", 50.0, chain_id=137))
+    index.add("t3", position("SOL", 25.0, strategy="Breakout"))
+
+    assert len(index) == 3
+    assert index.count_by_symbol("ETH") == 2
+    assert index.count_by_chain(1) == 2
+    assert index.count_by_strategy("Momentum") == 2
+    assert index.symbol_exposure("ETH") == pytest.approx(150.0)
+    assert index.chain_exposure(137) == pytest.approx(50.0)
+    assert index.strategy_exposure("Breakout") == pytest.approx(25.0)
+    assert index.total_exposure == pytest.approx(175.0)
+    assert index.trades_for_symbol("ETH") == {"t1", "t2"}
+    assert index.largest_symbol_exposure() == ("ETH", pytest.approx(150.0))
+
+def test_remove_drops_empty_keys():
+    index = PositionIndex()
+    index.add("t1", position("ETH", 100.0))
+    index.add("t2", position("SOL", 25.0, chain_id=137, strategy="Breakout"))
+
+    assert index.remove("t2")
+
+    assert index.count_by_symbol("SOL") == 0
+    assert index.count_by_chain(137) == 0
+    assert index.count_by_strategy("Breakout") == 0
+    assert index.symbol_exposure("SOL") == 0.0
+    assert "SOL" not in index.symbol_exposures()
+    assert index.total_exposure == pytest.approx(100.0)
+
+    index.remove("t1")
+    assert index.total_exposure == 0.0
+    assert index.summary()['max_concentration'] == 0.0
+
+def test_reservations_count_with_defaults():
+    index = PositionIndex(default_chain_id=56, default_strategy="api")
+
+    # Reserva pendente (sem chain/estratégia) e trade da API (usa 'pair')
+    index.add("res-1", {'symbol': 'ETH', 'position_size': 40.0})
+    index.add("api-1", {'pair': 'BTC', 'amount': 1.0})
+
+    assert index.count_by_symbol("ETH") == 1
+    assert index.count_by_symbol("BTC") == 1
+    assert index.count_by_chain(56) == 2
+    assert index.count_by_strategy("api") == 2
+    assert index.symbol_exposure("BTC") == 0.0
+    assert index.total_exposure == pytest.approx(40.0)
+
+def test_readd_replaces_previous_entry():
+    index = PositionIndex()
+    index.add("t1", position("ETH", 100.0))
+    index.add("t1", position("SOL", 30.0))
+
+    assert len(index) == 1
+    assert index.count_by_symbol("ETH") == 0
+    assert index.symbol_exposure("SOL") == pytest.approx(30.0)
+    assert index.total_exposure == pytest.approx(30.0)
+
+def test_version_changes_on_every_mutation():
+    index = PositionIndex()
+    versions = [index.version]
+
+    index.add("t1", position("ETH", 100.0))
+    versions.append(index.version)
+    index.add("t2", position("SOL", 10.0))
+    versions.append(index.version)
+    index.remove("t1")
+    versions.append(index.version)
+    index.clear()
+    versions.append(index.version)
+
+    assert versions == sorted(set(versions))
+    assert len(index) == 0
+
+def test_removing_unknown_id_is_harmless():
+    index = PositionIndex()
+    index.add("t1", position("ETH", 100.0))
+    version = index.version
+
+    assert not index.remove("missing")
+    assert not index.remove("missing")
+
+    assert index.version == version
+    assert len(index) == 1
+    assert index.total_exposure == pytest.approx(100.0)
+
+def test_summary_groups_positions():
+    index = PositionIndex()
+    index.add("t1", position("ETH", 75.0))
+    index.add("t2", position("SOL", 25.0, chain_id=137))
+
+    summary = index.summary()
+
+    assert summary['positions'] == 2
+    assert summary['by_symbol']['ETH'] == {'positions': 1, 'exposure': 75.0}
+    assert summary['by_chain'][137] == {'positions': 1, 'exposure': 25.0}
+    assert summary['by_strategy']['Momentum'] == {'positions': 2, 'exposure': 100.0}
+    assert summary['max_concentration'] == pytest.approx(0.75)
@@ -0,0 +1,129 @@
+"""
+Testes da busca de dados de mercado em lote e do cache swr do PriceDataClient
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from integrations.price_cache import BackgroundCacheRefresher
+from integrations.price_data import PriceDataClient
+
+def market_entry(token_id: str, price: float = 10.0) -> dict:
+    return {
+        "id": token_id,
+        "symbol": token_id[:3],
+        "name": token_id,
+        "current_price": price,
+        "market_cap": 1e9,
+        "total_volume": 1e6,
+        "price_change_percentage_24h": 1.0,
+        "market_cap_rank": 50,
+        "sparkline_in_7d": {"price": [price]}
+    }
+
+def make_client(responses) -> PriceDataClient:
+    settings = load_settings()
+    settings.market_data_batch_size = 2
+    settings.price_cache_mode = "blocking"
+    client = PriceDataClient(settings)
+    client.calls = []
+
+    async def get_json(url, params=None):
+        client.calls.append((url.rsplit("/", 1)[-1], params and params.get("ids")))
+        return responses(url, params)
+
+    client._get_json = get_json
+    return client
+
+@pytest.mark.asyncio
+async def test_failed_page_serves_stale_cache_without_per_token_fallback():
+    def responses(url, params):
+        if url.endswith("/coins/markets"):
+            ids = params["ids"].split(",")
+            if "a" in ids:
+                return 500, None
+            return 200, [market_entry(token_id) for token_id in ids if token_id != "d"]
+        return 200, {"id": "d", "symbol": "d", "name": "d", "market_data": {"current_price": {"usd": 4.0}}}
+
+    client = make_client(responses)
+    client.price_cache["a"] = {"id": "a", "price": 1.0}
+    client.last_update["a"] = datetime.now() - timedelta(hours=1)
+
+    data = await client._get_market_data_batched(["a", "b", "c", "d"])
+
+    assert data["a"]["price"] == 1.0
+    assert data["a"]["cache_age"] >= 3600
+    assert "b" not in data
+    assert data["c"]["price"] == 10.0
+    assert "d" in data
+
+    # Só o id ausente da página bem-sucedida usa o endpoint individual
+    individual = [endpoint for endpoint, _ in client.calls if endpoint != "markets"]
+    assert individual == ["d"]
+
+    # A página que falhou não atualiza o cache e é tentada de novo no próximo ciclo
+    assert client.last_update["a"] < datetime.now() - timedelta(minutes=59)
+    await client._get_market_data_batched(["a", "b"])
+    assert client.calls[-1] == ("markets", "a,b")
+
+def make_swr_client(responses) -> PriceDataClient:
+    client = make_client(responses)
+    client.cache_mode = "swr"
+    client.settings.price_cache_max_stale = 600
+    # Refresher considerado ativo sem iniciar a task de background
+    client.cache_refresher.is_running = lambda: True
+    return client
+
+def market_pages(url, params):
+    return 200, [market_entry(token_id, 20.0) for token_id in params["ids"].split(",")]
+
+@pytest.mark.asyncio
+async def test_swr_serves_stale_entry_with_cache_age():
+    client = make_swr_client(market_pages)
+    client.price_cache["a"] = {"id": "a", "price": 1.0}
+    client.last_update["a"] = datetime.now() - timedelta(seconds=client.settings.price_update_interval * 2)
+
+    data = await client._get_market_data_batched(["a"])
+
+    assert data["a"]["price"] == 1.0
+    assert data["a"]["cache_age"] >= client.settings.price_update_interval * 2
+    assert client.calls == []
+
+@pytest.mark.asyncio
+async def test_swr_fetches_synchronously_past_max_stale():
+    client = make_swr_client(market_pages)
+    client.price_cache["a"] = {"id": "a", "price": 1.0}
+    client.last_update["a"] = datetime.now() - timedelta(seconds=601)
+
+    data = await client._get_market_data_batched(["a"])
+
+    assert data["a"]["price"] == 20.0
+    assert client.calls == [("markets", "a")]
+
+@pytest.mark.asyncio
+async def test_refresher_retries_failed_keys_after_a_cycle():
+    last_update = {}
+    calls = []
+
+    async def refresh(keys):
+        calls.append(datetime.now())
+        # Primeira atualização falha sem tocar no cache
+        if len(calls) > 1:
+            for key in keys:
+                last_update[key] = datetime.now()
+
+    refresher = BackgroundCacheRefresher("test", last_update, keys=lambda: ["a"], refresh=refresh,
+                                         ttl=0.1, refresh_ahead_ratio=1.0, min_interval=0.01)
+    refresher.start()
+    await asyncio.sleep(0.05)
+    assert len(calls) == 1
+    assert refresher._due_keys() == []
+
+    await asyncio.sleep(0.1)
+    await refresher.stop()
+    assert len(calls) >= 2
+    assert (calls[1] - calls[0]).total_seconds() >= 0.09
+    assert "a" in last_update
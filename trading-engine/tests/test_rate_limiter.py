@@ -0,0 +1,86 @@
+"""
+Testes do limitador de taxa compartilhado do CoinGecko
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from integrations.price_data_real import RealPriceDataClient
+from integrations.rate_limiter import TokenBucketRateLimiter
+
+class FakeResponse:
+    def __init__(self, status: int, data, delay: float = 0.0):
+        self.status = status
+        self.data = data
+        self.delay = delay
+        self.headers = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.data
+
+class FakeSession:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = 0
+
+    def get(self, url, params=None):
+        self.requests += 1
+        return FakeResponse(200, {"ok": True}, self.delay)
+
+@pytest.mark.asyncio
+async def test_timeout_does_not_count_limiter_wait():
+    # Uma requisição a cada 0,3s: a segunda espera o orçamento bem mais que o timeout
+    limiter = TokenBucketRateLimiter(requests_per_minute=200, burst=1)
+    session = FakeSession()
+
+    results = await asyncio.gather(*(
+        limiter.get_json(session, "http://api/ping", timeout=0.1) for _ in range(2)
+    ))
+
+    assert results == [(200, {"ok": True})] * 2
+    assert limiter.stats["throttled"] == 1
+
+@pytest.mark.asyncio
+async def test_timeout_applies_to_http_request():
+    limiter = TokenBucketRateLimiter(requests_per_minute=600)
+    session = FakeSession(delay=0.3)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await limiter.get_json(session, "http://api/ping", timeout=0.05)
+
+def test_limiter_can_be_shared_across_event_loops():
+    # burst=1: chamadores concorrentes disputam o lock enquanto o primeiro espera
+    limiter = TokenBucketRateLimiter(requests_per_minute=6000, burst=1)
+    session = FakeSession()
+
+    async def fetch():
+        return await asyncio.gather(*(limiter.get_json(session, "http://api/ping") for _ in range(3)))
+
+    # Cada asyncio.run cria um loop novo; o lock é recriado para cada um
+    assert asyncio.run(fetch()) == [(200, {"ok": True})] * 3
+    assert asyncio.run(fetch()) == [(200, {"ok": True})] * 3
+    assert session.requests == 6
+
+@pytest.mark.asyncio
+async def test_real_client_requests_use_price_timeout():
+    settings = load_settings()
+    settings.price_request_timeout = 0.05
+    client = RealPriceDataClient(settings)
+    client.rate_limiter = TokenBucketRateLimiter(requests_per_minute=600)
+    await client.initialize(FakeSession(delay=0.3))
+    client.price_cache["ethereum"] = {"price": 1.0}
+    client.last_update["ethereum"] = datetime.now() - timedelta(hours=1)
+
+    prices = await asyncio.wait_for(client.get_real_prices(["ethereum"]), timeout=0.2)
+
+    assert prices == {"ethereum": {"price": 1.0}}
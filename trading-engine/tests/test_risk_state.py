@@ -0,0 +1,115 @@
+"""
+Testes dos agregados de risco incrementais
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from core.risk_state import RISK_HIGH, RISK_LOW, RISK_MEDIUM, RiskLimits, RiskState
+
+def make_state(capital: float = 1000.0, daily_loss_percent: float = 10.0,
+               consecutive_limit: int = 3, window_hours: float = 1.0) -> RiskState:
+    settings = load_settings()
+    settings.capital_usdt = capital
+    settings.max_daily_loss_percent = daily_loss_percent
+    settings.consecutive_loss_limit = consecutive_limit
+    settings.risk_rolling_window_hours = window_hours
+    return RiskState(RiskLimits.from_settings(settings))
+
+def test_record_updates_totals_and_daily_counters():
+    state = make_state()
+    now = datetime(2026, 3, 2, 10, 0)
+    state.daily_date = now.date()
+
+    state.record(20.0, True, now)
+    state.record(-5.0, False, now)
+    state.record(10.0, True, now)
+
+    assert (state.total_trades, state.wins, state.losses) == (3, 2, 1)
+    assert state.realized_pnl == pytest.approx(25.0)
+    assert state.daily_pnl == pytest.approx(25.0)
+    assert state.daily_trades == 3
+    assert state.win_rate == pytest.approx(200 / 3)
+    assert state.equity == pytest.approx(1025.0)
+
+def test_roll_day_resets_only_daily_counters():
+    state = make_state()
+    monday = datetime(2026, 3, 2, 23, 0)
+    state.daily_date = monday.date()
+    state.record(-30.0, False, monday)
+
+    assert not state.roll_day(monday.date())
+    assert state.roll_day(monday.date() + timedelta(days=1))
+    assert (state.daily_trades, state.daily_wins, state.daily_pnl) == (0, 0, 0.0)
+    assert state.total_trades == 1
+    assert state.realized_pnl == pytest.approx(-30.0)
+    assert state.consecutive_losses == 1
+
+    # record em um dia novo também vira o dia antes de contar
+    state.record(5.0, True, monday + timedelta(days=2))
+    assert state.daily_date == (monday + timedelta(days=2)).date()
+    assert state.daily_trades == 1
+
+def test_rolling_window_evicts_old_losses():
+    state = make_state(window_hours=1.0)
+    start = datetime(2026, 3, 2, 10, 0)
+    state.daily_date = start.date()
+
+    state.record(-10.0, False, start)
+    state.record(-20.0, False, start + timedelta(minutes=30))
+    state.record(15.0, True, start + timedelta(minutes=40))
+
+    # Ganhos não entram na janela de perdas
+    assert state.rolling_window_loss(start + timedelta(minutes=45)) == pytest.approx(30.0)
+    assert state.rolling_window_loss(start + timedelta(minutes=61)) == pytest.approx(20.0)
+    assert state.rolling_window_loss(start + timedelta(minutes=91)) == 0.0
+    assert not state._rolling
+
+def test_max_drawdown_tracks_peak_equity():
+    state = make_state(capital=1000.0)
+    now = datetime(2026, 3, 2, 10, 0)
+    state.daily_date = now.date()
+
+    state.record(100.0, True, now)
+    state.record(-150.0, False, now)
+    state.record(30.0, True, now)
+
+    assert state.peak_equity == pytest.approx(1100.0)
+    assert state.drawdown == pytest.approx(120.0)
+    assert state.max_drawdown == pytest.approx(150.0)
+
+    # Nova máxima zera o drawdown corrente mas preserva o máximo
+    state.record(300.0, True, now)
+    assert state.peak_equity == pytest.approx(1280.0)
+    assert state.drawdown == 0.0
+    assert state.max_drawdown == pytest.approx(150.0)
+
+def test_consecutive_losses_reset_on_win_and_drive_risk_level():
+    state = make_state(capital=1000.0, daily_loss_percent=100.0, consecutive_limit=3)
+    now = datetime(2026, 3, 2, 10, 0)
+    state.daily_date = now.date()
+
+    state.record(-1.0, False, now)
+    assert state.risk_level == RISK_LOW
+    state.record(-1.0, False, now)
+    state.record(-1.0, False, now)
+    assert state.consecutive_losses == 3
+    assert state.consecutive_loss_limit_hit
+    assert state.risk_level == RISK_MEDIUM
+
+    state.record(2.0, True, now)
+    assert state.consecutive_losses == 0
+    assert not state.consecutive_loss_limit_hit
+    assert state.risk_level == RISK_LOW
+
+def test_restore_and_daily_loss_limit():
+    state = make_state(capital=1000.0, daily_loss_percent=10.0, consecutive_limit=3)
+
+    state.restore(daily_pnl=-100.0, consecutive_losses=3)
+
+    assert state.daily_loss == pytest.approx(100.0)
+    assert state.daily_loss_limit_hit
+    assert state.consecutive_loss_limit_hit
+    assert state.risk_level == RISK_HIGH
@@ -0,0 +1,89 @@
+"""
+Testes da validação de trades em lote do RiskManager
+"""
+
+import pytest
+
+from config.settings import load_settings
+from core.position_index import PositionIndex
+from core.risk_manager import RiskManager
+
+def make_risk_manager(monkeypatch, max_trades: int = 3, per_symbol: int = 1) -> RiskManager:
+    settings = load_settings()
+    settings.capital_usdt = 1000.0
+    settings.max_position_size_percent = 10.0
+    settings.max_simultaneous_trades = max_trades
+    settings.max_positions_per_symbol = per_symbol
+    risk_manager = RiskManager(settings)
+
+    # Independente do horário em que o teste roda
+    monkeypatch.setattr(risk_manager, '_check_time_restrictions',
+                        lambda: {'name': 'time_restrictions', 'passed': True})
+    return risk_manager
+
+def make_signal(symbol: str, confidence: float = 0.9) -> dict:
+    return {'symbol': symbol, 'price': 10.0, 'confidence': confidence}
+
+def reasons(decisions):
+    return [decision['reasons'] for decision in decisions]
+
+@pytest.mark.asyncio
+async def test_slots_are_allocated_in_order(monkeypatch):
+    risk_manager = make_risk_manager(monkeypatch, max_trades=3)
+    positions = PositionIndex()
+    positions.add("open-1", {'symbol': 'BTC', 'position_size': 100.0})
+
+    decisions = await risk_manager.validate_trades(
+        [make_signal(symbol) for symbol in ('ETH', 'SOL', 'ADA')], {}, positions
+    )
+
+    assert [decision['approved'] for decision in decisions] == [True, True, False]
+    assert reasons(decisions)[2] == ['max_simultaneous_trades']
+    assert decisions[0]['position_size'] == pytest.approx(100.0)
+
+@pytest.mark.asyncio
+async def test_capital_is_consumed_by_earlier_approvals(monkeypatch):
+    risk_manager = make_risk_manager(monkeypatch, max_trades=10)
+
+    decisions = await risk_manager.validate_trades(
+        [make_signal(symbol) for symbol in ('ETH', 'SOL', 'ADA')], {}, PositionIndex(),
+        available_capital=250.0
+    )
+
+    assert [decision['approved'] for decision in decisions] == [True, True, False]
+    assert reasons(decisions)[2] == ['insufficient_capital']
+
+@pytest.mark.asyncio
+async def test_rejected_signal_does_not_consume_slot(monkeypatch):
+    risk_manager = make_risk_manager(monkeypatch, max_trades=2)
+
+    decisions = await risk_manager.validate_trades(
+        [make_signal('ETH', confidence=0.1), make_signal('SOL'), make_signal('ADA')], {}, PositionIndex()
+    )
+
+    assert [decision['approved'] for decision in decisions] == [False, True, True]
+    assert reasons(decisions)[0] == ['market_conditions']
+
+@pytest.mark.asyncio
+async def test_symbol_limit_counts_open_positions_and_batch(monkeypatch):
+    risk_manager = make_risk_manager(monkeypatch, max_trades=10, per_symbol=1)
+    positions = PositionIndex()
+    positions.add("open-1", {'symbol': 'BTC', 'position_size': 100.0})
+
+    decisions = await risk_manager.validate_trades(
+        [make_signal('BTC'), make_signal('ETH'), make_signal('ETH')], {}, positions
+    )
+
+    assert [decision['approved'] for decision in decisions] == [False, True, False]
+    assert reasons(decisions)[0] == ['symbol_exposure']
+    assert reasons(decisions)[2] == ['symbol_exposure']
+
+@pytest.mark.asyncio
+async def test_shared_check_failure_rejects_whole_batch(monkeypatch):
+    risk_manager = make_risk_manager(monkeypatch)
+    risk_manager.update_trade_result(-1000.0, False)
+
+    decisions = await risk_manager.validate_trades([make_signal('ETH'), make_signal('SOL')], {}, PositionIndex())
+
+    assert not any(decision['approved'] for decision in decisions)
+    assert all('daily_loss_limit' in decision['reasons'] for decision in decisions)
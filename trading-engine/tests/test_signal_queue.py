@@ -0,0 +1,131 @@
+"""
+Testes da fila de sinais e da execução de sinais enfileirados
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import load_settings
+from core.engine import TradingEngine
+from core.signal_queue import SignalPriorityQueue
+
+def make_signal(symbol: str, confidence: float, age_seconds: float = 0.0, price: float = 100.0) -> dict:
+    now = datetime.now()
+    return {
+        'symbol': symbol,
+        'price': price,
+        'confidence': confidence,
+        'timestamp': now - timedelta(seconds=age_seconds),
+        'expiry': now + timedelta(minutes=30)
+    }
+
+def test_admits_best_signals_within_slots_and_capital():
+    queue = SignalPriorityQueue()
+    queue.extend([make_signal('A', 0.7), make_signal('B', 0.9), make_signal('C', 0.8)])
+
+    admitted = queue.admit(2, 1000.0, lambda signal: 100.0)
+
+    assert [signal['symbol'] for signal in admitted] == ['B', 'C']
+    assert len(queue) == 1
+
+def test_signal_that_does_not_fit_capital_is_deferred():
+    queue = SignalPriorityQueue()
+    queue.extend([make_signal('A', 0.9), make_signal('B', 0.8)])
+
+    sizes = {'A': 500.0, 'B': 100.0}
+    admitted = queue.admit(2, 200.0, lambda signal: sizes[signal['symbol']])
+
+    assert [signal['symbol'] for signal in admitted] == ['B']
+    assert len(queue) == 1
+
+def test_newer_signal_replaces_queued_entry():
+    queue = SignalPriorityQueue()
+    queue.push(make_signal('A', 0.9, price=100.0))
+    queue.push(make_signal('A', 0.6, price=90.0))
+
+    admitted = queue.admit(5, 1000.0, lambda signal: 100.0)
+
+    assert len(admitted) == 1
+    assert admitted[0]['price'] == 90.0
+    assert queue.get_stats()['replaced'] == 1
+
+def test_signals_older_than_max_age_are_dropped():
+    dropped = []
+    queue = SignalPriorityQueue(max_age=timedelta(seconds=5), on_drop=dropped.append)
+    queue.extend([make_signal('OLD', 0.9, age_seconds=10), make_signal('NEW', 0.5)])
+
+    admitted = queue.admit(5, 1000.0, lambda signal: 100.0)
+
+    assert [signal['symbol'] for signal in admitted] == ['NEW']
+    assert [signal['symbol'] for signal in dropped] == ['OLD']
+
+def test_purge_releases_stale_signals():
+    dropped = []
+    queue = SignalPriorityQueue(max_age=timedelta(seconds=5), on_drop=dropped.append)
+    queue.extend([make_signal('OLD', 0.9, age_seconds=10), make_signal('NEW', 0.5)])
+
+    assert queue.purge_expired() == 1
+    assert len(queue) == 1
+    assert [signal['symbol'] for signal in dropped] == ['OLD']
+
+def test_dropped_signal_releases_strategy_dedup():
+    engine = TradingEngine(load_settings())
+    registry = engine.strategy.signal_registry
+    registry.register('ETH', engine.strategy.name)
+
+    stale = make_signal('ETH', 0.9, age_seconds=engine.settings.price_update_interval + 1)
+    engine.signal_queue.push(stale)
+    engine.signal_queue.purge_expired()
+
+    assert not registry.contains('ETH', engine.strategy.name)
+
+@pytest.mark.asyncio
+async def test_trade_levels_follow_execution_price():
+    engine = TradingEngine(load_settings())
+
+    async def execute_swap(from_token, to_token, amount, slippage):
+        return {'success': True, 'execution_price': 110.0, 'amount_out': amount / 110.0, 'tx_hash': '0x1'}
+
+    engine.oneinch_client.execute_swap = execute_swap
+    await engine._execute_trade(make_signal('ETH', 0.9, price=100.0), position_size=100.0)
+
+    trade = next(iter(engine.active_trades.values()))
+    settings = engine.settings
+    assert trade['entry_price'] == 110.0
+    assert trade['stop_loss'] == pytest.approx(110.0 * (1 - settings.stop_loss_percent / 100))
+    assert trade['take_profit'] == pytest.approx(110.0 * (1 + settings.take_profit_percent / 100))
+    assert engine.trigger_index.stop_level(trade['id']) >= trade['stop_loss']
+
+@pytest.mark.asyncio
+async def test_rejected_and_failed_signals_release_strategy_dedup():
+    engine = TradingEngine(load_settings())
+    registry = engine.strategy.signal_registry
+    name = engine.strategy.name
+    for symbol in ('REJ', 'FAIL', 'OK'):
+        registry.register(symbol, name)
+
+    async def validate_trades(signals, active_trades, positions, available_capital):
+        return [
+            {'signal': signal, 'approved': signal['symbol'] != 'REJ',
+             'position_size': 10.0, 'reasons': [] if signal['symbol'] != 'REJ' else ['limit']}
+            for signal in signals
+        ]
+
+    async def execute_swap(from_token, to_token, amount, slippage):
+        if to_token == 'FAIL':
+            return {'success': False, 'error': 'swap failed'}
+        return {'success': True, 'execution_price': 100.0, 'amount_out': amount / 100.0, 'tx_hash': '0x1'}
+
+    engine.risk_manager.validate_trades = validate_trades
+    engine.oneinch_client.execute_swap = execute_swap
+    await engine._process_trading_signals([
+        {**make_signal(symbol, confidence), 'type': 'buy'}
+        for symbol, confidence in (('REJ', 0.9), ('FAIL', 0.8), ('OK', 0.7))
+    ])
+
+    assert not registry.contains('REJ', name)
+    assert not registry.contains('FAIL', name)
+    assert registry.contains('OK', name)
+    assert [trade['symbol'] for trade in engine.active_trades.values()] == ['OK']
+    assert not engine.pending_trades
@@ -0,0 +1,144 @@
+"""
+Testes do journal de trades (replay após compactação)
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from config.settings import load_settings
+from core.engine import TradingEngine
+from core.trade_journal import (
+    TradeJournal, EVENT_EXECUTION, EVENT_STOP_UPDATE, EVENT_CLOSE, EVENT_TRAILING_PEAK
+)
+
+def make_trade(trade_id: str, symbol: str = "ETH") -> dict:
+    return {
+        'id': trade_id,
+        'symbol': symbol,
+        'entry_price': 100.0,
+        'amount': 1.0,
+        'stop_loss': 95.0,
+        'take_profit': 120.0,
+        'position_size': 100.0,
+        'timestamp': datetime.now()
+    }
+
+def crash(journal: TradeJournal):
+    """Simula um crash: fecha o arquivo sem compactar"""
+    journal.task.cancel()
+    journal._file.close()
+
+@pytest.mark.asyncio
+async def test_replay_after_compaction(tmp_path):
+    path = tmp_path / "trades.jsonl"
+    journal = TradeJournal(str(path), compact_every=1000)
+    journal.open()
+    journal.start()
+
+    journal.record(EVENT_EXECUTION, make_trade("a"))
+    journal.record(EVENT_EXECUTION, make_trade("b"))
+    journal.record(EVENT_CLOSE, {'trade_id': "a", 'pnl': -5.0, 'reason': "stop_loss"})
+    await journal.compact()
+
+    assert path.read_text() == ""
+    assert journal.snapshot_path.exists()
+
+    # Eventos após o snapshot ficam só no journal
+    journal.record(EVENT_EXECUTION, make_trade("c", "SOL"))
+    journal.record(EVENT_STOP_UPDATE, {'trade_id': "b", 'stop_loss': 99.0})
+    crash(journal)
+
+    state = TradeJournal(str(path)).open()
+
+    assert set(state['active_trades']) == {"b", "c"}
+    assert state['active_trades']["b"]['stop_loss'] == 99.0
+    assert state['daily_pnl'] == -5.0
+    assert state['consecutive_losses'] == 1
+
+@pytest.mark.asyncio
+async def test_events_recorded_during_compaction_survive(tmp_path):
+    path = tmp_path / "trades.jsonl"
+    journal = TradeJournal(str(path))
+    journal.open()
+    journal.start()
+    journal.record(EVENT_EXECUTION, make_trade("a"))
+
+    # O snapshot é escrito em thread; um evento chega antes de a escrita terminar
+    compaction = asyncio.create_task(journal.compact())
+    await asyncio.sleep(0)
+    journal.record(EVENT_EXECUTION, make_trade("b"))
+    await compaction
+
+    assert path.read_text() != ""
+    assert journal._events_since_snapshot == 1
+    crash(journal)
+
+    state = TradeJournal(str(path)).open()
+    assert set(state['active_trades']) == {"a", "b"}
+
+@pytest.mark.asyncio
+async def test_periodic_compaction_in_background(tmp_path):
+    path = tmp_path / "trades.jsonl"
+    journal = TradeJournal(str(path), fsync_interval=0.01, compact_every=3)
+    journal.open()
+    journal.start()
+
+    for trade_id in ("a", "b", "c"):
+        journal.record(EVENT_EXECUTION, make_trade(trade_id))
+    await asyncio.sleep(0.1)
+
+    assert journal.snapshot_path.exists()
+    assert journal._events_since_snapshot == 0
+
+    await journal.close()
+    state = TradeJournal(str(path)).open()
+    assert set(state['active_trades']) == {"a", "b", "c"}
+
+def make_journaled_engine(path) -> TradingEngine:
+    settings = load_settings()
+    settings.trade_journal_path = str(path)
+    settings.trailing_stop_percent = 10.0
+    engine = TradingEngine(settings)
+    engine._restore_trades()
+    return engine
+
+@pytest.mark.asyncio
+async def test_trailing_peak_restored_after_crash(tmp_path):
+    path = tmp_path / "trades.jsonl"
+    engine = make_journaled_engine(path)
+
+    trade = {**make_trade("a"), 'take_profit': 200.0}
+    engine.active_trades["a"] = trade
+    engine._journal(EVENT_EXECUTION, trade)
+    engine._arm_triggers("a", trade, trade['entry_price'])
+
+    # Picos sobem para 130; uma queda para 125 não aciona o trailing (117)
+    assert engine._evaluate_triggers({'ETH': 130.0}) == []
+    assert engine._evaluate_triggers({'ETH': 125.0}) == []
+    assert engine.trigger_index.trailing_peak("a") == 130.0
+    crash(engine.trade_journal)
+
+    restored = make_journaled_engine(path)
+    try:
+        assert restored.trigger_index.trailing_peak("a") == 130.0
+        assert restored.trigger_index.stop_level("a") == pytest.approx(117.0)
+        assert restored._evaluate_triggers({'ETH': 116.0}) == [("a", "trailing_stop", 116.0)]
+    finally:
+        await restored.trade_journal.close()
+
+def test_trailing_peak_event_only_raises_open_trades_of_symbol(tmp_path):
+    journal = TradeJournal(str(tmp_path / "trades.jsonl"))
+    journal.open()
+
+    journal.record(EVENT_EXECUTION, make_trade("a"))
+    journal.record(EVENT_EXECUTION, make_trade("b", "SOL"))
+    journal.record(EVENT_TRAILING_PEAK, {'symbol': "ETH", 'peak': 110.0})
+    journal.record(EVENT_EXECUTION, {**make_trade("c"), 'entry_price': 115.0})
+    journal.record(EVENT_TRAILING_PEAK, {'symbol': "ETH", 'peak': 112.0})
+
+    trades = journal.state['active_trades']
+    assert trades["a"]['trailing_peak'] == 112.0
+    assert 'trailing_peak' not in trades["b"]
+    assert trades["c"]['trailing_peak'] == 115.0
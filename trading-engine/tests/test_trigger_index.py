@@ -0,0 +1,94 @@
+"""
+Testes do índice de gatilhos de preço
+"""
+
+import random
+
+from core.trigger_index import PriceTriggerIndex, STOP_LOSS, TAKE_PROFIT, TRAILING_STOP
+
+def test_fires_only_crossed_levels():
+    index = PriceTriggerIndex()
+    index.add("a", "ETH", stop_loss=95.0, take_profit=120.0)
+    index.add("b", "ETH", stop_loss=90.0, take_profit=110.0)
+    index.add("c", "SOL", stop_loss=50.0)
+
+    assert index.update_price("ETH", 100.0) == []
+    assert index.update_price("ETH", 94.0) == [("a", STOP_LOSS)]
+    assert index.update_price("ETH", 111.0) == [("b", TAKE_PROFIT)]
+    assert len(index) == 1
+    assert index.symbols() == ["SOL"]
+
+def test_trailing_buckets_merge_when_price_rises():
+    index = PriceTriggerIndex()
+    index.add("a", "ETH", trailing_percent=10, reference_price=100.0)
+    index.add("b", "ETH", trailing_percent=10, reference_price=105.0)
+    index.add("c", "ETH", trailing_percent=10, reference_price=130.0)
+
+    # Picos abaixo do preço são fundidos em um único bucket
+    assert index.update_price("ETH", 120.0) == []
+    group = index._symbols["ETH"].trailing[10]
+    assert list(group.peaks) == [120.0, 130.0]
+    assert group.bucket_of["a"] is group.bucket_of["b"]
+    assert index.trailing_peak("a") == 120.0
+    assert index.stop_level("a") == 108.0
+
+    # Queda aciona o bucket do pico 130 (stop 117) mas não o de 120 (stop 108)
+    assert index.update_price("ETH", 115.0) == [("c", TRAILING_STOP)]
+    assert sorted(trade_id for trade_id, _ in index.update_price("ETH", 107.0)) == ["a", "b"]
+    assert len(index) == 0
+
+def test_stop_takes_priority_and_trade_fires_once():
+    index = PriceTriggerIndex()
+    index.add("a", "ETH", stop_loss=95.0, trailing_percent=5, reference_price=100.0)
+
+    assert index.update_price("ETH", 90.0) == [("a", STOP_LOSS)]
+    assert "a" not in index
+    assert index.update_price("ETH", 80.0) == []
+
+def test_remove_and_readd_replace_levels():
+    index = PriceTriggerIndex()
+    index.add("a", "ETH", stop_loss=95.0, trailing_percent=5, reference_price=100.0)
+    index.add("a", "ETH", stop_loss=80.0)
+
+    assert index.stop_level("a") == 80.0
+    assert index.update_price("ETH", 90.0) == []
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.symbols() == []
+
+def test_trailing_matches_brute_force_on_random_prices():
+    rng = random.Random(7)
+    index = PriceTriggerIndex()
+    peaks = {}
+    fired = set()
+
+    for step in range(400):
+        if rng.random() < 0.2:
+            trade_id = f"t{step}"
+            price = rng.uniform(80, 120)
+            index.add(trade_id, "ETH", trailing_percent=5, reference_price=price)
+            peaks[trade_id] = price
+        if rng.random() < 0.05 and peaks:
+            trade_id = rng.choice(sorted(peaks))
+            assert index.remove(trade_id)
+            del peaks[trade_id]
+
+        price = rng.uniform(80, 120)
+        expected = set()
+        for trade_id in list(peaks):
+            peaks[trade_id] = max(peaks[trade_id], price)
+            if peaks[trade_id] * 0.95 >= price:
+                expected.add(trade_id)
+                del peaks[trade_id]
+
+        result = index.update_price("ETH", price)
+        assert {trade_id for trade_id, _ in result} == expected
+        fired |= expected
+        for trade_id, peak in peaks.items():
+            assert index.trailing_peak(trade_id) == peak
+
+        group = index._symbols.get("ETH")
+        if group is not None and 5 in group.trailing:
+            assert list(group.trailing[5].peaks) == sorted(group.trailing[5].peaks)
+
+    assert fired
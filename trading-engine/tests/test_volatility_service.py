@@ -0,0 +1,65 @@
+"""
+Testes da volatilidade por token e do ajuste do tamanho da posição
+"""
+
+import math
+
+import pytest
+
+from config.settings import load_settings
+from core.risk_manager import RiskManager
+from core.volatility_service import VolatilityService
+
+def zigzag(count: int, step: float, start: float = 100.0):
+    """Preços alternando +step% / -step%"""
+    prices = [start]
+    for i in range(count - 1):
+        prices.append(prices[-1] * (1 + step / 100 if i % 2 == 0 else 1 - step / 100))
+    return prices
+
+def feed(service: VolatilityService, symbol: str, prices, interval: float, start: float = 0.0):
+    for i, price in enumerate(prices):
+        service.update({symbol: price}, now=start + i * interval)
+
+def test_scales_by_measured_sample_interval():
+    fast, slow = VolatilityService(window=10, atr_period=5), VolatilityService(window=10, atr_period=5)
+    prices = zigzag(30, 1.0)
+
+    feed(fast, 'ETH', prices, interval=5.0)
+    feed(slow, 'ETH', prices, interval=60.0)
+
+    assert fast.volatility('ETH') / slow.volatility('ETH') == pytest.approx(math.sqrt(60 / 5))
+
+def test_repeated_prices_are_not_new_samples():
+    repeated, distinct = VolatilityService(window=10, atr_period=5), VolatilityService(window=10, atr_period=5)
+    prices = zigzag(30, 1.0)
+
+    # Cada preço chega duas vezes (cache entre atualizações da API) a cada 5s
+    feed(repeated, 'ETH', [price for price in prices for _ in range(2)], interval=5.0)
+    feed(distinct, 'ETH', prices, interval=10.0)
+
+    assert repeated.volatility('ETH') == pytest.approx(distinct.volatility('ETH'))
+    assert repeated.bank.get('ETH', 'volatility').count == distinct.bank.get('ETH', 'volatility').count
+
+def test_not_ready_until_window_is_filled():
+    service = VolatilityService(window=10, atr_period=5)
+    feed(service, 'ETH', zigzag(5, 1.0), interval=5.0)
+
+    assert service.volatility('ETH') is None
+    assert service.adjustment('ETH') == 1.0
+    assert service.adjustment(None) == 1.0
+
+@pytest.mark.parametrize("step, expected", [(5.0, 0.25), (0.001, 1.0)])
+def test_position_size_adjustment_is_clamped(step, expected):
+    settings = load_settings()
+    settings.capital_usdt = 1000.0
+    settings.max_position_size_percent = 5.0
+    settings.volatility_min_adjustment = 0.25
+    risk_manager = RiskManager(settings)
+    feed(risk_manager.volatility_service, 'ETH', zigzag(40, step), interval=60.0)
+
+    adjustment = risk_manager.volatility_service.adjustment('ETH')
+    assert settings.volatility_min_adjustment <= adjustment <= 1.0
+    assert adjustment == pytest.approx(expected)
+    assert risk_manager.calculate_position_size(10.0, 1000.0, symbol='ETH') == pytest.approx(50.0 * expected)
+    assert risk_manager.calculate_position_size(10.0, 1000.0) == pytest.approx(50.0)
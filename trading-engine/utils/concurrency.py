@@ -0,0 +1,48 @@
+"""
+Concurrency helpers for the Trading Engine
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+async def gather_bounded(keys: Iterable[Hashable],
+                         fetch: Callable[[Hashable], Awaitable[Any]],
+                         limit: int,
+                         timeout: Optional[float] = None) -> Dict[Hashable, Any]:
+    """
+    Executa `fetch(key)` para cada chave com no máximo `limit` chamadas em voo
+
+    Falhas e timeouts são registrados e omitidos do resultado, então uma chave
+    lenta não bloqueia as demais e o tempo total fica próximo ao da chamada
+    individual mais lenta.
+
+    O `timeout` opcional cobre a chamada inteira, a partir da entrada no
+    semáforo. Se `fetch` aguarda um limitador de taxa, o timeout deve ficar na
+    própria requisição (ex.: `TokenBucketRateLimiter.get_json`), para que a
+    espera pelo orçamento não seja contada como lentidão da API.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    keys = list(keys)
+
+    async def run(key):
+        async with semaphore:
+            if timeout:
+                return await asyncio.wait_for(fetch(key), timeout=timeout)
+            return await fetch(key)
+
+    results = await asyncio.gather(*(run(key) for key in keys), return_exceptions=True)
+
+    collected = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.warning(f"Fetch timed out for {key} after {timeout}s")
+        elif isinstance(result, Exception):
+            logger.error(f"Fetch failed for {key}: {result}")
+        elif result is not None:
+            collected[key] = result
+
+    return collected
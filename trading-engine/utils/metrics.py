@@ -0,0 +1,143 @@
+"""
+Latency Instrumentation for the Trading Engine (Prometheus)
+"""
+
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Loops e estágios do caminho de trading
+LOOP_MARKET_ANALYSIS = "market_analysis"
+LOOP_TRADE_MONITORING = "trade_monitoring"
+
+STAGE_FETCH = "fetch"
+STAGE_ANALYZE = "analyze"
+STAGE_RISK = "risk"
+STAGE_QUOTE = "quote"
+STAGE_SWAP = "swap"
+STAGE_REPORT = "report"
+
+# Faixas pensadas para comparar com o price_update_interval (segundos)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+LOOP_ITERATION_SECONDS = Histogram(
+    "trading_engine_loop_iteration_seconds",
+    "Duração de uma iteração dos loops do engine (sem o sleep entre iterações)",
+    ["loop"],
+    buckets=LATENCY_BUCKETS
+)
+
+STAGE_SECONDS = Histogram(
+    "trading_engine_stage_seconds",
+    "Duração de cada estágio do caminho de trading",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "trading_engine_event_loop_lag_seconds",
+    "Atraso do event loop em relação ao agendado",
+    buckets=LAG_BUCKETS
+)
+
+EVENT_LOOP_LAG_LAST_SECONDS = Gauge(
+    "trading_engine_event_loop_lag_last_seconds",
+    "Último atraso medido do event loop"
+)
+
+def time_loop(loop: str):
+    """Context manager que mede uma iteração de loop"""
+    return LOOP_ITERATION_SECONDS.labels(loop=loop).time()
+
+def time_stage(stage: str):
+    """Context manager que mede um estágio (fetch, analyze, risk, quote, swap, report)"""
+    return STAGE_SECONDS.labels(stage=stage).time()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Métricas no formato de exposição do Prometheus (corpo, content-type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def get_latency_summary() -> Dict[str, Dict]:
+    """
+    Resumo (contagem e média em ms) das iterações, estágios e lag do event loop
+    """
+    summary = {"loops": {}, "stages": {}, "event_loop_lag": {}}
+    sections = (
+        (LOOP_ITERATION_SECONDS, "loops", "loop"),
+        (STAGE_SECONDS, "stages", "stage"),
+        (EVENT_LOOP_LAG_SECONDS, "event_loop_lag", None)
+    )
+
+    for histogram, section, label in sections:
+        totals: Dict[str, Dict[str, float]] = {}
+        for metric in histogram.collect():
+            for sample in metric.samples:
+                if not sample.name.endswith(("_count", "_sum")):
+                    continue
+                key = sample.labels.get(label) if label else "event_loop"
+                field = "count" if sample.name.endswith("_count") else "sum"
+                totals.setdefault(key, {})[field] = sample.value
+
+        for key, values in totals.items():
+            count = int(values.get("count", 0))
+            entry = {
+                "count": count,
+                "mean_ms": round(values.get("sum", 0.0) / count * 1000, 3) if count else 0.0
+            }
+            if label:
+                summary[section][key] = entry
+            else:
+                summary[section] = entry
+
+    return summary
+
+class EventLoopLagProbe:
+    """
+    Mede o atraso do event loop
+
+    Uma task dorme `interval` segundos e compara o horário em que acordou com
+    o esperado; a diferença é o tempo em que o loop ficou ocupado com outras
+    tarefas (código síncrono longo, I/O bloqueante, etc.).
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+
+    def start(self):
+        """Inicia a task de medição"""
+        if self.task and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info("Event loop lag probe started", interval=self.interval)
+
+    async def stop(self):
+        """Para a task de medição"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            EVENT_LOOP_LAG_LAST_SECONDS.set(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > self.interval:
+                logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms")